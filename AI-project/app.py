@@ -7,6 +7,11 @@ from routes.health import health_bp
 from routes.detection import detection_bp
 from routes.nutrition import nutrition_bp
 from routes.foods import foods_bp
+from routes.analyze import analyze_bp
+from routes.jobs import jobs_bp
+from routes.metrics import metrics_bp, init_request_metrics
+from routes.tracing import init_request_tracing
+from routes.uploads import SpooledUploadRequest
 
 
 load_dotenv()
@@ -14,6 +19,7 @@ load_dotenv()
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.request_class = SpooledUploadRequest
     
 
     CORS(app, origins=["*"])
@@ -23,6 +29,11 @@ def create_app():
     app.register_blueprint(detection_bp, url_prefix='/api')
     app.register_blueprint(nutrition_bp, url_prefix='/api')
     app.register_blueprint(foods_bp, url_prefix='/api')
+    app.register_blueprint(analyze_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    init_request_metrics(app)
+    init_request_tracing(app)
 
     
     return app
@@ -32,5 +43,5 @@ if __name__ == '__main__':
     app.run(
         host='0.0.0.0',
         port=5000,
-        debug=True
+        debug=Config.DEBUG
     )
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Sync vs async nutrition lookups at a fixed concurrency, against a local stub
+of the FDC API with a fixed per-request latency. The sync mode runs
+USDAService.get_simple_nutrition on a thread pool; the async mode awaits
+AsyncUSDAService.get_simple_nutrition under a semaphore. Caches are disabled
+so every lookup reaches the stub.
+
+Usage:
+    python benchmarks/benchmark_async.py --lookups 200 --concurrency 20 --latency-ms 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_servers import start as start_stubs, upstream_counts
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def summarize(mode, latencies, seconds, counts):
+    return {
+        "mode": mode,
+        "lookups": len(latencies),
+        "wall_s": round(seconds, 3),
+        "lookups_per_s": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "upstream_requests": dict(counts),
+    }
+
+
+def run_sync(names, concurrency):
+    from services.usda_service import USDAService
+
+    def timed(name):
+        started = time.perf_counter()
+        USDAService.get_simple_nutrition(name)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, names))
+    return latencies, time.perf_counter() - started
+
+
+def run_async(names, concurrency):
+    from services.async_usda_service import AsyncUSDAService
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def timed(name):
+            async with limit:
+                started = time.perf_counter()
+                await AsyncUSDAService.get_simple_nutrition(name)
+                return (time.perf_counter() - started) * 1000
+
+        return await asyncio.gather(*(timed(name) for name in names))
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async upstream lookups")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--unmatched", type=float, default=0.2,
+                        help="fraction of names that fall back to averaging")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stubs(fdc={"latency_ms": args.latency_ms})
+
+    # Configure before the services read Config
+    os.environ.update({
+        "USDA_BACKEND": "api",
+        "USDA_API_KEY": "benchmark",
+        "USDA_BASE_URL": base_url,
+        "USDA_CACHE_ENABLED": "false",
+        "NUTRITION_RESULT_CACHE_ENABLED": "false",
+    })
+
+    results = []
+    every = max(1, round(1 / args.unmatched)) if args.unmatched > 0 else None
+    for mode, runner in (("sync", run_sync), ("async", run_async)):
+        names = [f"{'unmatched' if every and i % every == 0 else 'stubfood'}{mode}{i}"
+                 for i in range(args.lookups)]
+        upstream_counts(base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, seconds = runner(names, args.concurrency)
+        results.append(summarize(mode, latencies, seconds, upstream_counts(base_url)))
+
+    summary = {
+        "concurrency": args.concurrency,
+        "upstream_latency_ms": args.latency_ms,
+        "unmatched_fraction": args.unmatched,
+        "results": results,
+        "async_speedup": round(results[0]["wall_s"] / results[1]["wall_s"], 2),
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Batch classification benchmark: the compiled FoodClassifier against the
+original per-call keyword loop, on thousands of synthetic detection labels.
+
+Usage:
+    python benchmarks/benchmark_classifier.py --labels 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.usda_service import USDAService
+
+MODIFIERS = ["", "raw", "grilled", "fresh", "with sauce", "slices", "cooked", "Roll", "bowl"]
+OTHER_LABELS = ["pizza", "hamburger", "french fries", "egg", "tofu", "sushi", "taco", "plate", "fork"]
+
+
+def legacy_classify_food_type(food_name):
+    """USDAService.classify_food_type before the compiled classifier"""
+
+    food_name_lower = food_name.lower()
+    
+    food_categories = {
+    
+        'fresh_fruits': [
+            'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 
+            'raspberry', 'mango', 'pineapple', 'watermelon', 'melon', 'peach',
+            'pear', 'plum', 'cherry', 'kiwi', 'lemon', 'lime', 'avocado'
+        ],
+       
+        'fresh_vegetables': [
+            'carrot', 'broccoli', 'tomato', 'cucumber', 'lettuce', 'spinach',
+            'kale', 'cabbage', 'onion', 'garlic', 'potato', 'sweet potato',
+            'bell pepper', 'chili', 'mushroom', 'celery', 'asparagus'
+        ],
+      
+        'bakery': [
+            'croissant', 'strudel', 'pie', 'bread', 'muffin', 'cake', 'cookie',
+            'biscuit', 'pastry', 'donut', 'bagel', 'roll', 'bun'
+        ],
+      
+        'beverages': [
+            'juice', 'smoothie', 'milk', 'tea', 'coffee', 'soda', 'water',
+            'lemonade', 'shake', 'drink', 'beverage'
+        ],
+     
+        'meat': [
+            'chicken', 'beef', 'pork', 'steak', 'bacon', 'sausage', 'ham',
+            'turkey', 'duck', 'lamb', 'veal'
+        ],
+      
+        'seafood': [
+            'salmon', 'tuna', 'shrimp', 'prawn', 'crab', 'lobster', 'fish',
+            'cod', 'tilapia', 'sardine', 'oyster', 'clam'
+        ],
+       
+        'dairy': [
+            'cheese', 'yogurt', 'butter', 'cream', 'ice cream', 'custard'
+        ],
+       
+        'grains': [
+            'rice', 'pasta', 'noodle', 'oatmeal', 'cereal', 'quinoa', 'barley',
+            'bread', 'toast'
+        ],
+     
+        'nuts_seeds': [
+            'almond', 'walnut', 'peanut', 'cashew', 'pecan', 'seed', 'nut'
+        ],
+      
+        'processed': [
+            'babyfood', 'canned', 'frozen', 'sauce', 'ketchup', 'mayonnaise',
+            'chip', 'cracker', 'popcorn'
+        ],
+       
+        'desserts': [
+            'chocolate', 'candy', 'sweet', 'dessert', 'pudding'
+        ]
+    }
+    
+
+    for category, keywords in food_categories.items():
+        for keyword in keywords:
+            if keyword in food_name_lower:
+                return category
+    
+    return 'unknown'
+
+
+def make_labels(count, seed):
+    rng = random.Random(seed)
+    keywords = [keyword for words in USDAService.CLASSIFIER.keywords.values()
+                for keyword in words] + OTHER_LABELS
+    labels = []
+    for _ in range(count):
+        label = f"{rng.choice(MODIFIERS)} {rng.choice(keywords)} {rng.choice(MODIFIERS)}"
+        labels.append(" ".join(label.split()).title())
+    return labels
+
+
+def time_batch(func, labels):
+    start = time.perf_counter()
+    results = [func(label) for label in labels]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classify_food_type")
+    parser.add_argument("--labels", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    labels = make_labels(args.labels, args.seed)
+    legacy, legacy_seconds = time_batch(legacy_classify_food_type, labels)
+    compiled, compiled_seconds = time_batch(USDAService.CLASSIFIER.classify, labels)
+
+    mismatches = [(label, old, new) for label, old, new in zip(labels, legacy, compiled) if old != new]
+    summary = {
+        "labels": len(labels),
+        "legacy_us_per_label": round(legacy_seconds / len(labels) * 1e6, 2),
+        "compiled_us_per_label": round(compiled_seconds / len(labels) * 1e6, 2),
+        "speedup": round(legacy_seconds / compiled_seconds, 2),
+        "mismatches": len(mismatches),
+    }
+    print(json.dumps(summary, indent=2))
+    for label, old, new in mismatches[:10]:
+        print(f"  {label!r}: legacy={old} compiled={new}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
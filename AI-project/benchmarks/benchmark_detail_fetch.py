@@ -0,0 +1,92 @@
+"""
+USDA detail fetch modes (USDA_DETAIL_FETCH_MODE) against a local stub of the
+FDC API with a fixed per-request latency: serial GET /food/<id> calls,
+concurrent ones (USDA_DETAIL_CONCURRENCY) and bulk POST /foods chunks
+(USDA_BULK_CHUNK_SIZE). Each round fetches a fresh set of ids through
+USDAService.get_foods_by_fdc_ids with the caches disabled, so every id
+reaches the stub.
+
+Usage:
+    python benchmarks/benchmark_detail_fetch.py --ids 20 --rounds 5 --latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_servers import start as start_stubs, upstream_counts
+
+MODES = ("serial", "concurrent", "bulk")
+
+
+def run_mode(mode, ids, rounds):
+    from config.settings import Config
+    from services.usda_service import USDAService
+
+    Config.USDA_DETAIL_FETCH_MODE = mode
+    timings = []
+    for round_index in range(rounds):
+        fdc_ids = [(round_index + 1) * 1_000_000 + MODES.index(mode) * 10_000 + i for i in range(ids)]
+        started = time.perf_counter()
+        details = USDAService.get_foods_by_fdc_ids(fdc_ids)
+        timings.append((time.perf_counter() - started) * 1000)
+        if len(details) != ids:
+            raise RuntimeError(f"{mode}: fetched {len(details)} of {ids} details")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent vs bulk USDA detail fetches")
+    parser.add_argument("--ids", type=int, default=20, help="details per fetch (the averaging fallback uses up to 20)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stubs(fdc={"latency_ms": args.latency_ms})
+
+    # Configure before the services read Config
+    os.environ.update({
+        "USDA_BACKEND": "api",
+        "USDA_API_KEY": "benchmark",
+        "USDA_BASE_URL": base_url,
+        "USDA_CACHE_ENABLED": "false",
+    })
+
+    results = []
+    for mode in MODES:
+        upstream_counts(base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = sorted(run_mode(mode, args.ids, args.rounds))
+        results.append({
+            "mode": mode,
+            "fetches": len(timings),
+            "p50_ms": round(timings[len(timings) // 2], 1),
+            "max_ms": round(timings[-1], 1),
+            "upstream_requests": dict(upstream_counts(base_url)),
+        })
+
+    serial = results[0]["p50_ms"]
+    for result in results:
+        result["speedup_vs_serial"] = round(serial / result["p50_ms"], 1)
+
+    summary = {
+        "ids_per_fetch": args.ids,
+        "upstream_latency_ms": args.latency_ms,
+        "results": results,
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
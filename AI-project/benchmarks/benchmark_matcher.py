@@ -0,0 +1,165 @@
+"""
+Compare the original linear scorer over 25 search results with the FoodIndex
+BM25 matcher, for ranking quality and speed.
+
+Usage:
+    python benchmarks/benchmark_matcher.py                 # sample fixture store
+    python benchmarks/benchmark_matcher.py --db data/fdc.sqlite3 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.fdc_store import FDCImporter, FDCStore
+from services.food_index import FoodIndex
+from services.usda_service import USDAService
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "data", "fixtures", "fdc_sample.json")
+
+# query -> acceptable FDC ids in the sample fixture
+LABELED_QUERIES = {
+    "apple": {171688, 1750340, 1750341},
+    "banana": {1105314, 173944},
+    "strawberry": {2346411},
+    "broccoli": {747447, 170379},
+    "chicken breast": {2346392, 171477},
+    "rice": {2512381, 169756, 168878},
+    "almond": {170567},
+    "cheese": {173424},
+    "salmon": {2345173},
+    "carrot": {1999630, 170393},
+    "onion": {1999634, 170000},
+    "walnut": {170187},
+    "avocado": {171705},
+    "apple juice": {173933},
+    "apple pie": {174987},
+    "chicken nuggets": {173676},
+    "tomato sauce": {168094},
+}
+
+
+def legacy_find_best_match(food_name, search_results):
+    """USDAService.find_best_match before the BM25 index"""
+    food_type = USDAService.classify_food_type(food_name)
+    food_name_lower = food_name.lower().strip()
+    strategy = USDAService.CLASSIFIER.strategy(food_type)
+
+    scored_foods = []
+    for food in search_results:
+        description = food.get("description", "").lower()
+        score = 0
+
+        if food_name_lower in description:
+            score += 20
+        elif any(word in description for word in food_name_lower.split()):
+            score += 10
+
+        for keyword in strategy['priority_keywords']:
+            if keyword in description:
+                score += 5
+
+        for exclude in strategy['exclude_keywords']:
+            if exclude in description and exclude not in food_name_lower:
+                score -= 10
+
+        if strategy['prefer_foundation'] and food.get("data_type") == "Foundation":
+            score += 3
+        elif not strategy['prefer_foundation'] and food.get("data_type") == "SR Legacy":
+            score += 2
+
+        if food_type in ['fresh_fruits', 'fresh_vegetables']:
+            if 'babyfood' in description:
+                score -= 15
+            if any(word in description for word in ['pie', 'strudel', 'croissant']):
+                score -= 12
+
+        scored_foods.append({'food': food, 'score': score})
+
+    scored_foods.sort(key=lambda x: x['score'], reverse=True)
+    valid_matches = [item for item in scored_foods if item['score'] > 5]
+    return valid_matches[0]['food'] if valid_matches else None
+
+
+def fixture_store():
+    path = os.path.join(tempfile.mkdtemp(), "fdc_sample.sqlite3")
+    importer = FDCImporter(path)
+    importer.import_path(FIXTURE)
+    importer.finish()
+    return FDCStore.open(path)
+
+
+def legacy_match(store, query):
+    foods = store.search(query, 25, USDAService.DATA_TYPES)["foods"]
+    return legacy_find_best_match(query, foods), foods
+
+
+def index_match(index, query):
+    best = USDAService._pick_best_match(query, index)
+    return None if "error" in best else best
+
+
+def time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="local FDC store (default: build one from the sample fixture)")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    store = FDCStore.open(args.db) if args.db else fixture_store()
+
+    start = time.perf_counter()
+    index = FoodIndex.for_store(store)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rows = []
+    for query, expected in LABELED_QUERIES.items():
+        legacy, candidates = legacy_match(store, query)
+        ranked = index_match(index, query)
+        legacy_scoring_us = time_per_call(lambda: legacy_find_best_match(query, candidates), args.repeat)
+        rows.append({
+            "query": query,
+            "legacy": legacy["description"] if legacy else None,
+            "legacy_correct": bool(legacy and legacy["fdc_id"] in expected),
+            "index": ranked["description"] if ranked else None,
+            "index_correct": bool(ranked and ranked["fdc_id"] in expected),
+            "legacy_us": round(time_per_call(lambda: legacy_match(store, query), args.repeat), 1),
+            "legacy_scoring_us": round(legacy_scoring_us, 1),
+            "index_us": round(time_per_call(lambda: index_match(index, query), args.repeat), 1),
+        })
+
+    for row in rows:
+        print(f"{row['query']:<16} legacy {'ok ' if row['legacy_correct'] else 'BAD'} "
+              f"{row['legacy_us']:>8.1f}us  index {'ok ' if row['index_correct'] else 'BAD'} "
+              f"{row['index_us']:>7.1f}us  -> {row['index']}")
+
+    summary = {
+        "foods_indexed": len(index),
+        "index_build_ms": round(build_ms, 2),
+        "legacy_accuracy": round(sum(r["legacy_correct"] for r in rows) / len(rows), 3),
+        "index_accuracy": round(sum(r["index_correct"] for r in rows) / len(rows), 3),
+        "legacy_mean_us": round(sum(r["legacy_us"] for r in rows) / len(rows), 1),
+        "legacy_scoring_mean_us": round(sum(r["legacy_scoring_us"] for r in rows) / len(rows), 1),
+        "index_mean_us": round(sum(r["index_us"] for r in rows) / len(rows), 1),
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "queries": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
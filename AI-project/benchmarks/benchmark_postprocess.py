@@ -0,0 +1,137 @@
+"""
+Post-processing benchmark: format_detection_results with the NumPy
+confidence/NMS/top-k stage against the original formatting loop and a
+pure-Python NMS, on synthetic predictions with thousands of boxes.
+
+Usage:
+    python benchmarks/benchmark_postprocess.py --boxes 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+from services.postprocess import filter_predictions
+from services.roboflow_service import RoboflowService
+
+CLASSES = ["apple", "banana", "rice", "broccoli", "chicken breast", "salad", "bread", "egg"]
+
+
+def make_predictions(count, seed, width=1920, height=1440):
+    """Clusters of jittered boxes around a few objects, like raw detector output"""
+    rng = random.Random(seed)
+    objects = []
+    for _ in range(max(1, count // 100)):
+        w, h = rng.uniform(60, 400), rng.uniform(60, 400)
+        objects.append((rng.uniform(w / 2, width - w / 2), rng.uniform(h / 2, height - h / 2),
+                        w, h, rng.choice(CLASSES)))
+
+    predictions = []
+    for _ in range(count):
+        x, y, w, h, label = rng.choice(objects)
+        if rng.random() < 0.15:
+            label = rng.choice(CLASSES)
+        predictions.append({
+            "x": x + rng.gauss(0, w * 0.05),
+            "y": y + rng.gauss(0, h * 0.05),
+            "width": w * rng.uniform(0.9, 1.1),
+            "height": h * rng.uniform(0.9, 1.1),
+            "confidence": rng.random(),
+            "class": label,
+        })
+    return predictions
+
+
+def legacy_format(raw_results):
+    """RoboflowService.format_detection_results before post-processing"""
+    predictions = raw_results.get('predictions', [])
+    detected_foods = []
+    for pred in predictions:
+        detected_foods.append({
+            "name": pred.get('class', 'unknown'),
+            "confidence": round(pred.get('confidence', 0) * 100, 2),
+            "bbox": {
+                "x": pred.get('x', 0),
+                "y": pred.get('y', 0),
+                "width": pred.get('width', 0),
+                "height": pred.get('height', 0)
+            }
+        })
+    detected_foods.sort(key=lambda x: x['confidence'], reverse=True)
+    return {"success": True, "detected_foods": detected_foods,
+            "total_detections": len(detected_foods), "image_info": raw_results.get('image', {})}
+
+
+def python_iou(a, b):
+    ax1, ay1, ax2, ay2 = a["x"] - a["width"] / 2, a["y"] - a["height"] / 2, a["x"] + a["width"] / 2, a["y"] + a["height"] / 2
+    bx1, by1, bx2, by2 = b["x"] - b["width"] / 2, b["y"] - b["height"] / 2, b["x"] + b["width"] / 2, b["y"] + b["height"] / 2
+    inter = max(0.0, min(ax2, bx2) - max(ax1, bx1)) * max(0.0, min(ay2, by2) - max(ay1, by1))
+    union = a["width"] * a["height"] + b["width"] * b["height"] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def python_filter(predictions, min_confidence, iou_threshold):
+    """Reference per-class greedy NMS in plain Python"""
+    candidates = sorted((p for p in predictions if p["confidence"] >= min_confidence),
+                        key=lambda p: p["confidence"], reverse=True)
+    kept = []
+    for pred in candidates:
+        if all(other["class"] != pred["class"] or python_iou(pred, other) <= iou_threshold for other in kept):
+            kept.append(pred)
+    return kept
+
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection post-processing")
+    parser.add_argument("--boxes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    predictions = make_predictions(args.boxes, args.seed)
+    raw = {"predictions": predictions, "image": {"width": 1920, "height": 1440}}
+
+    legacy, legacy_seconds = best_of(lambda: legacy_format(raw), args.repeat)
+    formatted, new_seconds = best_of(lambda: RoboflowService.format_detection_results(raw), args.repeat)
+    vectorized, vectorized_seconds = best_of(
+        lambda: filter_predictions(predictions, Config.DETECT_MIN_CONFIDENCE, Config.DETECT_NMS_IOU,
+                                   max_candidates=len(predictions)), args.repeat)
+    reference, python_seconds = best_of(
+        lambda: python_filter(predictions, Config.DETECT_MIN_CONFIDENCE, Config.DETECT_NMS_IOU), 1)
+
+    summary = {
+        "boxes": len(predictions),
+        "legacy_format_ms": round(legacy_seconds * 1000, 2),
+        "legacy_detections": legacy["total_detections"],
+        "format_ms": round(new_seconds * 1000, 2),
+        "format_detections": formatted["total_detections"],
+        "per_class_nms_numpy_ms": round(vectorized_seconds * 1000, 2),
+        "per_class_nms_python_ms": round(python_seconds * 1000, 2),
+        "nms_speedup": round(python_seconds / vectorized_seconds, 2),
+        "nms_matches_reference": [id(p) for p in vectorized] == [id(p) for p in reference],
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare two run_suite.py result files, e.g. before and after a change.
+Throughput is compared per scenario and concurrency (higher is better),
+latency percentiles and microbenchmarks by time (lower is better). Changes
+worse than --threshold percent are flagged, and the exit status is 1 if
+there are any, so the script can gate CI.
+
+Usage:
+    python benchmarks/compare.py base.json candidate.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+LOAD_METRICS = [("requests_per_s", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)]
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(old, new, higher_is_better):
+    """Percent change, signed so that positive is always an improvement"""
+    if not old:
+        return None
+    percent = (new - old) / old * 100
+    # + 0.0 turns an unchanged latency's -0.0 into 0.0
+    return (percent if higher_is_better else -percent) + 0.0
+
+
+def rows(base, candidate):
+    """(name, metric, old, new, improvement %) for everything present in both runs"""
+    base_load = {(entry["scenario"], entry["concurrency"]): entry for entry in base.get("load", [])}
+    for entry in candidate.get("load", []):
+        old = base_load.get((entry["scenario"], entry["concurrency"]))
+        if old is None:
+            continue
+        name = f"{entry['scenario']} c={entry['concurrency']}"
+        for metric, higher_is_better in LOAD_METRICS:
+            yield name, metric, old[metric], entry[metric], change(old[metric], entry[metric], higher_is_better)
+
+    base_micro = base.get("micro", {})
+    for metric, value in candidate.get("micro", {}).items():
+        if metric in base_micro:
+            yield "micro", metric, base_micro[metric], value, change(base_micro[metric], value, False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    base, candidate = load(args.base), load(args.candidate)
+    print(f"base {base['meta']['revision']}  ->  candidate {candidate['meta']['revision']}")
+    base_settings, candidate_settings = base["meta"]["settings"], candidate["meta"]["settings"]
+    for key in sorted(set(base_settings) | set(candidate_settings)):
+        if key not in ("scenarios", "concurrency", "skip_micro") and base_settings.get(key) != candidate_settings.get(key):
+            print(f"note: {key} differs ({base_settings.get(key)} -> {candidate_settings.get(key)})")
+    for run in (base, candidate):
+        errors = [entry for entry in run.get("load", []) if entry.get("error_rate")]
+        if errors and not run["meta"]["settings"].get("error_rate"):
+            print(f"note: {run['meta']['revision']} had failed requests in "
+                  f"{', '.join(sorted({entry['scenario'] for entry in errors}))}")
+
+    regressions = 0
+    print(f"{'':<26} {'metric':<40} {'base':>10} {'candidate':>10} {'better':>8}")
+    for name, metric, old, new, improvement in rows(base, candidate):
+        if improvement is None:
+            flag = ""
+        elif improvement < -args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif improvement > args.threshold:
+            flag = "improved"
+        else:
+            flag = ""
+        shown = "n/a" if improvement is None else f"{improvement:+.1f}%"
+        print(f"{name:<26} {metric:<40} {old:>10} {new:>10} {shown:>8}  {flag}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Closed-loop HTTP load test against a running server: N client threads send
+back-to-back requests for a fixed time, then throughput (total and per server
+core) and latency percentiles are reported.
+
+Start the server first, e.g. with the fake detector so no upstream is hit:
+    DETECTOR_BACKEND=fake gunicorn -c gunicorn.conf.py wsgi:app
+
+Usage:
+    python benchmarks/load_test.py --scenario nutrition --concurrency 16 --duration 20
+
+benchmarks/run_suite.py runs every scenario against stub upstreams.
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+
+import requests
+
+STANDARD_FOODS = ["apple", "banana", "orange", "rice", "bread", "egg", "broccoli", "carrot"]
+BATCH_SIZE = 4
+
+
+def make_jpeg(width=1280, height=960):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.radial_gradient("L").resize((width, height)).convert("RGB").save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _upload(image, field="image", count=1):
+    return [(field, (f"load{i}.jpg", image, "image/jpeg")) for i in range(count)]
+
+
+def _job(base_url, session, image, follow):
+    """Submit a detection job, then poll it or follow its event stream until it finishes"""
+    response = session.post(f"{base_url}/api/jobs/detect", files=_upload(image), timeout=30)
+    if response.status_code != 202:
+        return response.status_code
+    job = response.json()
+    if follow == "events":
+        with session.get(f"{base_url}{job['events_url']}", stream=True, timeout=120) as events:
+            # e.g. 503 from the per-worker stream cap: a rejection, not a dropped stream
+            if events.status_code != 200:
+                return events.status_code
+            for line in events.iter_lines():
+                if line in (b"event: done", b"event: failed", b"event: timeout", b"event: expired"):
+                    return 200 if line == b"event: done" else line.decode()
+        # A 200 stream that ended without a terminal event
+        return "stream_closed"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        status = session.get(f"{base_url}{job['status_url']}", timeout=30)
+        if status.status_code != 200:
+            return status.status_code
+        if status.json().get("status") in ("done", "failed"):
+            return 200 if status.json()["status"] == "done" else "job_failed"
+        time.sleep(0.02)
+    return "job_timeout"
+
+
+# name -> (route it exercises, request function(base_url, session, counter, image)
+# returning a status). Names that vary with counter keep the app caches cold.
+SCENARIOS = {
+    "health": ("GET /api/health",
+               lambda url, s, n, img: s.get(f"{url}/api/health", timeout=30).status_code),
+    "health_stats": ("GET /api/health/stats",
+                     lambda url, s, n, img: s.get(f"{url}/api/health/stats", timeout=30).status_code),
+    "metrics": ("GET /api/metrics",
+                lambda url, s, n, img: s.get(f"{url}/api/metrics", timeout=30).status_code),
+    "nutrition": ("POST /api/nutrition/by-name",
+                  lambda url, s, n, img: s.post(f"{url}/api/nutrition/by-name", timeout=30, json={
+                      "food_name": STANDARD_FOODS[n % len(STANDARD_FOODS)]}).status_code),
+    "nutrition_upstream": ("POST /api/nutrition/by-name",
+                           lambda url, s, n, img: s.post(f"{url}/api/nutrition/by-name", timeout=30, json={
+                               "food_name": f"{'unmatched' if n % 5 == 0 else 'stubfood'} {n}"}).status_code),
+    "nutrition_batch": ("POST /api/nutrition/by-name/batch",
+                        lambda url, s, n, img: s.post(f"{url}/api/nutrition/by-name/batch", timeout=30, json={
+                            "food_names": [f"stubfood {n} {i}" for i in range(BATCH_SIZE)]}).status_code),
+    "nutrition_search": ("GET /api/nutrition/search",
+                         lambda url, s, n, img: s.get(f"{url}/api/nutrition/search", timeout=30, params={
+                             "query": f"stubfood {n}"}).status_code),
+    "nutrition_fdc": ("GET /api/nutrition/fdc/<fdc_id>",
+                      lambda url, s, n, img: s.get(f"{url}/api/nutrition/fdc/{100000 + n}", timeout=30).status_code),
+    "detect": ("POST /api/detect",
+               lambda url, s, n, img: s.post(f"{url}/api/detect", files=_upload(img), timeout=60).status_code),
+    "detect_batch": ("POST /api/detect/batch",
+                     lambda url, s, n, img: s.post(f"{url}/api/detect/batch", timeout=120,
+                                                   files=_upload(img, "images", BATCH_SIZE)).status_code),
+    "analyze": ("POST /api/analyze",
+                lambda url, s, n, img: s.post(f"{url}/api/analyze", files=_upload(img), timeout=60).status_code),
+    "jobs": ("POST /api/jobs/detect + GET /api/jobs/<job_id>",
+             lambda url, s, n, img: _job(url, s, img, "poll")),
+    "job_events": ("POST /api/jobs/detect + GET /api/jobs/<job_id>/events",
+                   lambda url, s, n, img: _job(url, s, img, "events")),
+    "jobs_stats": ("GET /api/jobs/stats",
+                   lambda url, s, n, img: s.get(f"{url}/api/jobs/stats", timeout=30).status_code),
+}
+
+# Scenarios that upload the test image
+IMAGE_SCENARIOS = {"detect", "detect_batch", "analyze", "jobs", "job_events"}
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_load(base_url, scenario, concurrency, duration, cores=None, image=None, label=""):
+    """Drive one scenario with concurrency client threads for duration seconds; returns the summary"""
+    if scenario in IMAGE_SCENARIOS and image is None:
+        image = make_jpeg()
+    route, send = SCENARIOS[scenario]
+    cores = cores or os.cpu_count()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(worker):
+        session = requests.Session()
+        counter = worker
+        local_latencies, local_statuses = [], {}
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = send(base_url, session, counter, image)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+            counter += concurrency
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    ok = statuses.get(200, 0) + statuses.get(202, 0)
+    return {
+        "scenario": scenario,
+        "route": route,
+        "label": label,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else 0.0,
+        "requests_per_s": round(ok / elapsed, 1),
+        "server_cores": cores,
+        "requests_per_s_per_core": round(ok / elapsed / max(1, cores), 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="nutrition")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of measured load")
+    parser.add_argument("--cores", type=int, default=os.cpu_count(),
+                        help="CPU cores available to the server, for requests/sec per core")
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    summary = run_load(args.url, args.scenario, args.concurrency, args.duration, args.cores, label=args.label)
+    print(json.dumps(summary, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Microbenchmarks of the CPU-bound hot spots, on fixed synthetic inputs:
+classify_food_type, matching a name against 25 search results (the
+per-request FoodIndex build plus ranking done in API mode) and
+format_detection_results on typical and crowded detector output.
+Times are the best of --repeat rounds, per call.
+
+Usage:
+    python benchmarks/microbench.py --repeat 5 --json micro.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_classifier import make_labels
+from benchmark_postprocess import make_predictions
+from services.roboflow_service import RoboflowService
+from services.usda_service import USDAService
+
+MATCH_QUERIES = ["apple", "banana", "chicken breast", "broccoli", "rice", "salmon", "cheddar cheese", "walnut"]
+DISTRACTORS = ["babyfood", "pie filling", "strudel", "juice, canned", "croissant", "sauce", "frozen, breaded"]
+
+
+def search_results(query, count=25):
+    """Stand-in for 25 FDC search hits: plain matches, prepared products and noise"""
+    foods = []
+    for i in range(count):
+        if i % 3 == 0:
+            description = f"{query.title()}, raw, variety {i}"
+        elif i % 3 == 1:
+            description = f"{query.title()}, {DISTRACTORS[i % len(DISTRACTORS)]}"
+        else:
+            description = f"Mixed dish {i}, {DISTRACTORS[i % len(DISTRACTORS)]}"
+        foods.append({"fdc_id": 1000 + i, "description": description,
+                      "data_type": "Foundation" if i % 2 else "SR Legacy"})
+    return foods
+
+
+def best_per_call(func, inputs, repeat):
+    """Fastest round over all inputs, as seconds per call"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in inputs:
+            func(item)
+        elapsed = (time.perf_counter() - started) / len(inputs)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat=5):
+    """All microbenchmarks; keys ending in _us are microseconds per call"""
+    labels = make_labels(5000, seed=7)
+    matches = [(query, search_results(query)) for query in MATCH_QUERIES] * 50
+    typical = {"predictions": make_predictions(100, seed=7), "image": {"width": 1920, "height": 1440}}
+    crowded = {"predictions": make_predictions(2000, seed=7), "image": {"width": 1920, "height": 1440}}
+
+    return {
+        "classify_food_type_us": round(best_per_call(USDAService.classify_food_type, labels, repeat) * 1e6, 2),
+        "match_search_results_us": round(best_per_call(
+            lambda item: USDAService._match_search_results(item[0], item[1]),
+            matches, repeat) * 1e6, 2),
+        "format_detection_results_100_boxes_us": round(best_per_call(
+            RoboflowService.format_detection_results, [typical] * 50, repeat) * 1e6, 2),
+        "format_detection_results_2000_boxes_us": round(best_per_call(
+            RoboflowService.format_detection_results, [crowded] * 5, repeat) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of classification, matching and formatting")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Reproducible benchmark suite that never calls the paid APIs. It starts the
+stub FDC and Roboflow servers (benchmarks/stub_servers.py), boots the app
+under gunicorn against them, and drives every /api/* scenario of
+load_test.py at each concurrency level. The microbenchmarks run too, and
+everything is written to one JSON file for benchmarks/compare.py.
+
+App caches are off by default so every request exercises the upstream path;
+--cache measures the warm path instead. Routes that need Firebase
+(/api/foods/*) or change server state (/api/nutrition/cache/invalidate) are
+not driven.
+
+Usage:
+    python benchmarks/run_suite.py --concurrency 1,8,32 --duration 10
+    python benchmarks/run_suite.py --scenarios nutrition_upstream,detect --error-rate 0.05
+    python benchmarks/compare.py benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+import load_test
+import microbench
+import stub_servers
+
+# Routes deliberately left out of the load runs
+EXCLUDED_ROUTES = {
+    "POST /api/foods/log": "needs Firebase",
+    "GET /api/foods/history": "needs Firebase",
+    "POST /api/nutrition/cache/invalidate": "admin endpoint that clears the caches",
+}
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + ("-dirty" if git("status", "--porcelain", "--untracked-files=no") else "")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def app_env(args, fdc_url, roboflow_url, workdir, port):
+    """Environment for the server under test: stub upstreams, scratch state, quiet logs"""
+    caches = "true" if args.cache else "false"
+    return dict(
+        os.environ,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_WORKER_CLASS=args.worker_class,
+        WARMUP_ENABLED="false",
+        USDA_BACKEND="api",
+        USDA_API_KEY="benchmark",
+        USDA_BASE_URL=fdc_url,
+        DETECTOR_BACKEND="roboflow",
+        ROBOFLOW_BASE_URL=roboflow_url,
+        ROBOFLOW_API_KEY="benchmark",
+        ROBOFLOW_MODEL_ID="food",
+        ROBOFLOW_VERSION="1",
+        USDA_CACHE_ENABLED=caches,
+        NUTRITION_RESULT_CACHE_ENABLED=caches,
+        DETECTION_CACHE_ENABLED=caches,
+        HTTP_CACHE_ENABLED=caches,
+        CACHE_DB_PATH=os.path.join(workdir, "nutrition_cache.sqlite3"),
+        JOB_DB_PATH=os.path.join(workdir, "jobs.sqlite3"),
+        METRICS_MULTIPROC_DIR=os.path.join(workdir, "prometheus"),
+        LOG_SAMPLE_RATE="0",
+        SLOW_REQUEST_MS="0",
+    )
+
+
+def start_server(env, log_path, base_url, timeout=60):
+    log = open(log_path, "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}; see {log_path}")
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=2).status_code == 200:
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    server.terminate()
+    raise RuntimeError(f"Server did not become healthy in {timeout}s; see {log_path}")
+
+
+def uncovered_routes(env):
+    """Routes of the app that no scenario drives and that are not excluded on purpose"""
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        from app import create_app
+        app = create_app()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    covered = {part.strip() for route, _ in load_test.SCENARIOS.values() for part in route.split("+")}
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith("/api/"):
+            routes.update(f"{method} {rule.rule}" for method in rule.methods - {"HEAD", "OPTIONS"})
+    return sorted(routes - covered - set(EXCLUDED_ROUTES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API route against stub upstreams")
+    parser.add_argument("--scenarios", default="all",
+                        help=f"comma-separated subset of: {', '.join(load_test.SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client thread counts")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario and level")
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub FDC latency")
+    parser.add_argument("--roboflow-latency-ms", type=float, default=150, help="stub Roboflow latency")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub responses that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--workers", type=int, default=0, help="gunicorn workers (0: its own default)")
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--cache", action="store_true", help="keep the app caches on")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    scenarios = list(load_test.SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    errors = {"jitter_ms": args.jitter_ms, "error_rate": args.error_rate, "error_status": args.error_status}
+    stubs, fdc_url, roboflow_url = stub_servers.start(
+        fdc=dict(errors, latency_ms=args.latency_ms),
+        roboflow=dict(errors, latency_ms=args.roboflow_latency_ms),
+    )
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = app_env(args, fdc_url, roboflow_url, workdir, port)
+    missing = uncovered_routes(env)
+    if missing:
+        print(f"warning: no scenario for {', '.join(missing)}")
+
+    revision = git_revision()
+    results = {
+        "meta": {
+            "revision": revision,
+            "label": args.label,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "label")},
+        },
+        "load": [],
+        "micro": {},
+    }
+
+    server = start_server(env, os.path.join(workdir, "server.log"), base_url)
+    image = load_test.make_jpeg()
+    try:
+        for scenario in scenarios:
+            for concurrency in levels:
+                stub_servers.upstream_counts(fdc_url)
+                stub_servers.upstream_counts(roboflow_url)
+                summary = load_test.run_load(base_url, scenario, concurrency, args.duration, image=image)
+                summary["upstream_requests"] = {
+                    "fdc": stub_servers.upstream_counts(fdc_url),
+                    "roboflow": stub_servers.upstream_counts(roboflow_url),
+                }
+                results["load"].append(summary)
+                print(f"{scenario:<20} c={concurrency:<3} {summary['requests_per_s']:>8.1f} req/s  "
+                      f"p50 {summary['p50_ms']:>7.1f}  p95 {summary['p95_ms']:>7.1f}  "
+                      f"p99 {summary['p99_ms']:>7.1f} ms  errors {summary['error_rate']:.1%}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        stubs.terminate()
+
+    if not args.skip_micro:
+        results["micro"] = microbench.run()
+        for name, value in results["micro"].items():
+            print(f"{name:<42} {value:>10.2f}")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{revision}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Local stand-ins for the paid upstream APIs, for benchmarks: FoodData Central
+(GET /foods/search, GET /food/<id>, POST /foods) and Roboflow hosted
+inference (POST /<model>/<version>). Each has its own latency, jitter and
+injected error rate. GET /_counts on either returns the requests served
+since the previous call, by route.
+
+The stubs run in a child process so they do not share the GIL with the
+benchmark. To run them on their own for manual load tests:
+    python benchmarks/stub_servers.py --fdc-port 8081 --roboflow-port 8082 --latency-ms 50
+then point the app at them with USDA_BASE_URL=http://127.0.0.1:8081 and
+ROBOFLOW_BASE_URL=http://127.0.0.1:8082.
+"""
+import argparse
+import json
+import multiprocessing
+import queue
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Classes the Roboflow stub reports: a built-in standard food, a name the FDC
+# stub matches and one that falls back to averaging
+ROBOFLOW_CLASSES = ["apple", "stubfood dish", "unmatched plate"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Shared behaviour: latency with jitter, error injection and request counts"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this each response
+    # can stall on a delayed ACK
+    disable_nagle_algorithm = True
+    latency = 0.05
+    jitter = 0.0
+    error_rate = 0.0
+    error_status = 503
+    counts = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, latency_ms=50, jitter_ms=0, error_rate=0.0, error_status=503):
+        cls.latency = latency_ms / 1000
+        cls.jitter = jitter_ms / 1000
+        cls.error_rate = error_rate
+        cls.error_status = error_status
+        cls.counts = {}
+        cls.lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _sleep(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            time.sleep(delay)
+
+    def _reply(self, payload, status=200, delay=True):
+        if delay:
+            self._sleep()
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, route):
+        with self.lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+
+    def _failed(self):
+        """Answer with the injected error for error_rate of requests"""
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("errors")
+            self._reply({"error": "injected failure"}, status=self.error_status)
+            return True
+        return False
+
+    def _reply_counts(self):
+        with self.lock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        self._reply(counts, delay=False)
+
+
+class StubFDC(StubHandler):
+    """/foods/search, /food/<id> and POST /foods"""
+
+    counts = {}
+    lock = threading.Lock()
+
+    @staticmethod
+    def _record(fdc_id):
+        return {
+            "fdcId": fdc_id,
+            "description": f"stub food {fdc_id}",
+            "foodNutrients": [
+                {"nutrient": {"name": "Energy"}, "amount": 50 + fdc_id % 200},
+                {"nutrient": {"name": "Protein"}, "amount": fdc_id % 20},
+            ],
+        }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_counts":
+            self._reply_counts()
+        elif url.path.endswith("/foods/search"):
+            self._count("search")
+            if self._failed():
+                return
+            params = parse_qs(url.query)
+            query = params.get("query", [""])[0]
+            size = int(params.get("pageSize", ["10"])[0])
+            base = zlib.crc32(query.encode()) % 100000 * 100
+            # "unmatched" names get unrelated results, forcing the averaging fallback
+            label = "mystery item" if query.startswith("unmatched") else f"{query}, raw"
+            foods = [{"fdcId": base + i, "description": f"{label} {i}", "dataType": "Foundation"}
+                     for i in range(size)]
+            self._reply({"foods": foods, "totalHits": size})
+        elif "/food/" in url.path:
+            self._count("detail")
+            if self._failed():
+                return
+            try:
+                fdc_id = int(url.path.rsplit("/", 1)[1])
+            except ValueError:
+                self._reply({"error": "not found"}, status=404)
+                return
+            self._reply(self._record(fdc_id))
+        else:
+            self._reply({"error": "not found"}, status=404, delay=False)
+
+    def do_POST(self):
+        body = self._read_body()
+        self._count("bulk")
+        if self._failed():
+            return
+        ids = json.loads(body or b"{}").get("fdcIds", [])
+        self._reply([self._record(fdc_id) for fdc_id in ids])
+
+
+class StubRoboflow(StubHandler):
+    """POST /<model>/<version>?api_key=... with a multipart image"""
+
+    counts = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/_counts":
+            self._reply_counts()
+        else:
+            self._reply({"error": "not found"}, status=404, delay=False)
+
+    def do_POST(self):
+        body = self._read_body()
+        self._count("infer")
+        if self._failed():
+            return
+        # Stable boxes per image, inside the 640x480 frame the stub reports
+        rng = random.Random(zlib.crc32(body))
+        predictions = []
+        for label in ROBOFLOW_CLASSES:
+            w, h = rng.uniform(60, 200), rng.uniform(60, 200)
+            predictions.append({
+                "x": rng.uniform(w / 2, 640 - w / 2),
+                "y": rng.uniform(h / 2, 480 - h / 2),
+                "width": w,
+                "height": h,
+                "confidence": rng.uniform(0.5, 0.99),
+                "class": label,
+            })
+        self._reply({"predictions": predictions, "image": {"width": 640, "height": 480}})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops bursts of new connections
+    request_queue_size = 256
+
+
+def serve(fdc, roboflow, ports, fdc_port=0, roboflow_port=0):
+    """
+    Stub process body: both servers, each configured from a dict of
+    StubHandler.configure arguments; puts (fdc port, roboflow port) on ports
+    """
+    StubFDC.configure(**fdc)
+    StubRoboflow.configure(**roboflow)
+    fdc_server = StubServer(("127.0.0.1", fdc_port), StubFDC)
+    roboflow_server = StubServer(("127.0.0.1", roboflow_port), StubRoboflow)
+    threading.Thread(target=roboflow_server.serve_forever, daemon=True).start()
+    ports.put((fdc_server.server_address[1], roboflow_server.server_address[1]))
+    fdc_server.serve_forever()
+
+
+def start(fdc=None, roboflow=None):
+    """
+    Start the stubs in a daemon process. Returns (process, fdc base URL,
+    roboflow base URL).
+    """
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve, args=(fdc or {}, roboflow or {"latency_ms": 150}, ports), daemon=True
+    )
+    process.start()
+    fdc_port, roboflow_port = ports.get(timeout=10)
+    return process, f"http://127.0.0.1:{fdc_port}", f"http://127.0.0.1:{roboflow_port}"
+
+
+def upstream_counts(base_url):
+    """Requests a stub served since the last call, by route"""
+    import requests
+    return requests.get(f"{base_url}/_counts", timeout=5).json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub FoodData Central and Roboflow servers")
+    parser.add_argument("--fdc-port", type=int, default=8081)
+    parser.add_argument("--roboflow-port", type=int, default=8082)
+    parser.add_argument("--latency-ms", type=float, default=50, help="FDC response latency")
+    parser.add_argument("--roboflow-latency-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter on both")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    errors = {"jitter_ms": args.jitter_ms, "error_rate": args.error_rate, "error_status": args.error_status}
+    print(f"FDC on http://127.0.0.1:{args.fdc_port}, Roboflow on http://127.0.0.1:{args.roboflow_port}")
+    serve(dict(errors, latency_ms=args.latency_ms), dict(errors, latency_ms=args.roboflow_latency_ms),
+          queue.Queue(), args.fdc_port, args.roboflow_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     """Base configuration class"""
     
@@ -14,15 +16,185 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
+    # Production server (gunicorn.conf.py). Worker class: sync | gthread | async
+    # (gthread serving the async views); 0 workers picks 2 x cores + 1 for sync,
+    # one per core otherwise
+    GUNICORN_BIND = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+    GUNICORN_WORKER_CLASS = os.getenv('GUNICORN_WORKER_CLASS', 'gthread').lower()
+    GUNICORN_WORKERS = int(os.getenv('GUNICORN_WORKERS', '0'))
+    GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '8'))
+    GUNICORN_TIMEOUT = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+    GUNICORN_KEEPALIVE = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+    GUNICORN_MAX_REQUESTS = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+    GUNICORN_PRELOAD = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+    
+    # Start-up warm-up: foods resolved into the caches before a worker takes traffic.
+    # Names in the built-in standard table never reach USDA, so listing them warms nothing
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+    WARMUP_FOODS = [name.strip() for name in os.getenv(
+        'WARMUP_FOODS', 'salad,sandwich,soup,sushi,pancake,burrito,fried rice,noodles,curry,omelette'
+    ).split(',') if name.strip()]
+    WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', '10'))
+    
+    # Structured JSON logs on stdout. Debug/info lines are kept for LOG_SAMPLE_RATE
+    # (0-1) of requests, warnings and errors always; requests slower than
+    # SLOW_REQUEST_MS (0 disables) log their span tree
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+    
+    # Prometheus samples of all gunicorn workers, merged by /api/metrics; emptied
+    # when gunicorn starts. Blank keeps metrics per process (flask run)
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', os.path.join(BASE_DIR, 'cache', 'prometheus'))
+    
+    # Token required by admin endpoints (X-Admin-Token header); unset disables them
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
     # Roboflow API settings
     ROBOFLOW_API_KEY = os.getenv('ROBOFLOW_API_KEY')
     ROBOFLOW_PROJECT_ID = os.getenv('ROBOFLOW_PROJECT_ID')
     ROBOFLOW_MODEL_VERSION = os.getenv('ROBOFLOW_MODEL_VERSION', '1')
+    ROBOFLOW_BASE_URL = os.getenv('ROBOFLOW_BASE_URL', 'https://serverless.roboflow.com')
+    
+    # Detection backend: "roboflow" (hosted API), "local" (ONNX model on CPU) or "fake"
+    DETECTOR_BACKEND = os.getenv('DETECTOR_BACKEND', 'roboflow').lower()
+    LOCAL_MODEL_PATH = os.getenv('LOCAL_MODEL_PATH', os.path.join(BASE_DIR, 'models', 'food.onnx'))
+    LOCAL_MODEL_CLASSES_PATH = os.getenv(
+        'LOCAL_MODEL_CLASSES_PATH', os.path.join(BASE_DIR, 'models', 'food_classes.txt')
+    )
+    LOCAL_MODEL_INPUT_SIZE = int(os.getenv('LOCAL_MODEL_INPUT_SIZE', '640'))
+    LOCAL_MODEL_CONFIDENCE = float(os.getenv('LOCAL_MODEL_CONFIDENCE', '0.4'))
+    LOCAL_MODEL_IOU = float(os.getenv('LOCAL_MODEL_IOU', '0.45'))
+    LOCAL_MODEL_BATCH_SIZE = int(os.getenv('LOCAL_MODEL_BATCH_SIZE', '4'))
+    LOCAL_MODEL_BATCH_WAIT_MS = float(os.getenv('LOCAL_MODEL_BATCH_WAIT_MS', '5'))
+    LOCAL_MODEL_THREADS = int(os.getenv('LOCAL_MODEL_THREADS', '0'))
+    FAKE_DETECTOR_LATENCY_MS = float(os.getenv('FAKE_DETECTOR_LATENCY_MS', '0'))
+    
+    # Prediction clean-up: minimum confidence (0-1), per-class NMS IoU, cross-class
+    # NMS IoU for near-identical boxes with different labels (0 disables), max boxes
+    DETECT_MIN_CONFIDENCE = float(os.getenv('DETECT_MIN_CONFIDENCE', '0.3'))
+    DETECT_NMS_IOU = float(os.getenv('DETECT_NMS_IOU', '0.5'))
+    DETECT_AGNOSTIC_NMS_IOU = float(os.getenv('DETECT_AGNOSTIC_NMS_IOU', '0.85'))
+    DETECT_TOP_K = int(os.getenv('DETECT_TOP_K', '30'))
+    
+    # Image preprocessing before detection: long-side limit (model input size)
+    # and JPEG re-encode quality
+    DETECT_PREPROCESS_ENABLED = os.getenv('DETECT_PREPROCESS_ENABLED', 'True').lower() == 'true'
+    DETECT_MAX_SIDE = int(os.getenv('DETECT_MAX_SIDE', '640'))
+    DETECT_JPEG_QUALITY = int(os.getenv('DETECT_JPEG_QUALITY', '85'))
+    
+    # Tiled inference for large photos: images with a long side of at least
+    # DETECT_TILE_MIN_SIDE px are cut into overlapping full-resolution tiles
+    # (overlap is a fraction of the tile size) and merged with cross-tile NMS
+    DETECT_TILING_ENABLED = os.getenv('DETECT_TILING_ENABLED', 'False').lower() == 'true'
+    DETECT_TILE_MIN_SIDE = int(os.getenv('DETECT_TILE_MIN_SIDE', '2000'))
+    DETECT_TILE_SIZE = int(os.getenv('DETECT_TILE_SIZE', '1024'))
+    DETECT_TILE_OVERLAP = float(os.getenv('DETECT_TILE_OVERLAP', '0.2'))
+    DETECT_TILE_WORKERS = int(os.getenv('DETECT_TILE_WORKERS', '4'))
+    DETECT_TILE_MERGE_IOU = float(os.getenv('DETECT_TILE_MERGE_IOU', '0.5'))
+    DETECT_TILE_FULL_FRAME = os.getenv('DETECT_TILE_FULL_FRAME', 'True').lower() == 'true'
+    
+    # POST /api/detect/batch: pool size, per-image timeout (seconds) and the cap on
+    # upload bytes processed at once per worker process
+    DETECT_BATCH_MAX_IMAGES = int(os.getenv('DETECT_BATCH_MAX_IMAGES', '20'))
+    DETECT_BATCH_WORKERS = int(os.getenv('DETECT_BATCH_WORKERS', '4'))
+    DETECT_BATCH_ITEM_TIMEOUT = float(os.getenv('DETECT_BATCH_ITEM_TIMEOUT', '20'))
+    DETECT_BATCH_MAX_INFLIGHT_BYTES = int(os.getenv('DETECT_BATCH_MAX_INFLIGHT_BYTES', str(48 * 1024 * 1024)))
+    
+    # Background detection jobs: "inprocess" or "package.module:ClassName" for a broker
+    JOB_BACKEND = os.getenv('JOB_BACKEND', 'inprocess')
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+    JOB_QUEUE_MAX_DEPTH = int(os.getenv('JOB_QUEUE_MAX_DEPTH', '100'))
+    JOB_DB_PATH = os.getenv('JOB_DB_PATH', os.path.join(BASE_DIR, 'cache', 'jobs.sqlite3'))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', '3600'))
+    # Each /api/jobs/<id>/events stream holds a request thread: streams end after
+    # JOB_SSE_TIMEOUT seconds and a worker process serves at most
+    # JOB_SSE_MAX_STREAMS at once (more get 503; clients should poll instead).
+    # Sizing: the worker's request threads minus JOB_SSE_RESERVED_THREADS kept
+    # free for every other endpoint
+    JOB_SSE_TIMEOUT = float(os.getenv('JOB_SSE_TIMEOUT', '30'))
+    JOB_SSE_HEARTBEAT = float(os.getenv('JOB_SSE_HEARTBEAT', '15'))
+    JOB_SSE_RESERVED_THREADS = int(os.getenv('JOB_SSE_RESERVED_THREADS', '2'))
+    JOB_SSE_MAX_STREAMS = int(os.getenv(
+        'JOB_SSE_MAX_STREAMS', str(max(1, GUNICORN_THREADS - JOB_SSE_RESERVED_THREADS))
+    ))
+    
+    # Detection results reused for near-identical photos (dHash Hamming distance)
+    DETECTION_CACHE_ENABLED = os.getenv('DETECTION_CACHE_ENABLED', 'True').lower() == 'true'
+    DETECTION_CACHE_MAX_ENTRIES = int(os.getenv('DETECTION_CACHE_MAX_ENTRIES', '512'))
+    DETECTION_CACHE_MAX_DISTANCE = int(os.getenv('DETECTION_CACHE_MAX_DISTANCE', '6'))
+    DETECTION_CACHE_TTL = int(os.getenv('DETECTION_CACHE_TTL', str(24 * 3600)))
     
     # USDA Food Data Central API settings
     USDA_API_KEY = os.getenv("USDA_API_KEY")
     USDA_BASE_URL = os.getenv("USDA_BASE_URL", "https://api.nal.usda.gov/fdc/v1")
     
+    # Where nutrition data comes from: "api" (FDC web API) or "local" (imported store)
+    USDA_BACKEND = os.getenv('USDA_BACKEND', 'api').lower()
+    FDC_STORE_PATH = os.getenv('FDC_STORE_PATH', os.path.join(BASE_DIR, 'data', 'fdc.sqlite3'))
+    
+    # Food category keywords and per-category matching strategies
+    FOOD_CATEGORIES_PATH = os.getenv(
+        'FOOD_CATEGORIES_PATH', os.path.join(BASE_DIR, 'data', 'food_categories.json')
+    )
+    
+    # Built-in nutrient table and name aliases served without calling USDA
+    STANDARD_FOODS_PATH = os.getenv(
+        'STANDARD_FOODS_PATH', os.path.join(BASE_DIR, 'data', 'standard_foods.csv')
+    )
+    FOOD_ALIASES_PATH = os.getenv(
+        'FOOD_ALIASES_PATH', os.path.join(BASE_DIR, 'data', 'food_aliases.json')
+    )
+    
+    # USDA response cache (in-process LRU + shared SQLite tier)
+    USDA_CACHE_ENABLED = os.getenv('USDA_CACHE_ENABLED', 'True').lower() == 'true'
+    USDA_CACHE_MAX_ENTRIES = int(os.getenv('USDA_CACHE_MAX_ENTRIES', '2048'))
+    USDA_CACHE_TTL = int(os.getenv('USDA_CACHE_TTL', '3600'))
+    USDA_CACHE_DISK_TTL = int(os.getenv('USDA_CACHE_DISK_TTL', str(7 * 24 * 3600)))
+    CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(BASE_DIR, 'cache', 'nutrition_cache.sqlite3'))
+    
+    # HTTP caching of GET /api/nutrition/search and /api/nutrition/fdc/<id>: ETags
+    # with If-None-Match -> 304, Cache-Control max-age (seconds), and gzip/brotli
+    # for JSON bodies of at least HTTP_COMPRESS_MIN_BYTES
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'True').lower() == 'true'
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '3600'))
+    HTTP_COMPRESS_MIN_BYTES = int(os.getenv('HTTP_COMPRESS_MIN_BYTES', '1024'))
+    
+    # Cached outcome of the full by-name resolution chain, TTL per outcome (seconds)
+    NUTRITION_RESULT_CACHE_ENABLED = os.getenv('NUTRITION_RESULT_CACHE_ENABLED', 'True').lower() == 'true'
+    NUTRITION_MATCH_TTL = int(os.getenv('NUTRITION_MATCH_TTL', str(24 * 3600)))
+    NUTRITION_AVERAGE_TTL = int(os.getenv('NUTRITION_AVERAGE_TTL', str(6 * 3600)))
+    NUTRITION_MISS_TTL = int(os.getenv('NUTRITION_MISS_TTL', '3600'))
+    
+    # POST /api/nutrition/by-name/batch
+    NUTRITION_BATCH_WORKERS = int(os.getenv('NUTRITION_BATCH_WORKERS', '8'))
+    NUTRITION_BATCH_MAX_ITEMS = int(os.getenv('NUTRITION_BATCH_MAX_ITEMS', '50'))
+    NUTRITION_BATCH_TIMEOUT = float(os.getenv('NUTRITION_BATCH_TIMEOUT', '8'))
+    
+    # POST /api/analyze: total latency budget (seconds) for detection plus nutrition
+    ANALYZE_LATENCY_BUDGET = float(os.getenv('ANALYZE_LATENCY_BUDGET', '6'))
+    
+    # USDA detail fetching for the averaging fallback: bulk | concurrent | serial
+    USDA_DETAIL_FETCH_MODE = os.getenv('USDA_DETAIL_FETCH_MODE', 'bulk').lower()
+    USDA_BULK_CHUNK_SIZE = int(os.getenv('USDA_BULK_CHUNK_SIZE', '20'))
+    USDA_DETAIL_CONCURRENCY = int(os.getenv('USDA_DETAIL_CONCURRENCY', '8'))
+    
+    # Shared upstream HTTP client (connection pools, timeouts, retries)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+    HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.3'))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '10'))
+    HTTP_RETRY_AFTER_MAX = float(os.getenv('HTTP_RETRY_AFTER_MAX', '30'))
+    
+    # Async upstream client used by the async views (shares the timeouts and retries above)
+    HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv('HTTP_ASYNC_MAX_CONNECTIONS', '100'))
+    # Send the averaging fallback's search alongside the smart match: lower latency
+    # for names that end up averaged, but a second FDC search (quota) per lookup
+    USDA_ASYNC_PREFETCH_FALLBACK = os.getenv('USDA_ASYNC_PREFETCH_FALLBACK', 'False').lower() == 'true'
+    
     # Firebase settings
     FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
     FIREBASE_PRIVATE_KEY_ID = os.getenv('FIREBASE_PRIVATE_KEY_ID')
@@ -34,5 +206,6 @@ class Config:
     
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  
-    UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # Uploads larger than this (bytes) spill to an anonymous temp file instead of RAM
+    UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', str(4 * 1024 * 1024)))
\ No newline at end of file
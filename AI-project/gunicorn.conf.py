@@ -0,0 +1,93 @@
+"""
+gunicorn settings, driven by the GUNICORN_* / WARMUP_* variables in
+config/settings.py:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import Config
+
+# Must be set before prometheus_client is first imported (by the preloaded
+# app); stale files from the previous run would be merged into the totals
+if Config.METRICS_MULTIPROC_DIR:
+    shutil.rmtree(Config.METRICS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(Config.METRICS_MULTIPROC_DIR, exist_ok=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = Config.METRICS_MULTIPROC_DIR
+
+# "async" means gthread workers serving the async views: upstream I/O is
+# awaited on each worker's asyncio loop. Greenlet workers (gevent, eventlet)
+# are refused because their monkey-patching breaks that loop.
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'async': 'gthread',
+}
+
+bind = Config.GUNICORN_BIND
+if Config.GUNICORN_WORKER_CLASS not in WORKER_CLASSES:
+    raise ValueError(
+        f"Unsupported GUNICORN_WORKER_CLASS '{Config.GUNICORN_WORKER_CLASS}'; "
+        f"use one of {', '.join(WORKER_CLASSES)}"
+    )
+worker_class = WORKER_CLASSES[Config.GUNICORN_WORKER_CLASS]
+
+cores = multiprocessing.cpu_count()
+if Config.GUNICORN_WORKERS > 0:
+    workers = Config.GUNICORN_WORKERS
+elif worker_class == 'sync':
+    # One request per process: oversubscribe to cover upstream waits
+    workers = cores * 2 + 1
+else:
+    workers = cores
+
+threads = Config.GUNICORN_THREADS if worker_class == 'gthread' else 1
+
+timeout = Config.GUNICORN_TIMEOUT
+graceful_timeout = Config.GUNICORN_TIMEOUT
+keepalive = Config.GUNICORN_KEEPALIVE
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+
+# Import the app (classifier, standard food table, ...) once in the master
+preload_app = Config.GUNICORN_PRELOAD
+
+accesslog = '-'
+
+
+def when_ready(server):
+    """Master, after preloading and before the first fork"""
+    if not preload_app:
+        return
+    if Config.WARMUP_ENABLED:
+        from services.warmup import Warmup
+        Warmup.shared()
+    # Keep the collector from touching (and so copying) preloaded objects in workers
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from services.warmup import Warmup
+    Warmup.after_fork()
+
+
+def post_worker_init(worker):
+    """Runs before the worker accepts connections"""
+    if not Config.WARMUP_ENABLED:
+        return
+    from services.warmup import Warmup
+    if not preload_app:
+        Warmup.shared()
+    Warmup.worker()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (in-flight requests) from the totals"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,54 @@
+"""
+Combined detection and nutrition endpoint
+"""
+from flask import Blueprint, request, jsonify
+from werkzeug.utils import secure_filename
+from config.settings import Config
+from routes.uploads import cache_requested, image_upload_error
+from services.analysis_service import AnalysisService
+
+analyze_bp = Blueprint('analyze', __name__)
+
+@analyze_bp.route('/analyze', methods=['POST'])
+def analyze_food():
+    """
+    Detect foods in an uploaded image and return nutrition for every detected
+    class in one response
+    
+    Expects multipart form data:
+        image: the photo
+        timeout_ms: optional latency budget, capped at ANALYZE_LATENCY_BUDGET
+    
+    Returns:
+        - The /api/detect result with nutrition merged into each detection,
+          one entry per distinct class in "items", and per-item timings
+    """
+    try:
+        file = request.files.get('image')
+        error_response = image_upload_error(file)
+        if error_response is not None:
+            return error_response
+
+        budget = Config.ANALYZE_LATENCY_BUDGET
+        timeout_ms = request.form.get('timeout_ms') or request.args.get('timeout_ms')
+        if timeout_ms:
+            try:
+                budget = min(budget, max(0.0, float(timeout_ms) / 1000))
+            except ValueError:
+                pass
+
+        result = AnalysisService.analyze(
+            file.stream,
+            budget,
+            filename=secure_filename(file.filename),
+            content_type=file.mimetype,
+            use_cache=cache_requested()
+        )
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Analysis failed',
+            'message': str(e)
+        }), 500
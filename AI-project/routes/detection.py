@@ -1,71 +1,111 @@
 """
 Food detection endpoints,Flask Routing
 """
-from flask import Blueprint, request, jsonify
+import json
+import time
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
-import os
-from services.roboflow_service import RoboflowService
+from config.settings import Config
+from routes.uploads import allowed_file, cache_requested, image_upload_error, upload_size
+from services.detection_pipeline import DetectionPipeline
 
 detection_bp = Blueprint('detection', __name__)
 
-def allowed_file(filename):
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
 @detection_bp.route('/detect', methods=['POST'])
-def detect_food():
+async def detect_food():
 
     try:
-        print("request.files:", request.files)
-        print("request.form:", request.form)
-       
-        if 'image' not in request.files:
-            return jsonify({
-                'success': False, 
-                'error': 'No image file provided',
-                'message': 'Please upload an image file'
-            }), 400
+        file = request.files.get('image')
+        error_response = image_upload_error(file)
+        if error_response is not None:
+            return error_response
         
-        file = request.files['image']
+
+        # The upload stays in memory (or an anonymous spool file when large);
+        # it is downsized before inference and boxes come back in original
+        # image coordinates
+        formatted_result = await DetectionPipeline.detect_async(
+            file.stream,
+            filename=secure_filename(file.filename),
+            content_type=file.mimetype,
+            use_cache=cache_requested()
+        )
+        
+        return jsonify(formatted_result), 200  
         
+    except Exception as e:
+        return jsonify({
+            'success': False, 
+            'error': 'Detection failed',
+            'message': str(e)
+        }), 500
+
+def _wants_stream():
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
 
-        if file.filename == '':
+@detection_bp.route('/detect/batch', methods=['POST'])
+def detect_food_batch():
+    """
+    Detect foods in many images uploaded as repeated "images" fields
+    
+    Returns:
+        - JSON with one result per image in upload order, or one JSON line per
+          image (NDJSON, in order) with ?stream=1 / Accept: application/x-ndjson
+    """
+    try:
+        files = request.files.getlist('images')
+        if not files:
             return jsonify({
-                'success': False, 
-                'error': 'No file selected',
-                'message': 'Please select an image file'
+                'success': False,
+                'error': 'No image files provided',
+                'message': 'Please upload one or more files in the "images" field'
             }), 400
-        
 
-        if not allowed_file(file.filename):
+        if len(files) > Config.DETECT_BATCH_MAX_IMAGES:
             return jsonify({
-                'success': False,  
-                'error': 'Invalid file type',
-                'message': 'Please upload a PNG, JPG, JPEG, or GIF file'
+                'success': False,
+                'error': 'Too many images',
+                'message': f'At most {Config.DETECT_BATCH_MAX_IMAGES} images per request'
             }), 400
-        
 
-        filename = secure_filename(file.filename)
-        upload_folder = 'uploads'
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, filename)
-        file.save(file_path)
-        
+        uploads = []
+        for file in files:
+            upload = {
+                "filename": secure_filename(file.filename or ''),
+                "stream": file.stream,
+                "content_type": file.mimetype,
+                "size": upload_size(file)
+            }
+            if not file.filename or not allowed_file(file.filename):
+                upload["error"] = 'Invalid file type'
+            uploads.append(upload)
 
-        raw_detection_result = RoboflowService.detect_food(file_path) 
-        
- 
-        formatted_result = RoboflowService.format_detection_results(raw_detection_result)
-        
+        started = time.perf_counter()
+        results = DetectionPipeline.detect_many(uploads, use_cache=cache_requested())
+
+        if _wants_stream():
+            def generate():
+                for item in results:
+                    yield json.dumps(item) + "\n"
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        items = list(results)
+        succeeded = sum(1 for item in items if item.get('success'))
+        return jsonify({
+            'success': True,
+            'results': items,
+            'total': len(items),
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }), 200
 
-        os.remove(file_path)
-        
-        return jsonify(formatted_result), 200  
-        
     except Exception as e:
         return jsonify({
-            'success': False, 
-            'error': 'Detection failed',
+            'success': False,
+            'error': 'Batch detection failed',
             'message': str(e)
         }), 500
\ No newline at end of file
@@ -1,5 +1,11 @@
 
 from flask import Blueprint, jsonify
+from services.detection_pipeline import DetectionPipeline
+from services.async_http_client import AsyncHttpClient
+from services.http_client import HttpClient
+from services.job_queue import get_job_queue
+from services.roboflow_service import RoboflowService
+from services.usda_service import USDAService
 
 health_bp = Blueprint('health', __name__)
 
@@ -9,4 +15,20 @@ def health_check():
     Health check endpoint
     Returns: {"status": "ok"}
     """
-    return jsonify({"status": "ok"}), 200
\ No newline at end of file
+    return jsonify({"status": "ok"}), 200
+
+@health_bp.route('/health/stats', methods=['GET'])
+def health_stats():
+    """
+    Per-worker upstream statistics: HTTP pool reuse, retries and cache hit rates
+    """
+    return jsonify({
+        "http": HttpClient.stats(),
+        "async_http": AsyncHttpClient.stats(),
+        "usda_cache": USDAService.cache_stats(),
+        "single_flight": USDAService.single_flight_stats(),
+        "detection_cache": DetectionPipeline.cache_stats(),
+        "detector": RoboflowService.detector_stats(),
+        "upload_budget": DetectionPipeline.upload_stats(),
+        "jobs": get_job_queue().stats()
+    }), 200
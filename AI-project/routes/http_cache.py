@@ -0,0 +1,144 @@
+"""
+HTTP caching for read-only JSON endpoints: strong ETags, Cache-Control,
+If-None-Match -> 304 and gzip/brotli compression of large bodies
+"""
+import functools
+import gzip
+import hashlib
+import inspect
+
+from flask import make_response, request
+from config.settings import Config
+from services.cache_service import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# request (path + query) -> ETag and size of the last 200 body served for it,
+# shared by the workers through the disk tier. While an entry lives, a matching
+# If-None-Match is answered with 304 without running the view.
+etag_cache = ResponseCache(
+    'http_etags',
+    max_entries=Config.USDA_CACHE_MAX_ENTRIES,
+    ttl=Config.USDA_CACHE_TTL,
+    disk_path=Config.CACHE_DB_PATH,
+    disk_ttl=Config.USDA_CACHE_DISK_TTL,
+    enabled=Config.HTTP_CACHE_ENABLED
+)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _request_key():
+    args = sorted(request.args.items(multi=True))
+    return ResponseCache.make_key(request.path, '&'.join(f"{key}={value}" for key, value in args))
+
+
+def _encoding(size):
+    """Content coding for a body of size bytes that this client accepts, or None"""
+    if size < Config.HTTP_COMPRESS_MIN_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _representation_etag(digest, encoding):
+    # Each content coding is its own representation and needs its own strong ETag
+    return f"{digest}-{encoding}" if encoding else digest
+
+
+def _set_cache_headers(response, etag, max_age):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _not_modified(etag, max_age):
+    return _set_cache_headers(make_response('', 304), etag, max_age)
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _finish(rv, key, known, max_age):
+    """
+    ETag, cache headers and compression for a successful view response.
+    known is the entry looked up before the view ran; the shared cache is
+    only written when the body no longer matches it.
+    """
+    response = make_response(rv)
+    if response.status_code != 200 or not response.is_json:
+        return response
+
+    body = response.get_data()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    entry = {'etag': digest, 'size': len(body)}
+    if entry != known:
+        etag_cache.set(key, entry)
+
+    encoding = _encoding(len(body))
+    etag = _representation_etag(digest, encoding)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag, max_age)
+
+    if encoding:
+        response.set_data(_compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return _set_cache_headers(response, etag, max_age)
+
+
+def http_cached(max_age=None):
+    """
+    Cache headers and compression for a GET view whose JSON depends only on
+    its path and query string. A revalidation whose ETag is still current is
+    answered with 304 before the view runs.
+    """
+    def decorator(view):
+        if not Config.HTTP_CACHE_ENABLED:
+            return view
+
+        def cached_etag(known):
+            if known is None or not request.if_none_match:
+                return None
+            etag = _representation_etag(known['etag'], _encoding(known['size']))
+            return etag if request.if_none_match.contains_weak(etag) else None
+
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                age = Config.HTTP_CACHE_MAX_AGE if max_age is None else max_age
+                key = _request_key()
+                known = etag_cache.get(key)
+                etag = cached_etag(known)
+                if etag is not None:
+                    return _not_modified(etag, age)
+                return _finish(await view(*args, **kwargs), key, known, age)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            age = Config.HTTP_CACHE_MAX_AGE if max_age is None else max_age
+            key = _request_key()
+            known = etag_cache.get(key)
+            etag = cached_etag(known)
+            if etag is not None:
+                return _not_modified(etag, age)
+            return _finish(view(*args, **kwargs), key, known, age)
+        return wrapper
+    return decorator
+
+
+def clear_etags():
+    """Forget every known ETag, e.g. after the cached USDA data was dropped"""
+    etag_cache.clear()
@@ -0,0 +1,160 @@
+"""
+Asynchronous detection jobs: submit, poll, or follow with server-sent events
+"""
+import json
+import threading
+import time
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from werkzeug.utils import secure_filename
+from config.settings import Config
+from routes.uploads import cache_requested, image_upload_error
+from services.job_queue import FINISHED, QueueFullError, get_job_queue
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+class _StreamLimit:
+    """Event streams open in this worker process; each holds a request thread"""
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+_streams = _StreamLimit(Config.JOB_SSE_MAX_STREAMS)
+
+
+@jobs_bp.route('/jobs/detect', methods=['POST'])
+def submit_detection_job():
+    """
+    Queue detection for an uploaded image and return at once
+    
+    Returns:
+        - 202 with the job id and the URLs to poll or subscribe to
+    """
+    try:
+        file = request.files.get('image')
+        error_response = image_upload_error(file)
+        if error_response is not None:
+            return error_response
+
+        # The upload is gone once this request ends, so the job gets the bytes
+        job_id = get_job_queue().submit('detect', {
+            'image': file.stream.read(),
+            'filename': secure_filename(file.filename),
+            'content_type': file.mimetype,
+            'use_cache': cache_requested()
+        })
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/jobs/{job_id}',
+            'events_url': f'/api/jobs/{job_id}/events'
+        }), 202
+
+    except QueueFullError as e:
+        response = jsonify({
+            'success': False,
+            'error': 'Too many queued jobs',
+            'message': str(e)
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Failed to queue detection',
+            'message': str(e)
+        }), 500
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Current status of a job, with the detection result once it is done
+    """
+    record = get_job_queue().get(job_id)
+    if record is None:
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job with id {job_id} (unknown or expired)'
+        }), 404
+    return jsonify(record), 200
+
+@jobs_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent events: one "status" event per status change, then a final
+    "done" or "failed" event carrying the full job record. At most
+    JOB_SSE_MAX_STREAMS streams per worker; beyond that clients get 503 and
+    should poll the job instead
+    """
+    jobs = get_job_queue()
+    record = jobs.get(job_id)
+    if record is None:
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job with id {job_id} (unknown or expired)'
+        }), 404
+
+    if not _streams.acquire():
+        response = jsonify({
+            'error': 'Too many event streams',
+            'message': f'Poll /api/jobs/{job_id} instead'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    def generate(record):
+        deadline = time.monotonic() + Config.JOB_SSE_TIMEOUT
+        while True:
+            status = record['status']
+            if status in FINISHED:
+                yield f"event: {status}\ndata: {json.dumps(record)}\n\n"
+                return
+            yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': status})}\n\n"
+
+            while record is not None and record['status'] == status:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield "event: timeout\ndata: {}\n\n"
+                    return
+                record = jobs.wait(job_id, status, timeout=min(remaining, Config.JOB_SSE_HEARTBEAT))
+                if record is not None and record['status'] == status:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+            if record is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+
+    response = Response(
+        stream_with_context(generate(record)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs once the server is done with the response, even if it was never iterated
+    response.call_on_close(_streams.release)
+    return response
+
+@jobs_bp.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    """
+    Queue depth, running jobs and queue wait times for this worker
+    """
+    stats = get_job_queue().stats()
+    stats['event_streams'] = {'open': _streams.open, 'max': _streams.limit}
+    return jsonify(stats), 200
@@ -0,0 +1,43 @@
+"""
+Prometheus scrape endpoint and the per-request timing hooks behind it
+"""
+import time
+
+from flask import Blueprint, Response, g, request
+from services import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Metrics for all worker processes in Prometheus text format
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+def init_request_metrics(app):
+    """Count and time every request by its URL rule (e.g. /api/nutrition/fdc/<fdc_id>)"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        metrics.HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def observe_request(error=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        metrics.HTTP_IN_FLIGHT.dec()
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500)
+        metrics.HTTP_REQUESTS.labels(request.method, route, str(status)).inc()
+        metrics.HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
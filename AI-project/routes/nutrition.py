@@ -1,11 +1,19 @@
 
+import hmac
+import time
+
 from flask import Blueprint, request, jsonify
+from config.settings import Config
+from routes.http_cache import clear_etags, http_cached
+from services.async_usda_service import AsyncUSDAService
+from services.food_names import normalize_food_name
 from services.usda_service import USDAService
 
 nutrition_bp = Blueprint('nutrition', __name__)
 
 @nutrition_bp.route('/nutrition/search', methods=['GET'])
-def search_nutrition():
+@http_cached()
+async def search_nutrition():
     """
     Search for food nutrition data by query string
     """
@@ -20,7 +28,7 @@ def search_nutrition():
             }), 400
         
 
-        search_results = USDAService.search_foods(query, limit)
+        search_results = await AsyncUSDAService.search_foods(query, limit)
         return jsonify(search_results), 200
         
     except Exception as e:
@@ -31,7 +39,8 @@ def search_nutrition():
 
 
 @nutrition_bp.route('/nutrition/fdc/<fdc_id>', methods=['GET'])
-def get_nutrition_by_fdc_id(fdc_id):
+@http_cached()
+async def get_nutrition_by_fdc_id(fdc_id):
 
     try:
         if not fdc_id:
@@ -40,7 +49,7 @@ def get_nutrition_by_fdc_id(fdc_id):
                 'message': 'Please provide a valid FDC ID'
             }), 400
         
-        nutrition_data = USDAService.get_food_by_fdc_id(fdc_id)
+        nutrition_data = await AsyncUSDAService.get_food_by_fdc_id(fdc_id)
         return jsonify(nutrition_data), 200
         
     except Exception as e:
@@ -51,20 +60,18 @@ def get_nutrition_by_fdc_id(fdc_id):
 
 
 @nutrition_bp.route('/nutrition/by-name', methods=['POST'])
-def get_nutrition_by_name():
+async def get_nutrition_by_name():
 
     try:
-        data = request.get_json()
-        if not data or "food_name" not in data:
+        data = request.get_json(silent=True)
+        food_name = data.get("food_name") if isinstance(data, dict) else None
+        if not isinstance(food_name, str) or not normalize_food_name(food_name):
             return jsonify({
                 'error': 'Missing food_name',
                 'message': 'Please provide a valid food_name in JSON body'
             }), 400
 
-        food_name = data["food_name"]
-        
-
-        nutrition_data = USDAService.get_simple_nutrition(food_name)
+        nutrition_data = await AsyncUSDAService.get_simple_nutrition(food_name)
         
 
         if "error" in nutrition_data:
@@ -79,4 +86,97 @@ def get_nutrition_by_name():
         return jsonify({
             'error': 'Failed to fetch nutrition data',
             'message': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@nutrition_bp.route('/nutrition/by-name/batch', methods=['POST'])
+async def get_nutrition_by_name_batch():
+    """
+    Resolve many food names in one request
+    
+    Expects JSON:
+        {"food_names": ["string", ...], "timeout_ms": number (optional)}
+    
+    Returns:
+        - JSON with one result per input name, in order; names not resolved
+          before the deadline are reported as "pending"
+    """
+    try:
+        data = request.get_json(silent=True)
+        food_names = data.get("food_names") if isinstance(data, dict) else None
+        if not isinstance(food_names, list) or not food_names:
+            return jsonify({
+                'error': 'Missing food_names',
+                'message': 'Please provide a non-empty food_names list in JSON body'
+            }), 400
+
+        if len(food_names) > Config.NUTRITION_BATCH_MAX_ITEMS:
+            return jsonify({
+                'error': 'Too many food names',
+                'message': f'At most {Config.NUTRITION_BATCH_MAX_ITEMS} food names per request'
+            }), 400
+
+        timeout = Config.NUTRITION_BATCH_TIMEOUT
+        if data.get("timeout_ms") is not None:
+            try:
+                timeout = min(timeout, max(0.0, float(data["timeout_ms"]) / 1000))
+            except (TypeError, ValueError):
+                pass
+
+        started = time.perf_counter()
+        results = await AsyncUSDAService.get_simple_nutrition_batch(food_names, timeout)
+
+        statuses = [item["status"] for item in results]
+        return jsonify({
+            "results": results,
+            "total": len(results),
+            "unique": len({item["normalized"] for item in results if item["normalized"]}),
+            "resolved": statuses.count("ok"),
+            "pending": statuses.count("pending"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Failed to fetch nutrition data',
+            'message': str(e)
+        }), 500
+
+def _is_admin_request():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(Config.ADMIN_TOKEN) and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+
+@nutrition_bp.route('/nutrition/cache/invalidate', methods=['POST'])
+def invalidate_nutrition_cache():
+    """
+    Admin: drop cached by-name nutrition results
+    
+    Expects JSON (and an X-Admin-Token header):
+        {"food_name": "string"} or {"food_names": ["string"]} or {"all": true}
+        optional "include_upstream": true also clears cached USDA responses and ETags
+    """
+    if not _is_admin_request():
+        return jsonify({
+            'error': 'Forbidden',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 403
+
+    data = request.get_json(silent=True) or {}
+    if data.get('all'):
+        food_names = None
+    elif 'food_names' in data and isinstance(data['food_names'], list):
+        food_names = data['food_names']
+    elif 'food_name' in data:
+        food_names = [data['food_name']]
+    else:
+        return jsonify({
+            'error': 'Missing food_name',
+            'message': 'Provide food_name, food_names or all in JSON body'
+        }), 400
+
+    include_upstream = bool(data.get('include_upstream'))
+    invalidated = USDAService.invalidate_nutrition_cache(food_names, include_upstream=include_upstream)
+    if include_upstream:
+        clear_etags()
+    return jsonify({'invalidated': invalidated}), 200
@@ -0,0 +1,38 @@
+"""
+Per-request trace: X-Trace-Id in and out, the route as the root span and the
+request / slow-request log lines (services/tracing.py)
+"""
+from flask import g, request
+from services import tracing
+
+TRACE_HEADER = 'X-Trace-Id'
+
+
+def init_request_tracing(app):
+    """Open a trace for every request and close it at teardown"""
+
+    @app.before_request
+    def start_trace():
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        g.trace = tracing.Trace(
+            f"{request.method} {route}", request.headers.get(TRACE_HEADER)
+        ).activate()
+
+    @app.after_request
+    def add_trace_header(response):
+        trace = g.get('trace')
+        if trace is not None:
+            response.headers[TRACE_HEADER] = trace.trace_id
+            trace.root.set(status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def close_trace(error=None):
+        trace = g.pop('trace', None)
+        if trace is None:
+            return
+        if error is not None:
+            trace.root.error = f"{type(error).__name__}: {error}"
+            tracing.error("request failed", error=str(error))
+        trace.close()
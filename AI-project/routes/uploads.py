@@ -0,0 +1,69 @@
+"""
+Upload handling shared by the image endpoints
+"""
+import tempfile
+
+from flask import Request, jsonify, request
+from config.settings import Config
+
+
+class SpooledUploadRequest(Request):
+    """
+    Keeps multipart file parts in memory and only spills them to an
+    anonymous temporary file above UPLOAD_SPOOL_THRESHOLD bytes, so uploads
+    never touch uploads/ and concurrent requests cannot collide on a name.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_THRESHOLD)
+
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+
+
+def upload_size(file):
+    """Size in bytes of an uploaded file, leaving its stream at the start"""
+    stream = file.stream
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def image_upload_error(file):
+    """
+    400 response for a missing or unsupported image upload, or None when the
+    file can be processed
+    """
+    if file is None:
+        return jsonify({
+            'success': False, 
+            'error': 'No image file provided',
+            'message': 'Please upload an image file'
+        }), 400
+
+    if file.filename == '':
+        return jsonify({
+            'success': False, 
+            'error': 'No file selected',
+            'message': 'Please select an image file'
+        }), 400
+
+    if not allowed_file(file.filename):
+        return jsonify({
+            'success': False,  
+            'error': 'Invalid file type',
+            'message': 'Please upload a PNG, JPG, JPEG, or GIF file'
+        }), 400
+
+    return None
+
+
+def cache_requested():
+    """Clients skip the detection cache with ?cache=0 or Cache-Control: no-cache"""
+    if request.args.get('cache', '').lower() in ('0', 'false', 'no'):
+        return False
+    return 'no-cache' not in request.headers.get('Cache-Control', '').lower()
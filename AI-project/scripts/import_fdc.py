@@ -0,0 +1,45 @@
+"""
+Import FoodData Central bulk downloads into the local store used when
+USDA_BACKEND=local.
+
+Usage:
+    python scripts/import_fdc.py FoodData_Central_foundation_food_json.json \
+        FoodData_Central_sr_legacy_food_json.json
+    python scripts/import_fdc.py path/to/FoodData_Central_csv_dir --db data/fdc.sqlite3
+
+Each source is either a Foundation / SR Legacy JSON file or a directory
+containing food.csv, nutrient.csv and food_nutrient.csv.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+from services.fdc_store import FDCImporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local FoodData Central store")
+    parser.add_argument("sources", nargs="+", help="JSON download files or CSV directories")
+    parser.add_argument("--db", default=Config.FDC_STORE_PATH,
+                        help=f"store file to create (default: {Config.FDC_STORE_PATH})")
+    parser.add_argument("--replace", action="store_true",
+                        help="delete an existing store before importing")
+    args = parser.parse_args()
+
+    if args.replace and os.path.exists(args.db):
+        os.remove(args.db)
+
+    importer = FDCImporter(args.db)
+    for source in args.sources:
+        count = importer.import_path(source)
+        print(f"imported {count} foods from {source}")
+
+    total = importer.finish()
+    print(f"{args.db}: {total} foods")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Detect foods in a photo and resolve nutrition for every detected class in one
+call
+"""
+import time
+
+from services.async_http_client import AsyncHttpClient
+from services.async_usda_service import AsyncUSDAService
+from services.detection_pipeline import DetectionPipeline
+
+
+class AnalysisService:
+
+    @staticmethod
+    def analyze(image, budget, filename="image.jpg", content_type=None, use_cache=True):
+        """
+        Run detection, then look up nutrition for each distinct detected class
+        concurrently. budget (seconds) covers the whole call: classes still
+        resolving when it runs out are returned as "pending" and keep filling
+        the nutrition cache in the background.
+        """
+        started = time.perf_counter()
+        result = DetectionPipeline.detect(
+            image, filename=filename, content_type=content_type, use_cache=use_cache
+        )
+        detection_ms = round((time.perf_counter() - started) * 1000, 2)
+        if 'error' in result:
+            return result
+
+        detected_foods = result.get('detected_foods', [])
+        names = list(dict.fromkeys(food['name'] for food in detected_foods))
+
+        stage = time.perf_counter()
+        remaining = max(0.0, budget - (stage - started))
+        # Resolved on the client loop so these lookups coalesce with the async
+        # nutrition views' (one single-flight table per worker)
+        lookups = AsyncHttpClient.run_blocking(
+            AsyncUSDAService.get_simple_nutrition_batch(names, remaining)
+        ) if names else []
+        nutrition_ms = round((time.perf_counter() - stage) * 1000, 2)
+
+        items = []
+        by_name = {}
+        for name, lookup in zip(names, lookups):
+            matches = [food for food in detected_foods if food['name'] == name]
+            item = {
+                "name": name,
+                "detections": len(matches),
+                "max_confidence": max(food['confidence'] for food in matches),
+                "status": lookup["status"],
+                "nutrition": lookup.get("nutrition"),
+                "elapsed_ms": lookup.get("elapsed_ms")
+            }
+            if "error" in lookup:
+                item["error"] = lookup["error"]
+            items.append(item)
+            by_name[name] = item
+
+        for food in detected_foods:
+            food["nutrition_status"] = by_name[food['name']]["status"]
+            food["nutrition"] = by_name[food['name']]["nutrition"]
+
+        result["items"] = items
+        result["pending"] = sum(1 for item in items if item["status"] == "pending")
+        timings = result.get("timings_ms", {})
+        timings.update({
+            "detection": detection_ms,
+            "nutrition": nutrition_ms,
+            "total": round((time.perf_counter() - started) * 1000, 2)
+        })
+        result["timings_ms"] = timings
+        return result
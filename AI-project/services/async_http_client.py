@@ -0,0 +1,251 @@
+"""
+Asyncio counterpart of HttpClient: one pooled aiohttp session per worker
+process with the same timeouts and retry policy.
+
+Flask runs every async view in its own short-lived event loop, which a
+connection pool cannot outlive. The client therefore lives on a long-lived
+loop in a daemon thread, and the async services run their coroutines there
+(see on_client_loop); views simply await them.
+"""
+import asyncio
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+import aiohttp
+from config.settings import Config
+from services import tracing
+from services.http_client import HttpClient
+
+_CONNECT_TIMEOUT = getattr(aiohttp, 'ConnectionTimeoutError', None)
+
+
+class AsyncResponse:
+    """A fully read upstream response with the requests.Response API the services use"""
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncHttpClient:
+    """Process-wide aiohttp session owned by a background event loop"""
+
+    _loop = None
+    _thread = None
+    _client = None
+    _pid = None
+    _lock = threading.Lock()
+    _stats = {
+        'requests': 0,
+        'retries': 0,
+        'retry_after_waits': 0,
+        'connection_errors': 0,
+        'timeouts': 0,
+    }
+
+    @classmethod
+    def loop(cls):
+        """This process's client loop, started on first use and after a fork"""
+        loop = cls._loop
+        if loop is not None and cls._pid == os.getpid():
+            return loop
+
+        with cls._lock:
+            if cls._loop is None or cls._pid != os.getpid():
+                cls._loop = asyncio.new_event_loop()
+                cls._client = None
+                cls._thread = threading.Thread(
+                    target=cls._loop.run_forever, name='async-http', daemon=True
+                )
+                cls._thread.start()
+                cls._pid = os.getpid()
+            return cls._loop
+
+    @classmethod
+    def reset(cls):
+        """Close pooled connections and stop the loop, e.g. in a post-fork hook"""
+        with cls._lock:
+            loop, client = cls._loop, cls._client
+            owned = loop is not None and cls._pid == os.getpid()
+            cls._loop = cls._thread = cls._client = cls._pid = None
+            for key in cls._stats:
+                cls._stats[key] = 0
+
+        if owned:
+            if client is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+                except Exception as e:
+                    tracing.warning("async client close failed", error=str(e))
+            loop.call_soon_threadsafe(loop.stop)
+
+    @classmethod
+    async def run(cls, coro):
+        """Await coro on the client loop, from whichever loop is running"""
+        loop = cls.loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    @classmethod
+    def run_blocking(cls, coro):
+        """Run coro on the client loop from a plain (non-loop) thread and wait for it"""
+        return asyncio.run_coroutine_threadsafe(coro, cls.loop()).result()
+
+    @classmethod
+    def client(cls):
+        """The pooled session; only call from coroutines on the client loop"""
+        if cls._client is None:
+            cls._client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=Config.HTTP_ASYNC_MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=Config.HTTP_CONNECT_TIMEOUT, sock_read=Config.HTTP_READ_TIMEOUT
+                )
+            )
+        return cls._client
+
+    @classmethod
+    async def get(cls, url, **kwargs):
+        return await cls.request('GET', url, **kwargs)
+
+    @classmethod
+    async def post(cls, url, **kwargs):
+        return await cls.request('POST', url, **kwargs)
+
+    @classmethod
+    async def request(cls, method, url, params=None, files=None, max_retries=None, idempotent=None,
+                      **kwargs):
+        """
+        Send a request on the pooled session and read the whole body.
+        Takes requests-style params and files. Same retry policy as
+        HttpClient: 429 and connection failures back off with jitter
+        (Retry-After first), connect timeouts included, and so does 5xx for
+        idempotent requests; read timeouts are raised without a retry.
+        """
+        if asyncio.get_running_loop() is not cls.loop():
+            return await cls.run(cls.request(method, url, params=params, files=files,
+                                             max_retries=max_retries, idempotent=idempotent, **kwargs))
+        if max_retries is None:
+            max_retries = Config.HTTP_MAX_RETRIES
+        if params is not None:
+            kwargs['params'] = cls._query(params)
+        fields = cls._file_fields(files) if files else None
+
+        attempt = 0
+        while True:
+            if fields:
+                # aiohttp consumes (and closes) form payloads, so each attempt gets a new one
+                kwargs['data'] = cls._form(fields)
+            cls._count('requests')
+            started = time.perf_counter()
+            try:
+                async with cls.client().request(method, url, **kwargs) as raw:
+                    response = AsyncResponse(raw.status, raw.headers, await raw.read())
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                # ServerTimeoutError is both; like requests' ConnectTimeout, a
+                # connect timeout is a connection error, only a read timeout is final
+                if isinstance(e, asyncio.TimeoutError) and not cls._is_connect_timeout(e):
+                    cls._count('timeouts')
+                    HttpClient._observe(url, 'timeout', started, attempt)
+                    raise
+                cls._count('connection_errors')
+                HttpClient._observe(url, 'connection_error', started, attempt)
+                if attempt >= max_retries:
+                    raise
+                delay = HttpClient._backoff(attempt)
+            else:
+                HttpClient._observe(url, response.status_code, started, attempt)
+                if not HttpClient._retryable(method, response.status_code, idempotent) or attempt >= max_retries:
+                    return response
+                delay = HttpClient._retry_after(response)
+                if delay is None:
+                    delay = HttpClient._backoff(attempt)
+                elif delay > Config.HTTP_RETRY_AFTER_MAX:
+                    return response
+                else:
+                    cls._count('retry_after_waits')
+
+            cls._count('retries')
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _is_connect_timeout(exc):
+        """aiohttp 3.10+ raises ConnectionTimeoutError; 3.9 a ServerTimeoutError worded as below"""
+        if _CONNECT_TIMEOUT is not None:
+            return isinstance(exc, _CONNECT_TIMEOUT)
+        return isinstance(exc, aiohttp.ServerTimeoutError) and str(exc).startswith('Connection timeout')
+
+    @staticmethod
+    def _query(params):
+        """requests-style params (list values repeat the key) as query pairs"""
+        pairs = []
+        for key, value in params.items():
+            for item in value if isinstance(value, (list, tuple)) else [value]:
+                if item is not None:
+                    pairs.append((key, str(item)))
+        return pairs
+
+    @staticmethod
+    def _file_fields(files):
+        """requests-style files={"field": (filename, stream, content_type)} read into memory"""
+        HttpClient._rewind_files(files)
+        fields = []
+        for field, value in files.items():
+            if isinstance(value, tuple):
+                filename, body = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+            else:
+                filename, body, content_type = field, value, None
+            if hasattr(body, 'read'):
+                body = body.read()
+            fields.append((field, bytes(body), filename, content_type))
+        return fields
+
+    @staticmethod
+    def _form(fields):
+        form = aiohttp.FormData()
+        for field, body, filename, content_type in fields:
+            form.add_field(field, body, filename=filename, content_type=content_type)
+        return form
+
+    @classmethod
+    def _count(cls, key, amount=1):
+        with cls._lock:
+            cls._stats[key] += amount
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['running'] = cls._loop is not None and cls._pid == os.getpid()
+        stats['max_connections'] = Config.HTTP_ASYNC_MAX_CONNECTIONS
+        return stats
+
+
+atexit.register(AsyncHttpClient.reset)
+
+
+def on_client_loop(func):
+    """
+    Make a coroutine function always execute on the client loop, so tasks it
+    starts (and state shared between requests) live on one loop
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await AsyncHttpClient.run(func(*args, **kwargs))
+    return wrapper
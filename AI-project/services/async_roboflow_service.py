@@ -0,0 +1,39 @@
+"""
+Async variant of the Roboflow detection service. The hosted backend awaits
+the API on AsyncHttpClient; local and fake backends run in a thread.
+"""
+import asyncio
+import os
+
+from services.async_http_client import on_client_loop
+from services.detectors import get_detector
+
+
+class AsyncRoboflowService:
+
+    @staticmethod
+    @on_client_loop
+    async def detect_food(image, filename="image.jpg", content_type=None):
+        """
+        RoboflowService.detect_food as a coroutine: raw bytes, a binary stream
+        or a file path in, the detector response (or an error dict) out.
+        Format the result with RoboflowService.format_detection_results.
+        """
+        try:
+            detector = get_detector()
+            if isinstance(image, (str, os.PathLike)):
+                data = await asyncio.to_thread(AsyncRoboflowService._read_file, image)
+                return await detector.detect_async(data, os.path.basename(image), content_type)
+            return await detector.detect_async(image, filename, content_type)
+
+        except Exception as e:
+            return {
+                "error": str(e),
+                "predictions": [],
+                "image": {"width": 0, "height": 0}
+            }
+
+    @staticmethod
+    def _read_file(path):
+        with open(path, "rb") as img_file:
+            return img_file.read()
@@ -0,0 +1,321 @@
+"""
+Async variant of the USDA service: the same lookups and caches as
+USDAService, with upstream calls awaited on the pooled AsyncHttpClient so
+independent calls of one request run concurrently
+"""
+import asyncio
+import time
+
+from config.settings import Config
+from services import tracing
+from services.async_http_client import AsyncHttpClient, on_client_loop
+from services.food_names import normalize_food_name
+from services.usda_service import (
+    USDAService, detail_cache, detail_flight, nutrition_flight, result_cache, search_cache
+)
+
+# Tasks left running after their caller moved on (prefetches, batch stragglers)
+_background = set()
+
+
+def _detach(task):
+    """Let a task finish on its own, keeping it referenced and its error retrieved"""
+    _background.add(task)
+
+    def done(finished):
+        _background.discard(finished)
+        if not finished.cancelled():
+            finished.exception()
+
+    task.add_done_callback(done)
+
+
+class AsyncUSDAService:
+    """
+    Coroutine counterparts of the USDAService lookups. Results, caches and
+    single-flight groups are shared with the sync service. With
+    USDA_BACKEND=local the sync implementation runs in a thread instead.
+    """
+
+    @staticmethod
+    def _api_key():
+        api_key = Config.USDA_API_KEY
+        if not api_key:
+            raise ValueError("Missing USDA_API_KEY in .env")
+        return api_key
+
+    @staticmethod
+    @on_client_loop
+    async def search_foods(query, limit=10):
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(USDAService.search_foods, query, limit)
+
+        with tracing.span("search", query=query, limit=limit) as span:
+            api_key = AsyncUSDAService._api_key()
+            cache_key = USDAService._search_key(query, limit)
+            cached = await search_cache.get_async(cache_key)
+            if cached is not None:
+                span.set(cached=True)
+                return cached
+
+            response = await AsyncHttpClient.get(
+                f"{USDAService.BASE_URL}/foods/search",
+                params=USDAService._search_params(query, limit, api_key)
+            )
+            if response.status_code != 200:
+                raise Exception(f"USDA search failed: {response.status_code}")
+
+            result = USDAService._parse_search(response.json())
+            await search_cache.set_async(cache_key, result)
+            return result
+
+    @staticmethod
+    @on_client_loop
+    async def get_food_by_fdc_id(fdc_id):
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(USDAService.get_food_by_fdc_id, fdc_id)
+
+        with tracing.span("detail", fdc_id=fdc_id) as span:
+            api_key = AsyncUSDAService._api_key()
+            cache_key = str(fdc_id).strip()
+            cached = await detail_cache.get_async(cache_key)
+            if cached is not None:
+                span.set(cached=True)
+                return cached
+
+            return await detail_flight.do_async(cache_key, AsyncUSDAService._fetch_food_detail, fdc_id, api_key)
+
+    @staticmethod
+    async def _fetch_food_detail(fdc_id, api_key):
+        response = await AsyncHttpClient.get(f"{USDAService.BASE_URL}/food/{fdc_id}", params={"api_key": api_key})
+        if response.status_code != 200:
+            raise Exception(f"USDA detail failed: {response.status_code}")
+
+        result = USDAService._parse_food_detail(fdc_id, response.json())
+        await detail_cache.set_async(str(fdc_id).strip(), result)
+        return result
+
+    @staticmethod
+    @on_client_loop
+    async def get_foods_by_fdc_ids(fdc_ids):
+        """Details for many foods keyed by FDC id; failed ids are left out"""
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(USDAService.get_foods_by_fdc_ids, fdc_ids)
+
+        AsyncUSDAService._api_key()
+        with tracing.span("details", requested=len(fdc_ids)) as span:
+            # One thread hop for all the cache lookups (they may read SQLite)
+            results, missing = await asyncio.to_thread(USDAService._cached_details, fdc_ids)
+            span.set(cached=len(results), mode=Config.USDA_DETAIL_FETCH_MODE)
+            if not missing:
+                return results
+
+            mode = Config.USDA_DETAIL_FETCH_MODE
+            if mode == "bulk":
+                chunk_size = max(1, Config.USDA_BULK_CHUNK_SIZE)
+                chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+                for chunk_results in await AsyncUSDAService._gather(AsyncUSDAService._fetch_bulk_chunk, chunks):
+                    if chunk_results:
+                        results.update(chunk_results)
+            elif mode == "concurrent":
+                results.update(await AsyncUSDAService._fetch_details_concurrently(missing))
+            else:
+                for fdc_id in missing:
+                    try:
+                        results[fdc_id] = await AsyncUSDAService.get_food_by_fdc_id(fdc_id)
+                    except Exception as e:
+                        tracing.warning("usda detail failed", fdc_id=fdc_id, error=str(e))
+
+            return results
+
+    @staticmethod
+    async def _fetch_bulk_chunk(fdc_ids):
+        try:
+            payload = {"fdcIds": [int(fdc_id) for fdc_id in fdc_ids], "format": "full"}
+            response = await AsyncHttpClient.post(
+                f"{USDAService.BASE_URL}/foods", params={"api_key": Config.USDA_API_KEY}, json=payload,
+                idempotent=True
+            )
+            if response.status_code != 200:
+                raise Exception(f"USDA bulk detail failed: {response.status_code}")
+            records = response.json()
+        except Exception as e:
+            tracing.warning("usda bulk detail failed, using single requests", error=str(e))
+            return await AsyncUSDAService._fetch_details_concurrently(fdc_ids)
+
+        results = USDAService._parse_bulk_records(fdc_ids, records)
+        await asyncio.to_thread(USDAService._cache_details, results)
+        return results
+
+    @staticmethod
+    async def _fetch_details_concurrently(fdc_ids):
+        details = await AsyncUSDAService._gather(AsyncUSDAService.get_food_by_fdc_id, fdc_ids)
+        return {fdc_id: detail for fdc_id, detail in zip(fdc_ids, details) if detail is not None}
+
+    @staticmethod
+    async def _gather(func, items):
+        """
+        Await func over items, at most USDA_DETAIL_CONCURRENCY at a time, in
+        input order. A failing item yields None instead of raising.
+        """
+        limit = asyncio.Semaphore(max(1, Config.USDA_DETAIL_CONCURRENCY))
+
+        async def run(item):
+            async with limit:
+                try:
+                    return await func(item)
+                except Exception as e:
+                    tracing.warning("usda fetch failed", item=item, error=str(e))
+                    return None
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    @staticmethod
+    @on_client_loop
+    async def get_single_food_nutrition(food_name):
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(USDAService.get_single_food_nutrition, food_name)
+
+        search_results = await AsyncUSDAService.search_foods(food_name, limit=25)
+        # Building and ranking the index is CPU work; keep it off the shared loop
+        best_match = await asyncio.to_thread(
+            USDAService._match_search_results, food_name, search_results.get("foods", [])
+        )
+        if "error" in best_match:
+            return best_match
+
+        try:
+            food_detail = await AsyncUSDAService.get_food_by_fdc_id(best_match["fdc_id"])
+            return USDAService._matched_nutrition(best_match, food_detail)
+        except Exception as e:
+            tracing.warning("usda detail failed", food=food_name, error=str(e))
+            return {"error": f"Failed to get nutrition data: {e}"}
+
+    @staticmethod
+    @on_client_loop
+    async def get_nutrition_by_name(food_name):
+        """Average nutrients over up to 20 matching foods, details fetched concurrently"""
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(USDAService.get_nutrition_by_name, food_name)
+        return await AsyncUSDAService._average_by_name(food_name)
+
+    @staticmethod
+    async def _average_by_name(food_name, search=None):
+        """get_nutrition_by_name, optionally reusing an already started search"""
+        food_name = food_name.lower().strip()
+
+        with tracing.span("average"):
+            if search is None:
+                search = AsyncUSDAService.search_foods(food_name, limit=50)
+            search_results = await search
+            candidates = USDAService._average_candidates(search_results.get("foods", []))
+            if not candidates:
+                return {"error": f"No food found for '{food_name}'"}
+
+            details = await AsyncUSDAService.get_foods_by_fdc_ids([food["fdc_id"] for food in candidates])
+            return USDAService._average_nutrients(food_name, candidates, details)
+
+    @staticmethod
+    @on_client_loop
+    @tracing.traced("nutrition")
+    async def get_simple_nutrition(food_name):
+        span = tracing.current_span()
+        span.set(food=food_name)
+        standard = USDAService._standard_nutrition(food_name)
+        if standard is not None:
+            span.set(source="standard")
+            return standard
+
+        cache_key = normalize_food_name(food_name)
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            span.set(source="cache")
+            return cached
+
+        if USDAService.uses_local_store():
+            return await asyncio.to_thread(
+                nutrition_flight.do, cache_key, USDAService._resolve_and_cache, food_name, cache_key
+            )
+        return await nutrition_flight.do_async(
+            cache_key, AsyncUSDAService._resolve_and_cache, food_name, cache_key
+        )
+
+    @staticmethod
+    @on_client_loop
+    async def get_simple_nutrition_batch(food_names, timeout):
+        """
+        USDAService.get_simple_nutrition_batch on the event loop: every unique
+        name is resolved concurrently under one deadline, and lookups still
+        running at the deadline finish in the background
+        """
+        unique = USDAService._unique_names(food_names)
+
+        async def timed(food_name):
+            started = time.perf_counter()
+            result = await AsyncUSDAService.get_simple_nutrition(food_name)
+            return result, round((time.perf_counter() - started) * 1000, 1)
+
+        tasks = {key: asyncio.ensure_future(timed(name)) for key, name in unique.items()}
+        done = set()
+        if tasks:
+            done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            for task in pending:
+                _detach(task)
+
+        outcomes = {}
+        for cache_key, task in tasks.items():
+            if task not in done:
+                outcomes[cache_key] = {"status": "pending"}
+                continue
+            try:
+                result, elapsed_ms = task.result()
+            except Exception as e:
+                outcomes[cache_key] = {"status": "error", "error": str(e)}
+                continue
+            status = "error" if "error" in result else "ok"
+            outcomes[cache_key] = {"status": status, "nutrition": result, "elapsed_ms": elapsed_ms}
+
+        return USDAService._batch_items(food_names, outcomes)
+
+    @staticmethod
+    async def _resolve_and_cache(food_name, cache_key):
+        result, outcome = await AsyncUSDAService._resolve_nutrition(food_name)
+        tracing.current_span().set(source=outcome)
+        ttl = USDAService._outcome_ttl(outcome)
+        if ttl:
+            await result_cache.set_async(cache_key, result, ttl=ttl)
+        return result
+
+    @staticmethod
+    async def _resolve_nutrition(food_name):
+        """
+        Smart match, then averaged fallback, then a fixed estimate, as in
+        USDAService._resolve_nutrition. With USDA_ASYNC_PREFETCH_FALLBACK the
+        fallback's search is sent alongside the smart match instead of after
+        it fails; if the match succeeds the prefetched search only warms the
+        cache, at the cost of a second upstream search.
+        """
+        fallback_search = None
+        if Config.USDA_ASYNC_PREFETCH_FALLBACK:
+            fallback_search = asyncio.ensure_future(
+                AsyncUSDAService.search_foods(food_name.lower().strip(), limit=50)
+            )
+
+        try:
+            result = await AsyncUSDAService.get_single_food_nutrition(food_name)
+
+            if "error" not in result:
+                return result, "match"
+
+            tracing.debug("smart match failed, averaging", food=food_name)
+            search, fallback_search = fallback_search, None
+            average = await AsyncUSDAService._average_by_name(food_name, search)
+            return USDAService._fallback_outcome(food_name, average)
+
+        except Exception as e:
+            tracing.warning("nutrition lookup failed", food=food_name, error=str(e))
+
+            return USDAService._estimated_nutrition(food_name), "error"
+        finally:
+            if fallback_search is not None:
+                _detach(fallback_search)
@@ -0,0 +1,295 @@
+"""
+Two-tier response cache: an in-process LRU hot tier in front of a SQLite
+tier that every worker process shares and that survives restarts
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from services.metrics import cache_counter
+
+
+class ResponseCache:
+    """LRU + SQLite cache for JSON-serializable upstream responses"""
+
+    # Expired disk rows are pruned once every this many writes
+    PRUNE_EVERY = 500
+    # How often a worker checks whether another worker invalidated entries
+    EPOCH_CHECK_INTERVAL = 2.0
+
+    def __init__(self, namespace, max_entries=1024, ttl=3600,
+                 disk_path=None, disk_ttl=None, enabled=True):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path or None
+        self.disk_ttl = disk_ttl if disk_ttl is not None else ttl
+        self.enabled = enabled
+
+        # key -> (expires_at, json text); values are stored serialized so
+        # callers can never mutate a cached entry in place
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self._epoch = None
+        self._epoch_checked_at = 0.0
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_errors': 0,
+        }
+        self._lookups = {
+            result: cache_counter(namespace, result) for result in ('memory_hit', 'disk_hit', 'miss')
+        }
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a cache key from already-normalized parts"""
+        return '|'.join(str(part) for part in parts)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        self._sync_epoch(now)
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+
+        row = self._disk_get(key, now)
+        if row is not None:
+            text, expires_at = row
+            with self._lock:
+                self._stats['disk_hits'] += 1
+                self._memory_put(key, text, min(expires_at, now + self.ttl))
+            self._lookups['disk_hit'].inc()
+            return json.loads(text)
+
+        self._count_miss()
+        return None
+
+    async def get_async(self, key):
+        """
+        get() for coroutines on a shared event loop: hot-tier hits are
+        answered in place, anything that needs SQLite (a disk lookup or the
+        periodic epoch check) runs in a thread so the loop never blocks on it
+        """
+        if not self.enabled:
+            return None
+        if not self.disk_path:
+            return self.get(key)
+        now = time.time()
+        if now - self._epoch_checked_at < self.EPOCH_CHECK_INTERVAL:
+            value = self._memory_get(key, now)
+            if value is not None:
+                return value
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key, value, ttl=None, disk_ttl=None):
+        """Store value in both tiers; per-call TTLs override the defaults"""
+        if not self.enabled:
+            return
+        self._disk_set(*self._set_memory(key, value, ttl, disk_ttl))
+
+    async def set_async(self, key, value, ttl=None, disk_ttl=None):
+        """set() for coroutines: the hot tier is filled in place, the SQLite write runs in a thread"""
+        if not self.enabled:
+            return
+        disk_write = self._set_memory(key, value, ttl, disk_ttl)
+        if self.disk_path:
+            await asyncio.to_thread(self._disk_set, *disk_write)
+
+    def _set_memory(self, key, value, ttl, disk_ttl):
+        """Fill the hot tier; returns the (key, text, expires_at) row for the disk tier"""
+        now = time.time()
+        text = json.dumps(value, separators=(',', ':'))
+        memory_ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._stats['sets'] += 1
+            self._memory_put(key, text, now + memory_ttl)
+
+        if disk_ttl is None:
+            disk_ttl = self.disk_ttl if ttl is None else ttl
+        return key, text, now + disk_ttl
+
+    def delete(self, key):
+        """Drop key from both tiers; other workers drop their hot tier"""
+        with self._lock:
+            self._memory.pop(key, None)
+        self._disk_execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        )
+        self._bump_epoch()
+
+    def clear(self):
+        """Drop every entry in this cache's namespace"""
+        with self._lock:
+            self._memory.clear()
+        self._disk_execute(
+            "DELETE FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        )
+        self._bump_epoch()
+
+    def _bump_epoch(self):
+        if not self.disk_path:
+            return
+        self._disk_execute(
+            "INSERT INTO cache_epochs (namespace, epoch) VALUES (?, 1)"
+            " ON CONFLICT(namespace) DO UPDATE SET epoch = epoch + 1",
+            (self.namespace,)
+        )
+        # Our own hot tier is already consistent
+        self._epoch = self._read_epoch()
+
+    def _read_epoch(self):
+        try:
+            row = self._connection().execute(
+                "SELECT epoch FROM cache_epochs WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        except sqlite3.Error:
+            return self._epoch
+        return row[0] if row else 0
+
+    def _sync_epoch(self, now):
+        """
+        Invalidations are recorded as an epoch bump in the shared file; when a
+        worker sees a new epoch it empties its hot tier and refills from disk
+        """
+        if not self.disk_path or now - self._epoch_checked_at < self.EPOCH_CHECK_INTERVAL:
+            return
+        self._epoch_checked_at = now
+        epoch = self._read_epoch()
+        if self._epoch is not None and epoch != self._epoch:
+            with self._lock:
+                self._memory.clear()
+        self._epoch = epoch
+
+    def stats(self):
+        """Hit/miss/eviction counters for this worker process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round(
+            (stats['memory_hits'] + stats['disk_hits']) / lookups, 4
+        ) if lookups else 0.0
+        stats['namespace'] = self.namespace
+        stats['disk_enabled'] = bool(self.disk_path)
+        return stats
+
+    def _memory_get(self, key, now):
+        """Hot-tier value for key, or None; counts hits but not misses"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                self._lookups['memory_hit'].inc()
+                return json.loads(text)
+            del self._memory[key]
+            self._stats['expirations'] += 1
+        return None
+
+    def _count_miss(self):
+        with self._lock:
+            self._stats['misses'] += 1
+        self._lookups['miss'].inc()
+
+    def _memory_put(self, key, text, expires_at):
+        # Caller holds self._lock
+        self._memory[key] = (expires_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _connection(self):
+        """One SQLite connection per thread, re-opened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.disk_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.disk_path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_epochs ("
+            " namespace TEXT PRIMARY KEY,"
+            " epoch INTEGER NOT NULL"
+            ")"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _disk_get(self, key, now):
+        if not self.disk_path:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries"
+                " WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error:
+            with self._lock:
+                self._stats['disk_errors'] += 1
+            return None
+        if row is None or row[1] <= now:
+            return None
+        return row
+
+    def _disk_set(self, key, text, expires_at):
+        if not self.disk_path:
+            return
+        self._disk_execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at)"
+            " VALUES (?, ?, ?, ?)",
+            (self.namespace, key, text, expires_at)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._disk_execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time())
+            )
+
+    def _disk_execute(self, sql, params):
+        if not self.disk_path:
+            return
+        try:
+            self._connection().execute(sql, params)
+        except sqlite3.Error:
+            # The disk tier is an optimization; never fail a lookup over it
+            with self._lock:
+                self._stats['disk_errors'] += 1
@@ -0,0 +1,169 @@
+"""
+Detection result cache keyed by a perceptual hash of the image, so retakes of
+the same plate reuse an earlier inference
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from services.metrics import cache_counter
+
+HASH_BITS = 64
+
+
+def dhash(image, hash_size=8):
+    """
+    64-bit difference hash: shrink to (hash_size + 1) x hash_size grayscale
+    and record whether each pixel is brighter than its right-hand neighbour
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class DetectionCache:
+    """
+    LRU of formatted detection results keyed by dHash, with near-duplicate
+    lookup within max_distance bits.
+
+    Uses multi-index hashing: the 64-bit hash is split into max_distance + 1
+    bands. Two hashes within max_distance bits must agree exactly on at least
+    one band (pigeonhole), so only entries sharing a band are compared.
+    """
+
+    def __init__(self, max_entries=512, max_distance=6, ttl=24 * 3600, enabled=True):
+        self.max_entries = max_entries
+        self.max_distance = max(0, min(max_distance, HASH_BITS - 1))
+        self.ttl = ttl
+        self.enabled = enabled
+
+        bands = self.max_distance + 1
+        widths = [HASH_BITS // bands + (1 if i < HASH_BITS % bands else 0) for i in range(bands)]
+        self._bands = []
+        shift = HASH_BITS
+        for width in widths:
+            shift -= width
+            self._bands.append((shift, (1 << width) - 1))
+
+        # hash -> (expires_at, original_size, result)
+        self._entries = OrderedDict()
+        self._index = [dict() for _ in self._bands]
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'near_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'bypassed': 0}
+        self._lookups = {
+            result: cache_counter('detection', result) for result in ('hit', 'near_hit', 'miss', 'bypass')
+        }
+
+    def _band_keys(self, image_hash):
+        return [(image_hash >> shift) & mask for shift, mask in self._bands]
+
+    def get(self, image_hash, original_size=None):
+        """
+        Return (result, distance) for the closest cached image within
+        max_distance bits, or (None, None). Boxes are rescaled when the cached
+        image had different dimensions.
+        """
+        if not self.enabled:
+            return None, None
+
+        now = time.time()
+        with self._lock:
+            best_hash, best_distance = None, None
+            if image_hash in self._entries and self._entries[image_hash][0] > now:
+                best_hash, best_distance = image_hash, 0
+            else:
+                candidates = set()
+                for band, key in enumerate(self._band_keys(image_hash)):
+                    candidates.update(self._index[band].get(key, ()))
+                expired = []
+                for candidate in candidates:
+                    distance = (candidate ^ image_hash).bit_count()
+                    if distance > self.max_distance:
+                        continue
+                    # An expired neighbour must not hide a live one further away
+                    if self._entries[candidate][0] <= now:
+                        expired.append(candidate)
+                    elif best_distance is None or distance < best_distance:
+                        best_hash, best_distance = candidate, distance
+                for candidate in expired:
+                    self._remove(candidate)
+
+            if best_hash is None:
+                self._stats['misses'] += 1
+                self._lookups['miss'].inc()
+                return None, None
+
+            self._entries.move_to_end(best_hash)
+            self._stats['hits' if best_distance == 0 else 'near_hits'] += 1
+            _, cached_size, result = self._entries[best_hash]
+            result = copy.deepcopy(result)
+        self._lookups['hit' if best_distance == 0 else 'near_hit'].inc()
+
+        if original_size and cached_size and tuple(original_size) != tuple(cached_size):
+            self._rescale(result, cached_size, original_size)
+        return result, best_distance
+
+    def set(self, image_hash, result, original_size=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if image_hash in self._entries:
+                self._remove(image_hash)
+            self._entries[image_hash] = (
+                time.time() + self.ttl,
+                tuple(original_size) if original_size else None,
+                copy.deepcopy(result),
+            )
+            for band, key in enumerate(self._band_keys(image_hash)):
+                self._index[band].setdefault(key, set()).add(image_hash)
+            self._stats['sets'] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self._stats['bypassed'] += 1
+        self._lookups['bypass'].inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index = [dict() for _ in self._bands]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['near_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['near_hits']) / lookups, 4) if lookups else 0.0
+        stats['max_distance'] = self.max_distance
+        return stats
+
+    def _remove(self, image_hash):
+        # Caller holds self._lock
+        del self._entries[image_hash]
+        for band, key in enumerate(self._band_keys(image_hash)):
+            bucket = self._index[band].get(key)
+            if bucket is not None:
+                bucket.discard(image_hash)
+                if not bucket:
+                    del self._index[band][key]
+
+    @staticmethod
+    def _rescale(result, cached_size, original_size):
+        scale_x = original_size[0] / cached_size[0]
+        scale_y = original_size[1] / cached_size[1]
+        for food in result.get('detected_foods', []):
+            bbox = food.get('bbox', {})
+            for field, factor in (('x', scale_x), ('y', scale_y), ('width', scale_x), ('height', scale_y)):
+                if field in bbox:
+                    bbox[field] = round(bbox[field] * factor, 1)
+        image_info = result.get('image_info')
+        if isinstance(image_info, dict):
+            image_info['width'], image_info['height'] = original_size
@@ -0,0 +1,286 @@
+"""
+Detection pipeline: preprocess the upload, reuse cached results for
+near-identical images, run inference, format results in original image
+coordinates
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from PIL import Image
+
+from config.settings import Config
+from services import tracing
+from services.async_roboflow_service import AsyncRoboflowService
+from services.detection_cache import DetectionCache, dhash
+from services.image_preprocessor import ImagePreprocessor
+from services.job_queue import register_handler
+from services.roboflow_service import RoboflowService
+from services.tiling import TiledDetector
+from services.worker_pool import ByteBudget, WorkerPools
+
+detection_cache = DetectionCache(
+    max_entries=Config.DETECTION_CACHE_MAX_ENTRIES,
+    max_distance=Config.DETECTION_CACHE_MAX_DISTANCE,
+    ttl=Config.DETECTION_CACHE_TTL,
+    enabled=Config.DETECTION_CACHE_ENABLED
+)
+
+# Upload bytes being processed by batch detection in this worker, across requests
+upload_budget = ByteBudget(Config.DETECT_BATCH_MAX_INFLIGHT_BYTES)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class DetectionPipeline:
+
+    @staticmethod
+    def detect(image, filename="image.jpg", content_type=None, use_cache=True):
+        """
+        Run the full pipeline on raw bytes or a binary stream. Returns the
+        formatted detection result with a preprocessing report, cache status
+        and per-stage timings in milliseconds. use_cache=False skips the
+        lookup but still stores the fresh result.
+        """
+        run = DetectionPipeline._prepare(image, content_type, use_cache)
+        if run["cached"] is not None:
+            return run["cached"]
+
+        stage = time.perf_counter()
+        with tracing.span("inference", backend=Config.DETECTOR_BACKEND, tiled=run["tiled"]):
+            if run["tiled"]:
+                raw_result = DetectionPipeline._detect_tiled(run, filename)
+            else:
+                raw_result = RoboflowService.detect_food(
+                    run["payload"], filename=filename, content_type=run["payload_type"]
+                )
+        run["timings"]["inference"] = _elapsed_ms(stage)
+        return DetectionPipeline._finish(run, raw_result)
+
+    @staticmethod
+    async def detect_async(image, filename="image.jpg", content_type=None, use_cache=True):
+        """
+        detect() for async views. Preprocessing, cache lookup and formatting
+        run inline; inference is awaited through AsyncRoboflowService, or run
+        in a thread when the image is tiled.
+        """
+        run = DetectionPipeline._prepare(image, content_type, use_cache)
+        if run["cached"] is not None:
+            return run["cached"]
+
+        stage = time.perf_counter()
+        with tracing.span("inference", backend=Config.DETECTOR_BACKEND, tiled=run["tiled"]):
+            if run["tiled"]:
+                raw_result = await asyncio.to_thread(DetectionPipeline._detect_tiled, run, filename)
+            else:
+                raw_result = await AsyncRoboflowService.detect_food(
+                    run["payload"], filename=filename, content_type=run["payload_type"]
+                )
+        run["timings"]["inference"] = _elapsed_ms(stage)
+        return DetectionPipeline._finish(run, raw_result)
+
+    @staticmethod
+    def _prepare(image, content_type, use_cache):
+        """
+        Preprocess and fingerprint the upload. Returns the pipeline state;
+        its "cached" entry holds the finished result on a cache hit.
+        """
+        started = time.perf_counter()
+        timings = {}
+
+        if Config.DETECT_PREPROCESS_ENABLED:
+            with tracing.span("preprocess"):
+                prepared = ImagePreprocessor.preprocess(
+                    image, Config.DETECT_MAX_SIDE, Config.DETECT_JPEG_QUALITY, content_type
+                )
+            timings.update(prepared.timings)
+            payload, payload_type = prepared.data, prepared.content_type or content_type
+        else:
+            prepared = None
+            payload = image if isinstance(image, (bytes, bytearray)) else image.read()
+            payload_type = content_type
+
+        run = {
+            "started": started,
+            "timings": timings,
+            "prepared": prepared,
+            "payload": payload,
+            "payload_type": payload_type,
+            "image_hash": None,
+            "cache_info": {"status": "disabled"},
+            "cached": None,
+        }
+
+        original_size = None
+        if detection_cache.enabled:
+            stage = time.perf_counter()
+            run["image_hash"], original_size = DetectionPipeline._fingerprint(prepared, payload)
+            timings["hash"] = _elapsed_ms(stage)
+
+            if run["image_hash"] is None:
+                run["cache_info"] = {"status": "skipped"}
+            elif not use_cache:
+                detection_cache.record_bypass()
+                run["cache_info"] = {"status": "bypass"}
+            else:
+                with tracing.span("detection_cache") as span:
+                    cached, distance = detection_cache.get(run["image_hash"], original_size)
+                    span.set(hit=cached is not None, distance=distance)
+                if cached is not None:
+                    cached["cache"] = {"status": "hit" if distance == 0 else "near_hit", "distance": distance}
+                    if prepared is not None:
+                        cached["preprocessing"] = prepared.report()
+                    timings["total"] = _elapsed_ms(started)
+                    cached["timings_ms"] = timings
+                    run["cached"] = cached
+                    return run
+                run["cache_info"] = {"status": "miss"}
+
+        if prepared is not None:
+            original_size = prepared.original_size
+        elif original_size is None:
+            original_size = DetectionPipeline._image_size(payload)
+        run["original_size"] = original_size
+        run["tiled"] = Config.DETECT_TILING_ENABLED and TiledDetector.applies(original_size)
+        return run
+
+    @staticmethod
+    def _detect_tiled(run, filename):
+        # Tiles are cut from the full-resolution original, not the downsized copy
+        prepared = run["prepared"]
+        try:
+            return TiledDetector.detect(prepared.source if prepared is not None else run["payload"], filename)
+        except Exception as e:
+            return {"error": str(e), "predictions": [], "image": {"width": 0, "height": 0}}
+
+    @staticmethod
+    def _finish(run, raw_result):
+        """Format raw detector output, cache it and attach the reports"""
+        prepared, timings = run["prepared"], run["timings"]
+
+        stage = time.perf_counter()
+        if run["tiled"]:
+            result = RoboflowService.format_detection_results(raw_result)
+            result["tiling"] = {"tiles": raw_result.get("tiles", [])}
+        elif prepared is not None and prepared.original_size:
+            result = RoboflowService.format_detection_results(
+                raw_result, scale=prepared.scale, original_size=prepared.original_size
+            )
+        else:
+            result = RoboflowService.format_detection_results(raw_result)
+        timings["format"] = _elapsed_ms(stage)
+
+        if run["image_hash"] is not None and 'error' not in result:
+            detection_cache.set(run["image_hash"], result, run["original_size"])
+
+        result["cache"] = run["cache_info"]
+        if prepared is not None:
+            result["preprocessing"] = prepared.report()
+        timings["total"] = _elapsed_ms(run["started"])
+        result["timings_ms"] = timings
+        return result
+
+    @staticmethod
+    def detect_many(uploads, use_cache=True, item_timeout=None):
+        """
+        Detect on many uploads on the shared "detection" pool, yielding one
+        result per upload in input order. uploads are dicts with filename,
+        stream, content_type and size (and error for rejected files).
+
+        Each image gets item_timeout seconds from when a worker picks it up;
+        failures and timeouts are reported per image. Work only starts once
+        its bytes fit in the worker's in-flight upload budget.
+        """
+        item_timeout = item_timeout or Config.DETECT_BATCH_ITEM_TIMEOUT
+        pool = WorkerPools.get("detection", Config.DETECT_BATCH_WORKERS)
+        batch_deadline = time.monotonic() + item_timeout * max(1, len(uploads))
+
+        def run(upload, started):
+            started["at"] = time.monotonic()
+            started["event"].set()
+            reserved = upload_budget.acquire(upload["size"], timeout=item_timeout)
+            if reserved is None:
+                raise TimeoutError("Upload memory budget exhausted")
+            try:
+                return DetectionPipeline.detect(
+                    upload["stream"], upload["filename"], upload["content_type"], use_cache=use_cache
+                )
+            finally:
+                upload_budget.release(reserved)
+
+        jobs = []
+        for upload in uploads:
+            if upload.get("error"):
+                jobs.append((upload, None, None))
+                continue
+            started = {"event": threading.Event(), "at": None}
+            jobs.append((upload, started, pool.submit(run, upload, started)))
+
+        for index, (upload, started, future) in enumerate(jobs):
+            item = {"index": index, "filename": upload["filename"]}
+            if future is None:
+                item.update({"success": False, "error": upload["error"]})
+                yield item
+                continue
+
+            try:
+                if not started["event"].wait(timeout=max(0.0, batch_deadline - time.monotonic())):
+                    raise FutureTimeoutError()
+                # The timeout starts when a worker picks the image up, not at submission
+                remaining = started["at"] + item_timeout - time.monotonic()
+                result = future.result(timeout=max(0.0, remaining))
+            except FutureTimeoutError:
+                item.update({"success": False, "error": "Detection timed out"})
+            except Exception as e:
+                item.update({"success": False, "error": str(e)})
+            else:
+                if "error" in result:
+                    result["success"] = False
+                item.update(result)
+            yield item
+
+    @staticmethod
+    def run_job(payload):
+        """Job queue handler for "detect" jobs; the image arrives as bytes"""
+        return DetectionPipeline.detect(
+            payload["image"],
+            filename=payload.get("filename") or "image.jpg",
+            content_type=payload.get("content_type"),
+            use_cache=payload.get("use_cache", True)
+        )
+
+    @staticmethod
+    def upload_stats():
+        return upload_budget.stats()
+
+    @staticmethod
+    def _image_size(data):
+        try:
+            return Image.open(io.BytesIO(data)).size
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            return None
+
+    @staticmethod
+    def _fingerprint(prepared, payload):
+        """dHash of the image sent for inference and its original size"""
+        if prepared is not None and prepared.image is not None:
+            return dhash(prepared.image), prepared.original_size
+        try:
+            img = Image.open(io.BytesIO(payload))
+            size = img.size
+            img.draft("L", (64, 64))
+            return dhash(img), size
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            return None, None
+
+    @staticmethod
+    def cache_stats():
+        """Hit/near-hit/miss counters of the perceptual-hash detection cache"""
+        return detection_cache.stats()
+
+
+register_handler("detect", DetectionPipeline.run_job)
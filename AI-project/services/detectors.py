@@ -0,0 +1,400 @@
+"""
+Interchangeable food detection backends. Every backend returns the Roboflow
+hosted API response shape ({"predictions": [...], "image": {...}}), so
+RoboflowService.format_detection_results works with all of them.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config.settings import Config
+from services import tracing
+from services.async_http_client import AsyncHttpClient
+from services.http_client import HttpClient
+
+
+def _read_bytes(image):
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    return image.read()
+
+
+class BaseDetector:
+    """Detect foods in raw image bytes or a binary stream"""
+
+    name = 'base'
+
+    def detect(self, image, filename="image.jpg", content_type=None):
+        raise NotImplementedError
+
+    async def detect_async(self, image, filename="image.jpg", content_type=None):
+        """Awaitable detect(); backends without async I/O run detect() in a thread"""
+        return await asyncio.to_thread(self.detect, image, filename, content_type)
+
+    def warm_up(self):
+        """Load models or open connections before the first request"""
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class RoboflowHostedDetector(BaseDetector):
+    """The Roboflow serverless inference API"""
+
+    name = 'roboflow'
+
+    @tracing.traced("roboflow")
+    def detect(self, image, filename="image.jpg", content_type=None):
+        stream = io.BytesIO(image) if isinstance(image, (bytes, bytearray, memoryview)) else image
+        response = HttpClient.post(
+            self._endpoint(), files={"file": (filename, stream, content_type or "application/octet-stream")},
+            idempotent=True  # inference has no side effects, so a 5xx can be retried
+        )
+        return self._parse(response)
+
+    @tracing.traced("roboflow")
+    async def detect_async(self, image, filename="image.jpg", content_type=None):
+        stream = io.BytesIO(image) if isinstance(image, (bytes, bytearray, memoryview)) else image
+        response = await AsyncHttpClient.post(
+            self._endpoint(), files={"file": (filename, stream, content_type or "application/octet-stream")},
+            idempotent=True
+        )
+        return self._parse(response)
+
+    @staticmethod
+    def _endpoint():
+        api_key = os.getenv("ROBOFLOW_API_KEY")
+        model_id = os.getenv("ROBOFLOW_MODEL_ID")
+        version = os.getenv("ROBOFLOW_VERSION")
+
+        if not all([api_key, model_id, version]):
+            raise ValueError("Missing Roboflow API configuration. Check your .env file.")
+
+        return f"{Config.ROBOFLOW_BASE_URL.rstrip('/')}/{model_id}/{version}?api_key={api_key}"
+
+    @staticmethod
+    def _parse(response):
+        tracing.current_span().set(status=response.status_code)
+        if response.status_code != 200:
+            return {
+                "error": f"Roboflow API Error {response.status_code}: {response.text}",
+                "predictions": [],
+                "image": {"width": 0, "height": 0}
+            }
+
+        result = response.json()
+        if "predictions" not in result:
+            result["predictions"] = []
+        return result
+
+
+class _PendingImage:
+    __slots__ = ('image', 'done', 'result', 'error')
+
+    def __init__(self, image):
+        self.image = image
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LocalOnnxDetector(BaseDetector):
+    """
+    Runs an exported YOLO ONNX model (same classes as the hosted model) on the
+    CPU with OpenCV DNN.
+
+    The network is loaded once per worker process and owned by a single
+    inference thread. Request threads queue decoded images; the inference
+    thread takes up to batch_size of them (waiting at most batch_wait_ms for
+    more to arrive) and runs them as one blob. Models exported with a fixed
+    batch dimension fall back to one forward pass per image.
+    """
+
+    name = 'local'
+    PAD_VALUE = 114
+
+    def __init__(self, model_path, class_names, input_size=640, confidence=0.4,
+                 iou_threshold=0.45, batch_size=4, batch_wait_ms=5, threads=0):
+        self.model_path = model_path
+        self.class_names = list(class_names)
+        self.input_size = input_size
+        self.confidence = confidence
+        self.iou_threshold = iou_threshold
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait_ms / 1000)
+        self.threads = threads
+
+        self._net = None
+        self._batching = self.batch_size > 1
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {'images': 0, 'batches': 0, 'largest_batch': 0, 'inference_ms': 0.0, 'load_ms': None}
+        self._worker = threading.Thread(target=self._run, name='onnx-inference', daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            Config.LOCAL_MODEL_PATH,
+            cls.load_class_names(Config.LOCAL_MODEL_CLASSES_PATH),
+            input_size=Config.LOCAL_MODEL_INPUT_SIZE,
+            confidence=Config.LOCAL_MODEL_CONFIDENCE,
+            iou_threshold=Config.LOCAL_MODEL_IOU,
+            batch_size=Config.LOCAL_MODEL_BATCH_SIZE,
+            batch_wait_ms=Config.LOCAL_MODEL_BATCH_WAIT_MS,
+            threads=Config.LOCAL_MODEL_THREADS
+        )
+
+    @staticmethod
+    def load_class_names(path):
+        """One class name per line, in model output order"""
+        with open(path, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def detect(self, image, filename="image.jpg", content_type=None):
+        data = np.frombuffer(_read_bytes(image), dtype=np.uint8)
+        decoded = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if decoded is None:
+            raise ValueError("Could not decode image")
+        return self.detect_array(decoded)
+
+    def warm_up(self):
+        self.detect_array(np.full((self.input_size, self.input_size, 3), self.PAD_VALUE, dtype=np.uint8))
+
+    def detect_array(self, decoded):
+        """Detect on an already decoded BGR image"""
+        pending = _PendingImage(decoded)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['backend'] = self.name
+        stats['batching'] = self._batching
+        stats['queued'] = self._queue.qsize()
+        stats['avg_batch_size'] = round(stats['images'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['inference_ms'] = round(stats['inference_ms'], 2)
+        return stats
+
+    def _load(self):
+        # Only the inference thread touches the network
+        if self._net is None:
+            started = time.perf_counter()
+            if self.threads > 0:
+                cv2.setNumThreads(self.threads)
+            net = cv2.dnn.readNetFromONNX(self.model_path)
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            self._net = net
+            with self._stats_lock:
+                self._stats['load_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return self._net
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self._infer([pending.image for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _infer(self, images):
+        net = self._load()
+        started = time.perf_counter()
+        letterboxed, transforms = zip(*(self._letterbox(image) for image in images))
+
+        outputs = None
+        if self._batching and len(images) > 1:
+            try:
+                net.setInput(cv2.dnn.blobFromImages(
+                    list(letterboxed), 1 / 255.0, (self.input_size, self.input_size), swapRB=True
+                ))
+                outputs = list(net.forward())
+            except cv2.error:
+                # Fixed batch dimension in the exported graph
+                self._batching = False
+        if outputs is None:
+            outputs = []
+            for image in letterboxed:
+                net.setInput(cv2.dnn.blobFromImage(
+                    image, 1 / 255.0, (self.input_size, self.input_size), swapRB=True
+                ))
+                outputs.append(net.forward()[0])
+
+        results = [
+            self._decode(output, transform, image.shape)
+            for output, transform, image in zip(outputs, transforms, images)
+        ]
+        with self._stats_lock:
+            self._stats['images'] += len(images)
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(images))
+            self._stats['inference_ms'] += (time.perf_counter() - started) * 1000
+        return results
+
+    def _letterbox(self, image):
+        """Resize keeping aspect ratio and pad to a square model input"""
+        height, width = image.shape[:2]
+        ratio = min(self.input_size / height, self.input_size / width)
+        new_width, new_height = round(width * ratio), round(height * ratio)
+        pad_x = (self.input_size - new_width) / 2
+        pad_y = (self.input_size - new_height) / 2
+        resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+        top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+        bottom, right = self.input_size - new_height - top, self.input_size - new_width - left
+        padded = cv2.copyMakeBorder(
+            resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(self.PAD_VALUE,) * 3
+        )
+        return padded, (ratio, left, top)
+
+    def _decode(self, output, transform, shape):
+        """
+        YOLOv8-style (4 + classes, anchors) or YOLOv5-style (anchors, 5 + classes)
+        output to Roboflow predictions in original image pixels
+        """
+        num_classes = len(self.class_names)
+        output = np.squeeze(output)
+        if output.ndim == 2 and output.shape[0] == 4 + num_classes:
+            rows = output.T
+            boxes, class_scores = rows[:, :4], rows[:, 4:]
+        elif output.ndim == 2 and output.shape[1] == 5 + num_classes:
+            boxes, class_scores = output[:, :4], output[:, 5:] * output[:, 4:5]
+        else:
+            raise ValueError(f"Unexpected model output shape {output.shape} for {num_classes} classes")
+
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = scores >= self.confidence
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+        ratio, left, top = transform
+        height, width = shape[:2]
+        center_x = (boxes[:, 0] - left) / ratio
+        center_y = (boxes[:, 1] - top) / ratio
+        box_w = boxes[:, 2] / ratio
+        box_h = boxes[:, 3] / ratio
+
+        predictions = []
+        if len(scores):
+            rects = np.stack([center_x - box_w / 2, center_y - box_h / 2, box_w, box_h], axis=1)
+            indices = cv2.dnn.NMSBoxesBatched(
+                rects.tolist(), scores.tolist(), class_ids.tolist(), self.confidence, self.iou_threshold
+            )
+            for i in np.array(indices).flatten():
+                class_id = int(class_ids[i])
+                predictions.append({
+                    "x": round(float(center_x[i]), 1),
+                    "y": round(float(center_y[i]), 1),
+                    "width": round(float(box_w[i]), 1),
+                    "height": round(float(box_h[i]), 1),
+                    "confidence": round(float(scores[i]), 4),
+                    "class": self.class_names[class_id],
+                    "class_id": class_id
+                })
+
+        return {"predictions": predictions, "image": {"width": width, "height": height}}
+
+
+class FakeDetector(BaseDetector):
+    """
+    Deterministic detections derived from a hash of the image bytes: the same
+    image always yields the same predictions. For tests and benchmarks.
+    """
+
+    name = 'fake'
+    CLASSES = ('apple', 'banana', 'broccoli', 'rice', 'chicken breast', 'salad')
+
+    def __init__(self, latency_ms=0, classes=None):
+        self.latency = latency_ms / 1000
+        self.classes = tuple(classes or self.CLASSES)
+
+    def detect(self, image, filename="image.jpg", content_type=None):
+        data = _read_bytes(image)
+        if self.latency:
+            time.sleep(self.latency)
+
+        width, height = 640, 480
+        try:
+            from PIL import Image
+            width, height = Image.open(io.BytesIO(data)).size
+        except Exception:
+            pass
+
+        digest = hashlib.sha256(data).digest()
+        predictions = []
+        for i in range(1 + digest[0] % 3):
+            values = digest[1 + i * 5: 6 + i * 5]
+            box_w = width * (0.1 + values[2] / 255 * 0.3)
+            box_h = height * (0.1 + values[3] / 255 * 0.3)
+            predictions.append({
+                "x": round(box_w / 2 + (width - box_w) * values[0] / 255, 1),
+                "y": round(box_h / 2 + (height - box_h) * values[1] / 255, 1),
+                "width": round(box_w, 1),
+                "height": round(box_h, 1),
+                "confidence": round(0.5 + values[4] / 255 * 0.49, 4),
+                "class": self.classes[values[4] % len(self.classes)]
+            })
+        return {"predictions": predictions, "image": {"width": width, "height": height}}
+
+
+_detector = None
+_detector_pid = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """The DETECTOR_BACKEND detector for this worker process, created on first use"""
+    global _detector, _detector_pid
+    with _detector_lock:
+        if _detector is None or _detector_pid != os.getpid():
+            backend = Config.DETECTOR_BACKEND
+            if backend == 'local':
+                _detector = LocalOnnxDetector.from_config()
+            elif backend == 'fake':
+                _detector = FakeDetector(latency_ms=Config.FAKE_DETECTOR_LATENCY_MS)
+            elif backend == 'roboflow':
+                _detector = RoboflowHostedDetector()
+            else:
+                raise ValueError(f"Unknown DETECTOR_BACKEND: {backend}")
+            _detector_pid = os.getpid()
+        return _detector
+
+
+def reset_detector():
+    """Forget this process's detector, e.g. in a post-fork hook"""
+    global _detector, _detector_pid
+    with _detector_lock:
+        _detector = None
+        _detector_pid = None
@@ -0,0 +1,270 @@
+"""
+Local FoodData Central store: a compact SQLite copy of the FDC bulk download
+that answers searches and detail lookups without calling the USDA API
+"""
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# FDC nutrient name -> field used throughout the app
+NUTRIENT_FIELDS = {
+    "Energy": "calories",
+    "Protein": "protein",
+    "Total lipid (fat)": "fat",
+    "Carbohydrate, by difference": "carbs",
+    "Fiber, total dietary": "fiber",
+    "Sugars, total including NLEA": "sugar",
+    "Sodium, Na": "sodium",
+}
+FIELDS = ["calories", "protein", "fat", "carbs", "fiber", "sugar", "sodium"]
+
+# dataType labels used by the API vs. the data_type column of the CSV download
+CSV_DATA_TYPES = {
+    "foundation_food": "Foundation",
+    "sr_legacy_food": "SR Legacy",
+}
+# Top-level keys of the JSON downloads
+JSON_FOOD_KEYS = ["FoundationFoods", "SRLegacyFoods"]
+
+
+class FDCStore:
+    """Read side of the local store; one SQLite connection per thread"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @classmethod
+    def open(cls, path):
+        """Shared store instance for path"""
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(
+                        f"Local FDC store not found at {path}; run scripts/import_fdc.py first"
+                    )
+                store = cls(path)
+                cls._instances[path] = store
+            return store
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _match_expression(query, operator):
+        tokens = "".join(ch if ch.isalnum() else " " for ch in str(query).lower()).split()
+        return f" {operator} ".join(f'"{token}"' for token in tokens)
+
+    def search(self, query, limit=10, data_types=None):
+        """Same shape as USDAService.search_foods"""
+        data_types = data_types or list(CSV_DATA_TYPES.values())
+        type_filter = ",".join("?" for _ in data_types)
+        conn = self._connection()
+
+        rows = []
+        total = 0
+        # Prefer foods that contain every word, like the API's ranking does
+        for operator in ("AND", "OR"):
+            expression = self._match_expression(query, operator)
+            if not expression:
+                break
+            where = f"foods_fts MATCH ? AND f.data_type IN ({type_filter})"
+            params = [expression, *data_types]
+            total = conn.execute(
+                "SELECT COUNT(*) FROM foods_fts JOIN foods f ON f.fdc_id = foods_fts.rowid"
+                f" WHERE {where}",
+                params
+            ).fetchone()[0]
+            if total:
+                rows = conn.execute(
+                    "SELECT f.fdc_id, f.description, f.data_type"
+                    " FROM foods_fts JOIN foods f ON f.fdc_id = foods_fts.rowid"
+                    f" WHERE {where} ORDER BY bm25(foods_fts), f.fdc_id LIMIT ?",
+                    [*params, int(limit)]
+                ).fetchall()
+                break
+
+        return {
+            "foods": [
+                {"fdc_id": fdc_id, "description": description, "data_type": data_type}
+                for fdc_id, description, data_type in rows
+            ],
+            "total_hits": total
+        }
+
+    def get_food(self, fdc_id):
+        """Same shape as USDAService.get_food_by_fdc_id, or None if unknown"""
+        foods = self.get_foods([fdc_id])
+        return foods.get(fdc_id)
+
+    def get_foods(self, fdc_ids):
+        """Details for many ids, keyed by the ids as passed in"""
+        requested = {}
+        for fdc_id in fdc_ids:
+            try:
+                requested[int(fdc_id)] = fdc_id
+            except (TypeError, ValueError):
+                continue
+        if not requested:
+            return {}
+
+        placeholders = ",".join("?" for _ in requested)
+        rows = self._connection().execute(
+            f"SELECT fdc_id, description, {', '.join(FIELDS)} FROM foods"
+            f" WHERE fdc_id IN ({placeholders})",
+            list(requested)
+        ).fetchall()
+
+        results = {}
+        for row in rows:
+            fdc_id = requested[row[0]]
+            results[fdc_id] = {
+                "fdc_id": fdc_id,
+                "description": row[1],
+                "nutrients": {
+                    field: value for field, value in zip(FIELDS, row[2:]) if value is not None
+                },
+                "serving_size": 100,
+                "serving_unit": "g"
+            }
+        return results
+
+    def iter_foods(self):
+        """(fdc_id, description, data_type) for every food, in id order"""
+        return self._connection().execute(
+            "SELECT fdc_id, description, data_type FROM foods ORDER BY fdc_id"
+        )
+
+    def metadata(self):
+        return dict(self._connection().execute("SELECT key, value FROM meta").fetchall())
+
+
+class FDCImporter:
+    """Loads Foundation / SR Legacy bulk downloads into a store file"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        nutrient_columns = ", ".join(f"{field} REAL" for field in FIELDS)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS foods ("
+            " fdc_id INTEGER PRIMARY KEY,"
+            " description TEXT NOT NULL,"
+            " data_type TEXT NOT NULL,"
+            f" {nutrient_columns});"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5("
+            " description, content='foods', content_rowid='fdc_id',"
+            " tokenize='porter unicode61');"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self.sources = []
+
+    def import_path(self, source):
+        """Import a JSON download file or a directory of CSV files"""
+        if os.path.isdir(source):
+            count = self.import_csv(source)
+        else:
+            count = self.import_json(source)
+        self.sources.append(os.path.basename(os.path.normpath(source)))
+        return count
+
+    def import_json(self, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        rows = []
+        for key in JSON_FOOD_KEYS:
+            for food in data.get(key, []):
+                values = dict.fromkeys(FIELDS)
+                for entry in food.get("foodNutrients", []):
+                    nutrient = entry.get("nutrient", {})
+                    field = NUTRIENT_FIELDS.get(nutrient.get("name", ""))
+                    if field is None or "amount" not in entry:
+                        continue
+                    if field == "calories" and nutrient.get("unitName", "").lower() == "kj":
+                        continue
+                    values[field] = entry["amount"]
+                rows.append(self._row(
+                    food["fdcId"], food.get("description", ""), food.get("dataType", ""), values
+                ))
+        self._write(rows)
+        return len(rows)
+
+    def import_csv(self, directory):
+        def reader(name):
+            with open(os.path.join(directory, name), encoding="utf-8", newline="") as f:
+                yield from csv.DictReader(f)
+
+        wanted_nutrients = {}
+        for row in reader("nutrient.csv"):
+            field = NUTRIENT_FIELDS.get(row["name"])
+            if field is None:
+                continue
+            if field == "calories" and row.get("unit_name", "").lower() == "kj":
+                continue
+            wanted_nutrients[row["id"]] = field
+
+        foods = {}
+        for row in reader("food.csv"):
+            data_type = CSV_DATA_TYPES.get(row["data_type"])
+            if data_type is None:
+                continue
+            foods[row["fdc_id"]] = (row["description"], data_type, dict.fromkeys(FIELDS))
+
+        for row in reader("food_nutrient.csv"):
+            food = foods.get(row["fdc_id"])
+            field = wanted_nutrients.get(row["nutrient_id"])
+            if food is None or field is None or row.get("amount") in (None, ""):
+                continue
+            food[2][field] = float(row["amount"])
+
+        rows = [
+            self._row(fdc_id, description, data_type, values)
+            for fdc_id, (description, data_type, values) in foods.items()
+        ]
+        self._write(rows)
+        return len(rows)
+
+    @staticmethod
+    def _row(fdc_id, description, data_type, values):
+        return (int(fdc_id), description, data_type, *(values[field] for field in FIELDS))
+
+    def _write(self, rows):
+        placeholders = ",".join("?" for _ in range(3 + len(FIELDS)))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO foods VALUES ({placeholders})", rows
+            )
+
+    def finish(self):
+        """Rebuild the full-text index, record metadata and compact the file"""
+        with self.conn:
+            self.conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('rebuild')")
+            count = self.conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+            meta = {
+                "imported_at": str(int(time.time())),
+                "sources": ",".join(self.sources),
+                "food_count": str(count),
+            }
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items()
+            )
+        self.conn.execute("VACUUM")
+        self.conn.close()
+        return count
@@ -0,0 +1,92 @@
+"""
+Food category classifier compiled once from data/food_categories.json into a
+single regular expression
+"""
+import json
+import re
+
+
+class FoodClassifier:
+    """
+    Returns the first category (in file order) that has a keyword occurring
+    anywhere in the food name, the same rule as the old nested keyword loop.
+
+    All keywords are compiled into one prefix-tree regex wrapped in a
+    lookahead, so a single finditer pass reports the longest keyword starting
+    at every position. Any shorter keyword matching at the same position is a
+    prefix of it, so each keyword carries the best category among itself and
+    its keyword prefixes.
+    """
+
+    UNKNOWN = 'unknown'
+
+    def __init__(self, categories, strategies=None):
+        self.categories = list(categories)
+        self.keywords = {category: list(categories[category]) for category in self.categories}
+        self.strategies = strategies or {}
+
+        first_category = {}
+        for index, category in enumerate(self.categories):
+            for keyword in categories[category]:
+                keyword = keyword.lower()
+                if keyword and keyword not in first_category:
+                    first_category[keyword] = index
+
+        self._keyword_rank = {
+            keyword: min(
+                rank for prefix, rank in first_category.items() if keyword.startswith(prefix)
+            )
+            for keyword in first_category
+        }
+        self._pattern = re.compile(
+            f"(?=({self._trie_pattern(first_category)}))"
+        ) if first_category else None
+
+    @classmethod
+    def load(cls, path):
+        """Build a classifier from a JSON file with categories and strategies"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['categories'], data.get('strategies'))
+
+    @staticmethod
+    def _trie_pattern(keywords):
+        """Regex for a keyword prefix tree; longer keywords are tried first"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        def build(node):
+            branches = [re.escape(char) + build(child)
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            if '' in node:
+                body = f"(?:{body})?"
+            return body
+
+        return build(trie)
+
+    def classify(self, food_name):
+        if self._pattern is None:
+            return self.UNKNOWN
+
+        best = None
+        for match in self._pattern.finditer(str(food_name).lower()):
+            rank = self._keyword_rank[match.group(1)]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return self.categories[best] if best is not None else self.UNKNOWN
+
+    def classify_many(self, food_names):
+        return [self.classify(name) for name in food_names]
+
+    def strategy(self, category):
+        """Matching strategy for a category, falling back to 'unknown'"""
+        return self.strategies.get(category, self.strategies.get(self.UNKNOWN, {}))
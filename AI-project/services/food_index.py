@@ -0,0 +1,177 @@
+"""
+Inverted BM25 index over food descriptions, used to pick the best FDC match
+for a detected food name
+"""
+import heapq
+import math
+import re
+import threading
+
+from services.food_names import singularize
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {"a", "an", "and", "or", "of", "the", "with", "without", "in", "for", "to", "from"}
+
+
+def stem(token):
+    return token if token.isdigit() else singularize(token)
+
+
+def tokenize(text):
+    return [stem(token) for token in TOKEN_RE.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def keyword_terms(keywords):
+    """Stemmed term tuples for a list of (possibly multi-word) keywords"""
+    terms = []
+    for keyword in keywords:
+        tokens = tuple(tokenize(keyword))
+        if tokens:
+            terms.append(tokens)
+    return terms
+
+
+class FoodIndex:
+    """
+    BM25 over tokenized, stemmed descriptions. Category priority/exclude
+    keywords and the Foundation/SR Legacy preference from the matching
+    strategy are applied as query-time weights (the old linear scorer's points
+    divided by 10). Word coverage weighs more than any keyword boost, so a
+    food containing every word of the name outranks partial matches.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    COVERAGE_WEIGHT = 3.0       # times the share of query words found
+    PHRASE_WEIGHT = 1.0         # whole name appears verbatim (old: +20 total)
+    RELEVANCE_WEIGHT = 1.0      # BM25 relative to the best candidate
+    PRIORITY_WEIGHT = 0.5       # per priority keyword (old: +5)
+    EXCLUDE_WEIGHT = -1.0       # per exclude keyword not in the query (old: -10)
+    FOUNDATION_WEIGHT = 0.3     # old: +3
+    LEGACY_WEIGHT = 0.2         # old: +2
+    FRESH_BABYFOOD_WEIGHT = -1.5
+    FRESH_BAKERY_WEIGHT = -1.2
+    MIN_SCORE = 0.5             # old: score > 5
+
+    FRESH_TYPES = ("fresh_fruits", "fresh_vegetables")
+
+    _store_indexes = {}
+    _store_lock = threading.Lock()
+
+    def __init__(self, foods):
+        self.foods = []
+        self.descriptions = []
+        self.doc_terms = []
+        self.doc_lengths = []
+        self.postings = {}
+
+        for doc_id, food in enumerate(foods):
+            description = food.get("description", "")
+            tokens = tokenize(description)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, tf))
+
+            self.foods.append(food)
+            self.descriptions.append(description.lower())
+            self.doc_terms.append(frozenset(counts))
+            self.doc_lengths.append(len(tokens))
+
+        total = len(self.foods)
+        self.avg_length = (sum(self.doc_lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.foods)
+
+    @classmethod
+    def from_foods(cls, foods):
+        """Small throwaway index over a list of search results"""
+        return cls(foods)
+
+    @classmethod
+    def for_store(cls, store):
+        """Process-wide index over every food in a local FDC store"""
+        with cls._store_lock:
+            index = cls._store_indexes.get(store.path)
+            if index is None:
+                foods = [
+                    {"fdc_id": fdc_id, "description": description, "data_type": data_type}
+                    for fdc_id, description, data_type in store.iter_foods()
+                ]
+                index = cls(foods)
+                cls._store_indexes[store.path] = index
+            return index
+
+    def search(self, food_name, strategy=None, food_type=None, top_k=5):
+        """
+        Top-k (score, food) pairs for food_name, best first.
+        Only foods sharing at least one word with the name are candidates.
+        """
+        query_terms = list(dict.fromkeys(tokenize(food_name)))
+        if not query_terms or not self.foods:
+            return []
+
+        bm25 = {}
+        for term in query_terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs:
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[doc_id] / self.avg_length)
+                bm25[doc_id] = bm25.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        if not bm25:
+            return []
+
+        strategy = strategy or {}
+        query_set = set(query_terms)
+        phrase = " ".join(str(food_name).lower().split())
+        priority = keyword_terms(strategy.get("priority_keywords", []))
+        exclude = [
+            terms for terms in keyword_terms(strategy.get("exclude_keywords", []))
+            if not query_set.issuperset(terms)
+        ]
+        prefer_foundation = strategy.get("prefer_foundation", True)
+        fresh = food_type in self.FRESH_TYPES
+        best_bm25 = max(bm25.values())
+
+        scored = []
+        for doc_id, relevance in bm25.items():
+            terms = self.doc_terms[doc_id]
+            food = self.foods[doc_id]
+
+            score = self.COVERAGE_WEIGHT * len(query_set & terms) / len(query_set)
+            score += self.RELEVANCE_WEIGHT * relevance / best_bm25
+            if phrase in self.descriptions[doc_id]:
+                score += self.PHRASE_WEIGHT
+
+            for keyword in priority:
+                if terms.issuperset(keyword):
+                    score += self.PRIORITY_WEIGHT
+            for keyword in exclude:
+                if terms.issuperset(keyword):
+                    score += self.EXCLUDE_WEIGHT
+
+            data_type = food.get("data_type")
+            if prefer_foundation and data_type == "Foundation":
+                score += self.FOUNDATION_WEIGHT
+            elif not prefer_foundation and data_type == "SR Legacy":
+                score += self.LEGACY_WEIGHT
+
+            if fresh:
+                if "babyfood" in terms and "babyfood" not in query_set:
+                    score += self.FRESH_BABYFOOD_WEIGHT
+                if (terms & {"pie", "strudel", "croissant"}) - query_set:
+                    score += self.FRESH_BAKERY_WEIGHT
+
+            scored.append((score, -doc_id))
+
+        top = heapq.nlargest(top_k, scored)
+        return [(round(score, 4), self.foods[-neg_id]) for score, neg_id in top]
@@ -0,0 +1,31 @@
+"""
+Food name normalization shared by lookups, caches and request de-duplication
+"""
+import re
+
+_SEPARATORS_RE = re.compile(r"[_\-/]+")
+_STRIP_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_food_name(food_name):
+    """
+    Canonical spelling of a food or class label: lowercase, separators to
+    spaces, punctuation dropped, whitespace collapsed ("French_Fries " -> "french fries")
+    """
+    name = _SEPARATORS_RE.sub(" ", str(food_name).lower())
+    return " ".join(_STRIP_RE.sub("", name).split())
+
+
+def singularize(word):
+    """berries -> berry, tomatoes -> tomato, peaches -> peach, apples -> apple"""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("sses", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
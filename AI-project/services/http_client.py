@@ -0,0 +1,218 @@
+"""
+Shared per-process HTTP client for upstream APIs (USDA, Roboflow):
+keep-alive connection pools, timeouts and jittered retries
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import Config
+from services import tracing
+from services.metrics import observe_upstream
+
+
+class HttpClient:
+    """Process-wide requests.Session wrapper used by every service"""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # 5xx is only retried for these unless the caller says the request is safe to repeat
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+    _session = None
+    _pid = None
+    _lock = threading.Lock()
+    _stats = {
+        'requests': 0,
+        'retries': 0,
+        'retry_after_waits': 0,
+        'connection_errors': 0,
+        'timeouts': 0,
+    }
+
+    @classmethod
+    def session(cls):
+        """Return this process's session, creating a fresh one after a fork"""
+        session = cls._session
+        if session is not None and cls._pid == os.getpid():
+            return session
+
+        with cls._lock:
+            if cls._session is None or cls._pid != os.getpid():
+                cls._session = cls._build_session()
+                cls._pid = os.getpid()
+            return cls._session
+
+    @classmethod
+    def reset(cls):
+        """Drop pooled connections, e.g. in a post-fork hook"""
+        with cls._lock:
+            if cls._session is not None and cls._pid == os.getpid():
+                cls._session.close()
+            cls._session = None
+            cls._pid = None
+            for key in cls._stats:
+                cls._stats[key] = 0
+
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        # Retries are handled in request() so Retry-After and jitter apply
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+            max_retries=0
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def get(cls, url, **kwargs):
+        return cls.request('GET', url, **kwargs)
+
+    @classmethod
+    def post(cls, url, **kwargs):
+        return cls.request('POST', url, **kwargs)
+
+    @classmethod
+    def request(cls, method, url, timeout=None, max_retries=None, idempotent=None, **kwargs):
+        """
+        Send a request on the pooled session.
+        429 responses and connection failures are retried with jittered
+        exponential backoff; a Retry-After header takes precedence. 5xx is
+        retried only for idempotent requests: idempotent defaults to the
+        method being one of IDEMPOTENT_METHODS, and callers pass True for a
+        POST that only reads. Read timeouts are not retried since the
+        upstream may have acted.
+        """
+        if timeout is None:
+            timeout = (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        if max_retries is None:
+            max_retries = Config.HTTP_MAX_RETRIES
+
+        attempt = 0
+        while True:
+            cls._rewind_files(kwargs.get('files'))
+            cls._count('requests')
+            started = time.perf_counter()
+            try:
+                response = cls.session().request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.ReadTimeout:
+                cls._count('timeouts')
+                cls._observe(url, 'timeout', started, attempt)
+                raise
+            except requests.exceptions.ConnectionError:
+                # Includes connect timeouts
+                cls._count('connection_errors')
+                cls._observe(url, 'connection_error', started, attempt)
+                if attempt >= max_retries:
+                    raise
+                delay = cls._backoff(attempt)
+            else:
+                cls._observe(url, response.status_code, started, attempt)
+                if not cls._retryable(method, response.status_code, idempotent) or attempt >= max_retries:
+                    return response
+                delay = cls._retry_after(response)
+                if delay is None:
+                    delay = cls._backoff(attempt)
+                elif delay > Config.HTTP_RETRY_AFTER_MAX:
+                    # Upstream asked us to wait longer than we are willing to
+                    return response
+                else:
+                    cls._count('retry_after_waits')
+                response.close()
+
+            cls._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    @classmethod
+    def _retryable(cls, method, status, idempotent):
+        """A 429 was not processed; a 5xx may have been, so only repeat safe requests"""
+        if status not in cls.RETRY_STATUSES:
+            return False
+        if idempotent is None:
+            idempotent = method.upper() in cls.IDEMPOTENT_METHODS
+        return status == 429 or idempotent
+
+    @staticmethod
+    def _observe(url, status, started, attempt):
+        """Record one attempt in the metrics and as an "http" span of the request trace"""
+        observe_upstream(url, status, time.perf_counter() - started)
+        parts = urlsplit(url)
+        tracing.record_span("http", started, host=parts.hostname, path=parts.path,
+                            status=status, attempt=attempt)
+
+    @staticmethod
+    def _backoff(attempt):
+        """Full-jitter exponential backoff"""
+        ceiling = min(Config.HTTP_BACKOFF_MAX, Config.HTTP_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds to wait from a Retry-After header, or None"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _rewind_files(files):
+        """Seek file-like upload bodies back to the start before each attempt"""
+        if not files:
+            return
+        for value in files.values():
+            if isinstance(value, tuple):
+                value = value[1]
+            if hasattr(value, 'seek'):
+                value.seek(0)
+
+    @classmethod
+    def _count(cls, key, amount=1):
+        with cls._lock:
+            cls._stats[key] += amount
+
+    @classmethod
+    def stats(cls):
+        """Retry counters plus per-host pool reuse for this worker process"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            session = cls._session if cls._pid == os.getpid() else None
+
+        pools = []
+        if session is not None:
+            seen = set()
+            for adapter in session.adapters.values():
+                if id(adapter) in seen:
+                    continue
+                seen.add(id(adapter))
+                manager = adapter.poolmanager
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    opened = pool.num_connections
+                    sent = pool.num_requests
+                    pools.append({
+                        'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                        'connections_opened': opened,
+                        'requests': sent,
+                        'reuse_ratio': round(1 - opened / sent, 4) if sent else 0.0,
+                    })
+
+        stats['pools'] = pools
+        stats['pool_maxsize'] = Config.HTTP_POOL_MAXSIZE
+        return stats
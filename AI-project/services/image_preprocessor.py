@@ -0,0 +1,115 @@
+"""
+Image preprocessing before inference: decode once, apply EXIF orientation,
+downsize to the model input size and re-encode as JPEG
+"""
+import io
+import time
+
+from PIL import Image, ImageOps
+
+from services import tracing
+
+# EXIF orientations that rotate the image by 90 degrees (width and height swap)
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_EXIF_ORIENTATION = 0x0112
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class PreprocessedImage:
+    """Bytes to send for inference plus what is needed to map results back"""
+
+    def __init__(self, data, content_type, original_size, size, original_bytes, timings,
+                 processed=True, image=None, source=None):
+        self.data = data
+        self.content_type = content_type
+        self.original_size = original_size
+        self.size = size
+        self.original_bytes = original_bytes
+        self.timings = timings
+        self.processed = processed
+        # Decoded, resized image when one was produced (used for hashing)
+        self.image = image
+        # The original encoded bytes (needed for full-resolution tiling)
+        self.source = source if source is not None else data
+
+    @property
+    def scale(self):
+        """(x, y) factors from inference coordinates to original coordinates"""
+        if not self.size or not self.size[0] or not self.size[1]:
+            return 1.0, 1.0
+        return self.original_size[0] / self.size[0], self.original_size[1] / self.size[1]
+
+    def report(self):
+        return {
+            "processed": self.processed,
+            "original_bytes": self.original_bytes,
+            "sent_bytes": len(self.data),
+            "bytes_saved": self.original_bytes - len(self.data),
+            "original_size": list(self.original_size) if self.original_size else None,
+            "sent_size": list(self.size) if self.size else None,
+        }
+
+
+class ImagePreprocessor:
+
+    @staticmethod
+    def preprocess(image, max_side, quality, content_type=None):
+        """
+        Prepare raw bytes or a binary stream for inference. Images that are
+        already small, upright JPEGs are passed through untouched; anything
+        Pillow cannot decode is passed through as-is.
+        """
+        timings = {}
+        started = time.perf_counter()
+        data = image if isinstance(image, (bytes, bytearray)) else image.read()
+        data = bytes(data)
+        timings["read"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        try:
+            img = Image.open(io.BytesIO(data))
+            orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+            width, height = img.size
+            if orientation in _TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            original_size = (width, height)
+            needs_resize = max(original_size) > max_side
+
+            if not needs_resize and orientation == 1 and img.format == "JPEG":
+                timings["decode"] = _elapsed_ms(started)
+                return PreprocessedImage(data, "image/jpeg", original_size, original_size,
+                                         len(data), timings, processed=False)
+
+            # For JPEGs, let the decoder downscale by 1/2, 1/4 or 1/8 while
+            # decoding; the result is still at least max_side on its long edge
+            if needs_resize:
+                img.draft("RGB", (max_side, max_side))
+            img.load()
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+            tracing.warning("image preprocessing skipped", error=str(e))
+            timings["decode"] = _elapsed_ms(started)
+            return PreprocessedImage(data, content_type, None, None, len(data), timings, processed=False)
+        timings["decode"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        timings["orient"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        if needs_resize:
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        timings["resize"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        encoded = buffer.getvalue()
+        timings["encode"] = _elapsed_ms(started)
+
+        return PreprocessedImage(encoded, "image/jpeg", original_size, img.size, len(data), timings,
+                                 image=img, source=data)
@@ -0,0 +1,301 @@
+"""
+Background job queue for slow work (detection) so request threads return
+immediately with a job id
+"""
+import importlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+from config.settings import Config
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED = (DONE, FAILED)
+
+# kind -> callable(payload) returning a JSON-serializable result
+HANDLERS = {}
+
+
+def register_handler(kind, func):
+    HANDLERS[kind] = func
+
+
+def run_job(kind, payload):
+    """Execute one job; used by the in-process workers and by broker workers"""
+    handler = HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    return handler(payload)
+
+
+class QueueFullError(Exception):
+    """The queue is at JOB_QUEUE_MAX_DEPTH; the client should retry later"""
+
+
+class JobStore:
+    """
+    Job records (status, timestamps, result). With a path they live in a
+    SQLite file shared by every worker process, so a job can be polled
+    through whichever worker answers; without one they stay in memory.
+    """
+
+    def __init__(self, path=None, ttl=3600):
+        self.path = path or None
+        self.ttl = ttl
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " record TEXT NOT NULL,"
+            " updated_at REAL NOT NULL"
+            ")"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def put(self, record):
+        if not self.path:
+            with self._lock:
+                self._memory[record['job_id']] = dict(record)
+            return
+        self._connection().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, record, updated_at) VALUES (?, ?, ?)",
+            (record['job_id'], json.dumps(record, separators=(',', ':')), time.time())
+        )
+
+    def get(self, job_id):
+        if not self.path:
+            with self._lock:
+                record = self._memory.get(job_id)
+                return dict(record) if record else None
+        row = self._connection().execute(
+            "SELECT record FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prune(self):
+        """Forget jobs not updated for ttl seconds"""
+        cutoff = time.time() - self.ttl
+        if not self.path:
+            with self._lock:
+                for job_id in [job_id for job_id, record in self._memory.items()
+                               if (record.get('finished_at') or record['submitted_at']) < cutoff]:
+                    del self._memory[job_id]
+            return
+        self._connection().execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+
+
+class JobBackend:
+    """
+    Interface for job queues. An external broker backend is selected with
+    JOB_BACKEND="package.module:ClassName"; the class is built with
+    from_config() when it defines one. Its consumers should execute jobs with
+    run_job(kind, payload) so the same handlers run everywhere.
+    """
+
+    def submit(self, kind, payload):
+        """Queue a job and return its id; raise QueueFullError when saturated"""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Job record dict, or None for unknown or expired ids"""
+        raise NotImplementedError
+
+    def wait(self, job_id, status, timeout):
+        """
+        Block until the job's status differs from status or timeout seconds
+        pass, then return the current record
+        """
+        deadline = time.monotonic() + timeout
+        record = self.get(job_id)
+        while record is not None and record['status'] == status and time.monotonic() < deadline:
+            time.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+            record = self.get(job_id)
+        return record
+
+    def stats(self):
+        return {}
+
+
+class InProcessJobBackend(JobBackend):
+    """
+    Bounded in-memory queue drained by daemon worker threads of this process.
+    Records go to a JobStore, so other workers can answer polls; execution
+    stays in the process that accepted the job.
+    """
+
+    # Wait times kept for the percentile metrics
+    WAIT_SAMPLES = 500
+
+    def __init__(self, workers=2, max_depth=100, store=None):
+        self.store = store or JobStore()
+        self._queue = queue.Queue(maxsize=max(1, max_depth))
+        self._changed = threading.Condition()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waits = deque(maxlen=self.WAIT_SAMPLES)
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._submissions = 0
+        self._threads = [
+            threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            workers=Config.JOB_WORKERS,
+            max_depth=Config.JOB_QUEUE_MAX_DEPTH,
+            store=JobStore(Config.JOB_DB_PATH, Config.JOB_RESULT_TTL)
+        )
+
+    def submit(self, kind, payload):
+        record = {
+            'job_id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': QUEUED,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'wait_ms': None,
+            'run_ms': None,
+            'result': None,
+            'error': None,
+        }
+        self.store.put(record)
+        try:
+            self._queue.put_nowait((record, payload))
+        except queue.Full:
+            record.update({'status': FAILED, 'error': 'Queue full', 'finished_at': time.time()})
+            self.store.put(record)
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise QueueFullError(f"Job queue is full ({self._queue.maxsize} jobs)")
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._submissions += 1
+            prune = self._submissions % 100 == 0
+        if prune:
+            self.store.prune()
+        return record['job_id']
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, status, timeout):
+        # Jobs running here wake us immediately; jobs run by another worker
+        # process are picked up by re-reading the store every 0.25s
+        deadline = time.monotonic() + timeout
+        record = self.get(job_id)
+        while record is not None and record['status'] == status:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._changed:
+                self._changed.wait(timeout=min(remaining, 0.25))
+            record = self.get(job_id)
+        return record
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['running'] = self._running
+            waits = sorted(self._waits)
+        stats['backend'] = 'inprocess'
+        stats['depth'] = self._queue.qsize()
+        stats['max_depth'] = self._queue.maxsize
+        stats['workers'] = len(self._threads)
+        if waits:
+            stats['wait_ms'] = {
+                'avg': round(sum(waits) / len(waits), 1),
+                'p50': waits[len(waits) // 2],
+                'p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+                'max': waits[-1],
+            }
+        return stats
+
+    def _update(self, record, **fields):
+        record.update(fields)
+        self.store.put(record)
+        with self._changed:
+            self._changed.notify_all()
+
+    def _work(self):
+        while True:
+            record, payload = self._queue.get()
+            started = time.time()
+            wait_ms = round((started - record['submitted_at']) * 1000, 1)
+            with self._lock:
+                self._running += 1
+                self._waits.append(wait_ms)
+            self._update(record, status=RUNNING, started_at=started, wait_ms=wait_ms)
+
+            try:
+                result = run_job(record['kind'], payload)
+                fields = {'status': DONE, 'result': result}
+                outcome = 'completed'
+            except Exception as e:
+                fields = {'status': FAILED, 'error': str(e)}
+                outcome = 'failed'
+
+            finished = time.time()
+            with self._lock:
+                self._running -= 1
+                self._stats[outcome] += 1
+            self._update(record, finished_at=finished,
+                         run_ms=round((finished - started) * 1000, 1), **fields)
+
+
+_backend = None
+_backend_pid = None
+_backend_lock = threading.Lock()
+
+
+def get_job_queue():
+    """The JOB_BACKEND queue for this worker process, created on first use"""
+    global _backend, _backend_pid
+    with _backend_lock:
+        if _backend is None or _backend_pid != os.getpid():
+            name = Config.JOB_BACKEND
+            if name == 'inprocess':
+                _backend = InProcessJobBackend.from_config()
+            else:
+                module_name, _, class_name = name.partition(':')
+                backend_class = getattr(importlib.import_module(module_name), class_name)
+                factory = getattr(backend_class, 'from_config', None)
+                _backend = factory() if factory else backend_class()
+            _backend_pid = os.getpid()
+        return _backend
+
+
+def reset_job_queue():
+    """Forget this process's queue so the next call builds a fresh one"""
+    global _backend, _backend_pid
+    with _backend_lock:
+        _backend = None
+        _backend_pid = None
@@ -0,0 +1,64 @@
+"""
+Prometheus metrics: per-route request counts and latency, upstream call
+latency and status per host, cache lookups by outcome and in-flight requests.
+
+Under gunicorn every worker writes its samples to files in
+PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py) and /api/metrics merges
+them, so the numbers cover all workers whichever one answers the scrape.
+"""
+import os
+from urllib.parse import urlsplit
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests being handled', multiprocess_mode='livesum'
+)
+UPSTREAM_REQUESTS = Counter(
+    'upstream_requests_total', 'Upstream HTTP attempts by host and status (or error)', ['host', 'status']
+)
+UPSTREAM_LATENCY = Histogram(
+    'upstream_request_duration_seconds', 'Upstream HTTP attempt latency by host', ['host'],
+    buckets=LATENCY_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by cache and outcome', ['cache', 'result']
+)
+
+
+def multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render():
+    """(body, content type) of the exposition for /api/metrics"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def cache_counter(cache, result):
+    """Bound counter child for one cache outcome; callers keep it and inc()"""
+    return CACHE_REQUESTS.labels(cache, result)
+
+
+def observe_upstream(url, status, seconds):
+    """One upstream attempt; status is the HTTP code or an error name"""
+    host = urlsplit(url).hostname or 'unknown'
+    UPSTREAM_REQUESTS.labels(host, str(status)).inc()
+    UPSTREAM_LATENCY.labels(host).observe(seconds)
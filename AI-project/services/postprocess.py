@@ -0,0 +1,122 @@
+"""
+Vectorized clean-up of raw detector predictions: confidence threshold,
+per-class and class-agnostic non-max suppression, top-k
+"""
+import numpy as np
+
+
+def predictions_to_arrays(predictions):
+    """
+    Roboflow predictions (center x/y, width, height) to xyxy boxes, scores
+    and integer class ids, plus the class names the ids index into
+    """
+    count = len(predictions)
+
+    def column(field):
+        return np.fromiter((pred.get(field, 0) for pred in predictions), dtype=np.float32, count=count)
+
+    x, y = column('x'), column('y')
+    half_w, half_h = column('width') / 2, column('height') / 2
+    boxes = np.stack([x - half_w, y - half_h, x + half_w, y + half_h], axis=1)
+    class_names = {}
+    class_ids = np.fromiter(
+        (class_names.setdefault(pred.get('class', 'unknown'), len(class_names)) for pred in predictions),
+        dtype=np.int64, count=count
+    )
+    return boxes, column('confidence'), class_ids, list(class_names)
+
+
+def _iou(box, boxes, area, areas):
+    """IoU of one xyxy box against many"""
+    inter_w = np.maximum(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0)
+    inter_h = np.maximum(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0)
+    inter = inter_w * inter_h
+    union = area + areas - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _areas(boxes):
+    return np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+
+
+def nms(boxes, scores, iou_threshold, max_keep=None):
+    """
+    Greedy non-max suppression over xyxy boxes. Returns indices of kept boxes,
+    highest score first. Each step compares the best remaining box with all
+    others at once; greedy NMS never revisits a kept box, so it can stop
+    after max_keep boxes.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    areas = _areas(boxes)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size and (max_keep is None or len(keep) < max_keep):
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        iou = _iou(boxes[best], boxes[rest], areas[best], areas[rest])
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _class_offsets(boxes, class_ids):
+    """
+    Shift boxes of each class apart by more than the whole coordinate range,
+    so boxes of different classes can never overlap
+    """
+    span = float(boxes.max() - min(boxes.min(), 0)) + 1
+    return boxes + (class_ids.astype(np.float32) * span)[:, None]
+
+
+def batched_nms(boxes, scores, class_ids, iou_threshold, max_keep=None):
+    """Per-class NMS in a single pass over class-offset boxes"""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    return nms(_class_offsets(boxes, class_ids), scores, iou_threshold, max_keep)
+
+
+def filter_predictions(predictions, min_confidence=0.0, iou_threshold=0.5,
+                       agnostic_iou_threshold=None, top_k=None, max_candidates=3000):
+    """
+    Drop low-confidence and duplicate predictions. Returns the surviving
+    prediction dicts, highest confidence first.
+
+    Per-class NMS removes overlapping boxes of the same class; the optional
+    class-agnostic pass (usually a higher threshold) removes near-identical
+    boxes given different labels. Only the max_candidates most confident
+    boxes enter NMS, and suppression stops once top_k boxes are accepted.
+    """
+    if not predictions:
+        return []
+
+    boxes, scores, class_ids, _ = predictions_to_arrays(predictions)
+    candidates = np.flatnonzero(scores >= min_confidence)
+    if candidates.size > max_candidates:
+        top = np.argpartition(-scores[candidates], max_candidates - 1)[:max_candidates]
+        candidates = candidates[top]
+    if candidates.size == 0:
+        return []
+    if not agnostic_iou_threshold:
+        keep = batched_nms(boxes[candidates], scores[candidates], class_ids[candidates],
+                           iou_threshold, max_keep=top_k or None)
+        return [predictions[i] for i in candidates[keep]]
+
+    # Both passes in one greedy walk: a box that survives its class is then
+    # checked against the boxes already accepted across classes
+    boxes, scores = boxes[candidates], scores[candidates]
+    shifted = _class_offsets(boxes, class_ids[candidates])
+    areas = _areas(boxes)
+    order = np.argsort(-scores, kind='stable')
+    accepted = []
+    while order.size and (not top_k or len(accepted) < top_k):
+        best = order[0]
+        rest = order[1:]
+        order = rest[_iou(shifted[best], shifted[rest], areas[best], areas[rest]) <= iou_threshold]
+        if accepted:
+            kept = np.asarray(accepted)
+            if (_iou(boxes[best], boxes[kept], areas[best], areas[kept]) > agnostic_iou_threshold).any():
+                continue
+        accepted.append(best)
+    return [predictions[i] for i in candidates[accepted]]
@@ -1,46 +1,29 @@
 """
-Roboflow API service for food detection using pre-trained model
-(using direct HTTPS request instead of inference-sdk)
+Food detection using the pre-trained Roboflow model, through the configured
+backend (hosted API, local ONNX runner or fake; see services/detectors.py)
 """
 
 import os
-import requests
+from config.settings import Config
+from services.detectors import get_detector
+from services.postprocess import filter_predictions
 
 class RoboflowService:
     
 
     @staticmethod
-    def detect_food(image_path):
-
+    def detect_food(image, filename="image.jpg", content_type=None):
+        """
+        Run detection on an image given as raw bytes, a binary stream (e.g. an
+        upload's stream) or a file path, using the DETECTOR_BACKEND detector.
+        Streams are sent as-is, without a temporary copy on disk.
+        """
         try:
-            api_key = os.getenv("ROBOFLOW_API_KEY")
-            model_id = os.getenv("ROBOFLOW_MODEL_ID")
-            version = os.getenv("ROBOFLOW_VERSION")
-
-            if not all([api_key, model_id, version]):
-                raise ValueError("Missing Roboflow API configuration. Check your .env file.")
-
-
-            api_url = f"https://serverless.roboflow.com/{model_id}/{version}?api_key={api_key}"
-
-
-            with open(image_path, "rb") as img_file:
-                response = requests.post(api_url, files={"file": img_file})
-
-            if response.status_code != 200:
-                return {
-                    "error": f"Roboflow API Error {response.status_code}: {response.text}",
-                    "predictions": [],
-                    "image": {"width": 0, "height": 0}
-                }
-
-            result = response.json()
-
-
-            if "predictions" not in result:
-                result["predictions"] = []
-
-            return result
+            detector = get_detector()
+            if isinstance(image, (str, os.PathLike)):
+                with open(image, "rb") as img_file:
+                    return detector.detect(img_file, os.path.basename(image), content_type)
+            return detector.detect(image, filename, content_type)
 
         except Exception as e:
             return {
@@ -50,12 +33,30 @@ class RoboflowService:
             }
 
     @staticmethod
-    def format_detection_results(raw_results):
+    def detector_stats():
+        return get_detector().stats()
 
+    @staticmethod
+    def format_detection_results(raw_results, scale=None, original_size=None):
+        """
+        Shape raw predictions for the client after dropping low-confidence and
+        duplicate boxes. When the image was resized before inference,
+        scale=(x, y) maps boxes back to original_size coordinates.
+        """
         if 'error' in raw_results:
             return raw_results
 
-        predictions = raw_results.get('predictions', [])
+        def rescale(value, factor):
+            return round(value * factor, 1) if scale else value
+
+        scale_x, scale_y = scale or (1.0, 1.0)
+        predictions = filter_predictions(
+            raw_results.get('predictions', []),
+            min_confidence=Config.DETECT_MIN_CONFIDENCE,
+            iou_threshold=Config.DETECT_NMS_IOU,
+            agnostic_iou_threshold=Config.DETECT_AGNOSTIC_NMS_IOU,
+            top_k=Config.DETECT_TOP_K
+        )
         detected_foods = []
 
         for pred in predictions:
@@ -63,18 +64,22 @@ class RoboflowService:
                 "name": pred.get('class', 'unknown'),
                 "confidence": round(pred.get('confidence', 0) * 100, 2),
                 "bbox": {
-                    "x": pred.get('x', 0),
-                    "y": pred.get('y', 0),
-                    "width": pred.get('width', 0),
-                    "height": pred.get('height', 0)
+                    "x": rescale(pred.get('x', 0), scale_x),
+                    "y": rescale(pred.get('y', 0), scale_y),
+                    "width": rescale(pred.get('width', 0), scale_x),
+                    "height": rescale(pred.get('height', 0), scale_y)
                 }
             })
 
         detected_foods.sort(key=lambda x: x['confidence'], reverse=True)
 
+        image_info = dict(raw_results.get('image', {}))
+        if original_size:
+            image_info['width'], image_info['height'] = original_size
+
         return {
             "success": True,
             "detected_foods": detected_foods,
             "total_detections": len(detected_foods),
-            "image_info": raw_results.get('image', {})
+            "image_info": image_info
         }
@@ -0,0 +1,121 @@
+"""
+Single-flight request coalescing: concurrent calls with the same key share
+one execution and all receive its result
+"""
+import asyncio
+import copy
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _AsyncCall:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe per-process group of in-flight calls, keyed by string"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'collapsed': 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) unless an identical call is already in flight,
+        in which case wait for it. Waiters get a deep copy of the result, or
+        the same exception the leading call raised. The copies are taken from
+        a snapshot made before the leader returns, so the leader's caller may
+        modify its result freely.
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executions'] += 1
+            else:
+                call.waiters += 1
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # No waiter can join once the call is unregistered
+            if call.waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    async def do_async(self, key, func, *args, **kwargs):
+        """
+        Coroutine version of do() for callers on a single event loop: func is
+        a coroutine function run as one shared task. A cancelled waiter does
+        not cancel the task, so its result still reaches the caches. When the
+        call was shared, every caller, the leader included, gets its own copy
+        and the task's result is never handed out.
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._tasks.get(key)
+            leader = call is None
+            if leader:
+                call = _AsyncCall()
+                call.task = asyncio.ensure_future(self._run_async(key, call, func, args, kwargs))
+                self._tasks[key] = call
+                call.task.add_done_callback(lambda done: self._forget(key, call))
+                self._stats['executions'] += 1
+            else:
+                call.waiters += 1
+                self._stats['collapsed'] += 1
+
+        result = await asyncio.shield(call.task)
+        # waiters is final here: the task unregistered itself before finishing
+        return copy.deepcopy(result) if call.waiters else result
+
+    async def _run_async(self, key, call, func, args, kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._forget(key, call)
+
+    def _forget(self, key, call):
+        with self._lock:
+            if self._tasks.get(key) is call:
+                del self._tasks[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls) + len(self._tasks)
+        stats['name'] = self.name
+        return stats
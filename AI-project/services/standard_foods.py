@@ -0,0 +1,80 @@
+"""
+Built-in nutrient table for common foods, with name normalization so plurals,
+aliases and Roboflow class-label variants are answered without calling USDA
+"""
+import csv
+import json
+
+import numpy as np
+from services.food_names import normalize_food_name, singularize
+
+FIELDS = ("calories", "protein", "fat", "carbs", "fiber", "sugar", "sodium")
+NUTRIENT_DTYPE = np.dtype([(field, np.float32) for field in FIELDS])
+
+
+class StandardFoodTable:
+    """
+    Immutable per-100g nutrient table. Values live in one NumPy structured
+    array (28 bytes per food); names map to row numbers.
+    """
+
+    def __init__(self, names, rows, aliases=None):
+        self._index = {normalize_food_name(name): i for i, name in enumerate(names)}
+        self._values = np.array([tuple(row) for row in rows], dtype=NUTRIENT_DTYPE)
+        self._values.flags.writeable = False
+        self._aliases = {
+            normalize_food_name(alias): normalize_food_name(target)
+            for alias, target in (aliases or {}).items()
+            if normalize_food_name(target) in self._index
+        }
+
+    @classmethod
+    def load(cls, path, aliases_path=None):
+        """Load a CSV of name + nutrient columns and an optional alias JSON file"""
+        names = []
+        rows = []
+        with open(path, encoding="utf-8", newline="") as f:
+            for record in csv.DictReader(f):
+                names.append(record["name"])
+                rows.append([float(record[field] or 0) for field in FIELDS])
+
+        aliases = {}
+        if aliases_path:
+            with open(aliases_path, encoding="utf-8") as f:
+                aliases = json.load(f).get("aliases", {})
+        return cls(names, rows, aliases)
+
+    def __len__(self):
+        return len(self._index)
+
+    def resolve(self, food_name):
+        """Table key for food_name, or None if it is not a standard food"""
+        name = normalize_food_name(food_name)
+        if not name:
+            return None
+
+        candidates = [name]
+        words = name.split(" ")
+        singular = " ".join(words[:-1] + [singularize(words[-1])])
+        if singular != name:
+            candidates.append(singular)
+
+        for candidate in candidates:
+            if candidate in self._index:
+                return candidate
+            if candidate in self._aliases:
+                return self._aliases[candidate]
+        return None
+
+    def lookup(self, food_name):
+        """Nutrients per 100g for food_name, or None"""
+        key = self.resolve(food_name)
+        if key is None:
+            return None
+        row = self._values[self._index[key]]
+        return {field: self._number(row[field]) for field in FIELDS}
+
+    @staticmethod
+    def _number(value):
+        value = round(float(value), 2)
+        return int(value) if value.is_integer() else value
@@ -0,0 +1,127 @@
+"""
+Tiled inference for large photos: overlapping full-resolution tiles run
+concurrently through the detector and are merged with cross-tile NMS
+"""
+import math
+import time
+
+import cv2
+import numpy as np
+
+from config.settings import Config
+from services.postprocess import batched_nms, predictions_to_arrays
+from services.roboflow_service import RoboflowService
+from services.worker_pool import WorkerPools
+
+
+def tile_grid(width, height, tile_size, overlap):
+    """
+    (x0, y0, x1, y1) tiles of at most tile_size pixels covering the image.
+    Neighbours overlap by at least the given fraction; tiles are spaced
+    evenly so the first and last are flush with the image edges.
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        count = math.ceil((length - tile_size) / stride) + 1
+        return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+class TiledDetector:
+
+    @staticmethod
+    def applies(size):
+        """Whether an image of (width, height) is large enough to tile"""
+        return bool(size) and max(size) >= Config.DETECT_TILE_MIN_SIDE
+
+    @staticmethod
+    def detect(data, filename="image.jpg"):
+        """
+        Detect on encoded image bytes tile by tile. Returns the detector
+        response shape in original image pixels, plus per-tile timings under
+        "tiles". With DETECT_TILE_FULL_FRAME a downscaled whole-image pass runs
+        alongside the tiles, for items larger than a tile.
+        """
+        # imdecode applies EXIF orientation, matching the preprocessed size
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image")
+        height, width = image.shape[:2]
+
+        jobs = [(tile, image[tile[1]:tile[3], tile[0]:tile[2]], 1.0)
+                for tile in tile_grid(width, height, Config.DETECT_TILE_SIZE, Config.DETECT_TILE_OVERLAP)]
+        if Config.DETECT_TILE_FULL_FRAME:
+            scale = Config.DETECT_MAX_SIDE / max(width, height)
+            if scale < 1:
+                frame = cv2.resize(image, (round(width * scale), round(height * scale)),
+                                   interpolation=cv2.INTER_AREA)
+                jobs.append(((0, 0, width, height), frame, 1 / scale))
+
+        pool = WorkerPools.get("tiles", Config.DETECT_TILE_WORKERS)
+        futures = [pool.submit(TiledDetector._detect_tile, crop, tile, factor, filename)
+                   for tile, crop, factor in jobs]
+
+        predictions, tiles = [], []
+        for future in futures:
+            tile_predictions, report = future.result()
+            predictions.extend(tile_predictions)
+            tiles.append(report)
+
+        if all('error' in report for report in tiles):
+            return {
+                "error": tiles[0]['error'],
+                "predictions": [],
+                "image": {"width": width, "height": height},
+                "tiles": tiles
+            }
+
+        return {
+            "predictions": TiledDetector.merge(predictions),
+            "image": {"width": width, "height": height},
+            "tiles": tiles
+        }
+
+    @staticmethod
+    def merge(predictions):
+        """Cross-tile per-class NMS over predictions in global coordinates"""
+        if not predictions:
+            return []
+        boxes, scores, class_ids, _ = predictions_to_arrays(predictions)
+        keep = batched_nms(boxes, scores, class_ids, Config.DETECT_TILE_MERGE_IOU)
+        return [predictions[i] for i in keep]
+
+    @staticmethod
+    def _detect_tile(crop, tile, factor, filename):
+        started = time.perf_counter()
+        x0, y0 = tile[0], tile[1]
+        report = {"tile": list(tile), "full_frame": factor != 1.0}
+
+        ok, encoded = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, Config.DETECT_JPEG_QUALITY])
+        if not ok:
+            report.update({"error": "Could not encode tile", "ms": 0.0})
+            return [], report
+
+        raw = RoboflowService.detect_food(encoded.tobytes(), filename=filename, content_type="image/jpeg")
+        report["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if 'error' in raw:
+            report["error"] = raw["error"]
+            return [], report
+
+        predictions = []
+        for pred in raw.get('predictions', []):
+            pred = dict(pred)
+            pred['x'] = pred.get('x', 0) * factor + x0
+            pred['y'] = pred.get('y', 0) * factor + y0
+            pred['width'] = pred.get('width', 0) * factor
+            pred['height'] = pred.get('height', 0) * factor
+            predictions.append(pred)
+        report["detections"] = len(predictions)
+        return predictions, report
@@ -0,0 +1,267 @@
+"""
+Request tracing and structured logging.
+
+Each request gets a trace id (taken from a valid incoming X-Trace-Id header or
+generated) and a tree of timed spans: the route at the root, then classify,
+search, match, detail fetch, Roboflow call and upstream HTTP attempts below
+it. The current trace and span live in contextvars, so they follow async
+views, asyncio.to_thread and the shared worker pools (see worker_pool.py);
+outside a request span() is a no-op.
+
+Log lines are JSON on stdout. Debug and info lines are sampled per request
+(LOG_SAMPLE_RATE), unless written with sample=False; warnings and errors are
+always written. Requests slower than SLOW_REQUEST_MS log their whole span tree.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import random
+import re
+import sys
+import time
+import uuid
+
+from config.settings import Config
+
+_trace = contextvars.ContextVar('trace', default=None)
+_span = contextvars.ContextVar('span', default=None)
+
+TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, event, trace id and fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+logger = logging.getLogger('foodapp')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(JsonFormatter())
+    logger.addHandler(_handler)
+    logger.propagate = False
+logger.setLevel(Config.LOG_LEVEL)
+
+
+class Span:
+    """A timed step of a request with attributes and child spans"""
+
+    __slots__ = ('name', 'attrs', 'started', 'duration_ms', 'error', 'children')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+        self.children = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self.started) * 1000, 2)
+
+    def to_dict(self, origin=None):
+        """The span tree with start offsets (ms) relative to origin"""
+        origin = self.started if origin is None else origin
+        node = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 2),
+            "duration_ms": self.duration_ms,
+        }
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.error:
+            node["error"] = self.error
+        # Children still running (detached background work) have no duration yet
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in list(self.children)]
+        return node
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class span:
+    """
+    Context manager timing a child of the current span:
+
+        with tracing.span("search", query=query) as s:
+            ...
+            s.set(cached=True)
+    """
+
+    __slots__ = ('name', 'attrs', '_span', '_token')
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self._span = None
+        self._token = None
+
+    def __enter__(self):
+        parent = _span.get()
+        if parent is None:
+            return NOOP_SPAN
+        self._span = Span(self.name, self.attrs)
+        parent.children.append(self._span)
+        self._token = _span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return False
+        self._span.finish()
+        if exc is not None:
+            self._span.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _span.reset(self._token)
+        except ValueError:
+            # Exited in another context (e.g. a generator resumed elsewhere)
+            pass
+        return False
+
+
+def traced(name):
+    """
+    Run the decorated function (or coroutine function) in a span; the body
+    can add attributes with current_span().set(...)
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name, started, **attrs):
+    """Add an already finished child span that began at perf_counter() started"""
+    parent = _span.get()
+    if parent is None:
+        return
+    child = Span(name, attrs)
+    child.started = started
+    child.finish()
+    parent.children.append(child)
+
+
+def current_span():
+    """The innermost open span, or a no-op stand-in outside a trace"""
+    return _span.get() or NOOP_SPAN
+
+
+class Trace:
+    """One request: trace id, sampling decision and the root span"""
+
+    def __init__(self, name, trace_id=None, **attrs):
+        if not trace_id or not TRACE_ID_PATTERN.match(trace_id):
+            trace_id = uuid.uuid4().hex
+        self.trace_id = trace_id
+        self.sampled = random.random() < Config.LOG_SAMPLE_RATE
+        self.root = Span(name, attrs)
+        self._tokens = None
+
+    def activate(self):
+        self._tokens = (_trace.set(self), _span.set(self.root))
+        return self
+
+    def close(self, **attrs):
+        """
+        Finish the root span, write the request log line (sampled) and, past
+        SLOW_REQUEST_MS, the span tree (always); then leave the trace context
+        """
+        root = self.root
+        root.set(**attrs)
+        root.finish()
+        try:
+            if Config.SLOW_REQUEST_MS and root.duration_ms >= Config.SLOW_REQUEST_MS:
+                warning("slow request", request=root.name, duration_ms=root.duration_ms,
+                        threshold_ms=Config.SLOW_REQUEST_MS, spans=root.to_dict())
+            else:
+                info("request", request=root.name, duration_ms=root.duration_ms, **root.attrs)
+        finally:
+            if self._tokens is not None:
+                tokens, self._tokens = self._tokens, None
+                try:
+                    _span.reset(tokens[1])
+                    _trace.reset(tokens[0])
+                except ValueError:
+                    _span.set(None)
+                    _trace.set(None)
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def _emit(level, event, fields, sample=True):
+    if not logger.isEnabledFor(level):
+        return
+    trace = _trace.get()
+    if sample and level < logging.WARNING:
+        sampled = trace.sampled if trace is not None else random.random() < Config.LOG_SAMPLE_RATE
+        if not sampled:
+            return
+    logger.log(level, event, extra={
+        "trace_id": trace.trace_id if trace is not None else None,
+        "fields": fields,
+    })
+
+
+def debug(event, **fields):
+    _emit(logging.DEBUG, event, fields)
+
+
+def info(event, *, sample=True, **fields):
+    """sample=False writes the line regardless of sampling, for one-off process events"""
+    _emit(logging.INFO, event, fields, sample)
+
+
+def warning(event, **fields):
+    _emit(logging.WARNING, event, fields)
+
+
+def error(event, **fields):
+    _emit(logging.ERROR, event, fields)
+
+
+def debug_enabled():
+    """Whether a debug line would be written here; guards costly fields"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    trace = _trace.get()
+    return trace is None or trace.sampled
@@ -1,42 +1,149 @@
 """
 USDA Food Data Central API service for nutrition information
 """
-import requests
+import time
+from concurrent.futures import wait
+
 from dotenv import load_dotenv
 from config.settings import Config
+from services.cache_service import ResponseCache
+from services.fdc_store import FDCStore
+from services.food_classifier import FoodClassifier
+from services.food_index import FoodIndex
+from services.food_names import normalize_food_name
+from services import tracing
+from services.http_client import HttpClient
+from services.single_flight import SingleFlight
+from services.standard_foods import StandardFoodTable
+from services.worker_pool import ContextThreadPoolExecutor, WorkerPools
 
 
 load_dotenv()
 
+search_cache = ResponseCache(
+    'usda_search',
+    max_entries=Config.USDA_CACHE_MAX_ENTRIES,
+    ttl=Config.USDA_CACHE_TTL,
+    disk_path=Config.CACHE_DB_PATH,
+    disk_ttl=Config.USDA_CACHE_DISK_TTL,
+    enabled=Config.USDA_CACHE_ENABLED
+)
+detail_cache = ResponseCache(
+    'usda_detail',
+    max_entries=Config.USDA_CACHE_MAX_ENTRIES,
+    ttl=Config.USDA_CACHE_TTL,
+    disk_path=Config.CACHE_DB_PATH,
+    disk_ttl=Config.USDA_CACHE_DISK_TTL,
+    enabled=Config.USDA_CACHE_ENABLED
+)
+# Final get_simple_nutrition answers per normalized name; TTLs are per outcome
+result_cache = ResponseCache(
+    'nutrition_resolved',
+    max_entries=Config.USDA_CACHE_MAX_ENTRIES,
+    ttl=Config.USDA_CACHE_TTL,
+    disk_path=Config.CACHE_DB_PATH,
+    enabled=Config.NUTRITION_RESULT_CACHE_ENABLED
+)
+
+# do() and do_async() keep separate in-flight tables, so a threaded and an
+# awaited lookup of the same name do not coalesce. Request paths therefore all
+# resolve names through AsyncUSDAService (POST /api/analyze included); only the
+# start-up warm-up and the benchmarks use the threaded path.
+nutrition_flight = SingleFlight('nutrition_by_name')
+detail_flight = SingleFlight('usda_detail')
+
 class USDAService:
     
 
     BASE_URL = Config.USDA_BASE_URL or "https://api.nal.usda.gov/fdc/v1"
+    DATA_TYPES = ["Foundation", "SR Legacy"]
+
+    CLASSIFIER = FoodClassifier.load(Config.FOOD_CATEGORIES_PATH)
+    STANDARD_FOODS = StandardFoodTable.load(Config.STANDARD_FOODS_PATH, Config.FOOD_ALIASES_PATH)
+
+    @staticmethod
+    def normalize_query(query):
+        """
+        Lowercase and collapse whitespace so equivalent queries share a cache key
+        """
+        return " ".join(str(query).lower().split())
 
     @staticmethod
+    def uses_local_store():
+        return Config.USDA_BACKEND == "local"
+
+    @staticmethod
+    def local_store():
+        return FDCStore.open(Config.FDC_STORE_PATH)
+
+    @staticmethod
+    def cache_stats():
+        """
+        Hit/miss/eviction counters of the search, detail and resolved-name caches
+        """
+        return {
+            "search": search_cache.stats(),
+            "detail": detail_cache.stats(),
+            "resolved": result_cache.stats()
+        }
+
+    @staticmethod
+    def single_flight_stats():
+        """
+        How many concurrent identical lookups were collapsed into one upstream call
+        """
+        return {
+            "nutrition_by_name": nutrition_flight.stats(),
+            "detail": detail_flight.stats()
+        }
+
+    @staticmethod
+    @tracing.traced("search")
     def search_foods(query, limit=10):
         """
         Search for foods in USDA database
         """
+        tracing.current_span().set(query=query, limit=limit)
+        if USDAService.uses_local_store():
+            return USDAService.local_store().search(query, limit, USDAService.DATA_TYPES)
+
         api_key = Config.USDA_API_KEY
         if not api_key:
             raise ValueError("Missing USDA_API_KEY in .env")
 
+        cache_key = USDAService._search_key(query, limit)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            tracing.current_span().set(cached=True)
+            return cached
+
         url = f"{USDAService.BASE_URL}/foods/search"
-        params = {
+        response = HttpClient.get(url, params=USDAService._search_params(query, limit, api_key))
+        if response.status_code != 200:
+            raise Exception(f"USDA search failed: {response.status_code}")
+
+        result = USDAService._parse_search(response.json())
+        search_cache.set(cache_key, result)
+        return result
+
+    @staticmethod
+    def _search_key(query, limit):
+        return ResponseCache.make_key(
+            USDAService.normalize_query(query), limit, ",".join(USDAService.DATA_TYPES)
+        )
+
+    @staticmethod
+    def _search_params(query, limit, api_key):
+        return {
             "api_key": api_key,
             "query": query,
             "pageSize": limit,
-            "dataType": ["Foundation", "SR Legacy"]
+            "dataType": USDAService.DATA_TYPES
         }
 
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise Exception(f"USDA search failed: {response.status_code}")
-
-        data = response.json()
+    @staticmethod
+    def _parse_search(data):
         foods = data.get("foods", [])
-
         return {
             "foods": [
                 {
@@ -50,21 +157,46 @@ class USDAService:
         }
 
     @staticmethod
+    @tracing.traced("detail")
     def get_food_by_fdc_id(fdc_id):
 
+        tracing.current_span().set(fdc_id=fdc_id)
+        if USDAService.uses_local_store():
+            result = USDAService.local_store().get_food(fdc_id)
+            if result is None:
+                raise Exception(f"USDA detail failed: {fdc_id} not in local store")
+            return result
+
         api_key = Config.USDA_API_KEY
         if not api_key:
             raise ValueError("Missing USDA_API_KEY in .env")
 
+        cache_key = str(fdc_id).strip()
+        cached = detail_cache.get(cache_key)
+        if cached is not None:
+            tracing.current_span().set(cached=True)
+            return cached
+
+        return detail_flight.do(cache_key, USDAService._fetch_food_detail, fdc_id, api_key)
+
+    @staticmethod
+    def _fetch_food_detail(fdc_id, api_key):
         url = f"{USDAService.BASE_URL}/food/{fdc_id}"
         params = {"api_key": api_key}
 
-        response = requests.get(url, params=params)
+        response = HttpClient.get(url, params=params)
         if response.status_code != 200:
             raise Exception(f"USDA detail failed: {response.status_code}")
 
-        data = response.json()
+        result = USDAService._parse_food_detail(fdc_id, response.json())
+        detail_cache.set(str(fdc_id).strip(), result)
+        return result
 
+    @staticmethod
+    def _parse_food_detail(fdc_id, data):
+        """
+        Reduce an FDC food record to the nutrients the app uses
+        """
         nutrients = {}
         for nutrient in data.get("foodNutrients", []):
             name = nutrient.get("nutrient", {}).get("name", "")
@@ -93,440 +225,432 @@ class USDAService:
         }
 
     @staticmethod
-    def classify_food_type(food_name):
+    @tracing.traced("details")
+    def get_foods_by_fdc_ids(fdc_ids):
+        """
+        Fetch details for many foods at once, keyed by FDC id.
+        Ids that fail or that USDA does not know are left out of the result,
+        so one bad food never sinks the others.
+        """
+        tracing.current_span().set(requested=len(fdc_ids))
+        if USDAService.uses_local_store():
+            return USDAService.local_store().get_foods(fdc_ids)
 
-        food_name_lower = food_name.lower()
-        
-        food_categories = {
-        
-            'fresh_fruits': [
-                'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 
-                'raspberry', 'mango', 'pineapple', 'watermelon', 'melon', 'peach',
-                'pear', 'plum', 'cherry', 'kiwi', 'lemon', 'lime', 'avocado'
-            ],
-           
-            'fresh_vegetables': [
-                'carrot', 'broccoli', 'tomato', 'cucumber', 'lettuce', 'spinach',
-                'kale', 'cabbage', 'onion', 'garlic', 'potato', 'sweet potato',
-                'bell pepper', 'chili', 'mushroom', 'celery', 'asparagus'
-            ],
-          
-            'bakery': [
-                'croissant', 'strudel', 'pie', 'bread', 'muffin', 'cake', 'cookie',
-                'biscuit', 'pastry', 'donut', 'bagel', 'roll', 'bun'
-            ],
-          
-            'beverages': [
-                'juice', 'smoothie', 'milk', 'tea', 'coffee', 'soda', 'water',
-                'lemonade', 'shake', 'drink', 'beverage'
-            ],
-         
-            'meat': [
-                'chicken', 'beef', 'pork', 'steak', 'bacon', 'sausage', 'ham',
-                'turkey', 'duck', 'lamb', 'veal'
-            ],
-          
-            'seafood': [
-                'salmon', 'tuna', 'shrimp', 'prawn', 'crab', 'lobster', 'fish',
-                'cod', 'tilapia', 'sardine', 'oyster', 'clam'
-            ],
-           
-            'dairy': [
-                'cheese', 'yogurt', 'butter', 'cream', 'ice cream', 'custard'
-            ],
-           
-            'grains': [
-                'rice', 'pasta', 'noodle', 'oatmeal', 'cereal', 'quinoa', 'barley',
-                'bread', 'toast'
-            ],
-         
-            'nuts_seeds': [
-                'almond', 'walnut', 'peanut', 'cashew', 'pecan', 'seed', 'nut'
-            ],
-          
-            'processed': [
-                'babyfood', 'canned', 'frozen', 'sauce', 'ketchup', 'mayonnaise',
-                'chip', 'cracker', 'popcorn'
-            ],
-           
-            'desserts': [
-                'chocolate', 'candy', 'sweet', 'dessert', 'pudding'
-            ]
-        }
-        
-    
-        for category, keywords in food_categories.items():
-            for keyword in keywords:
-                if keyword in food_name_lower:
-                    return category
-        
-        return 'unknown'
+        api_key = Config.USDA_API_KEY
+        if not api_key:
+            raise ValueError("Missing USDA_API_KEY in .env")
+
+        results, missing = USDAService._cached_details(fdc_ids)
+        tracing.current_span().set(cached=len(results), mode=Config.USDA_DETAIL_FETCH_MODE)
+        if not missing:
+            return results
+
+        mode = Config.USDA_DETAIL_FETCH_MODE
+        if mode == "bulk":
+            chunk_size = max(1, Config.USDA_BULK_CHUNK_SIZE)
+            chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+            for chunk_results in USDAService._map_concurrently(USDAService._fetch_bulk_chunk, chunks):
+                if chunk_results:
+                    results.update(chunk_results)
+        elif mode == "concurrent":
+            results.update(USDAService._fetch_details_concurrently(missing))
+        else:
+            for fdc_id in missing:
+                try:
+                    results[fdc_id] = USDAService.get_food_by_fdc_id(fdc_id)
+                except Exception as e:
+                    tracing.warning("usda detail failed", fdc_id=fdc_id, error=str(e))
+
+        return results
 
     @staticmethod
-    def find_best_match(food_name, search_results):
- 
-        food_type = USDAService.classify_food_type(food_name)
-        food_name_lower = food_name.lower().strip()
-        
+    def _cached_details(fdc_ids):
+        """(cached details keyed by id, ids still to fetch without duplicates)"""
+        results = {}
+        missing = []
+        for fdc_id in fdc_ids:
+            cached = detail_cache.get(str(fdc_id).strip())
+            if cached is not None:
+                results[fdc_id] = cached
+            elif fdc_id not in missing:
+                missing.append(fdc_id)
+        return results, missing
 
-        matching_strategies = {
-            'fresh_fruits': {
-                'priority_keywords': ['raw', 'fresh', 'with skin'],
-                'exclude_keywords': ['pie', 'strudel', 'croissant', 'babyfood', 'juice', 'sauce', 'canned', 'frozen'],
-                'prefer_foundation': True,
-                'description': '新鲜水果'
-            },
-            'fresh_vegetables': {
-                'priority_keywords': ['raw', 'fresh'],
-                'exclude_keywords': ['canned', 'frozen', 'sauce', 'babyfood'],
-                'prefer_foundation': True,
-                'description': '新鲜蔬菜'
-            },
-            'bakery': {
-                'priority_keywords': [],  
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': False,  
-                'description': '烘焙食品'
-            },
-            'beverages': {
-                'priority_keywords': ['juice', 'beverage', 'drink'],
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': True,
-                'description': '饮料'
-            },
-            'meat': {
-                'priority_keywords': ['raw', 'fresh', 'lean'],
-                'exclude_keywords': ['babyfood', 'canned'],
-                'prefer_foundation': True,
-                'description': '肉类'
-            },
-            'seafood': {
-                'priority_keywords': ['raw', 'fresh'],
-                'exclude_keywords': ['babyfood', 'canned'],
-                'prefer_foundation': True,
-                'description': '海鲜'
-            },
-            'dairy': {
-                'priority_keywords': [],  
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': True,
-                'description': '乳制品'
-            },
-            'grains': {
-                'priority_keywords': ['cooked', 'boiled'],
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': True,
-                'description': '谷物主食'
-            },
-            'nuts_seeds': {
-                'priority_keywords': ['raw', 'unsalted'],
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': True,
-                'description': '坚果种子'
-            },
-            'processed': {
-                'priority_keywords': [],  
-                'exclude_keywords': ['babyfood'],  
-                'prefer_foundation': False,
-                'description': '加工食品'
-            },
-            'desserts': {
-                'priority_keywords': [],  
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': False,
-                'description': '甜点'
-            },
-            'unknown': {
-                'priority_keywords': ['raw', 'fresh'],
-                'exclude_keywords': ['babyfood'],
-                'prefer_foundation': True,
-                'description': '未知类型'
-            }
-        }
-        
-        strategy = matching_strategies.get(food_type, matching_strategies['unknown'])
-        
-        scored_foods = []
-        
-        for food in search_results:
-            description = food.get("description", "").lower()
-            score = 0
+    @staticmethod
+    def _fetch_bulk_chunk(fdc_ids):
+        """
+        One POST /foods call for up to USDA_BULK_CHUNK_SIZE ids; falls back to
+        concurrent single-food calls if the bulk endpoint itself fails
+        """
+        url = f"{USDAService.BASE_URL}/foods"
+        params = {"api_key": Config.USDA_API_KEY}
 
-            if food_name_lower in description:
-                score += 20  
-            elif any(word in description for word in food_name_lower.split()):
-                score += 10  
-            
-    
-            for keyword in strategy['priority_keywords']:
-                if keyword in description:
-                    score += 5
-    
-            for exclude in strategy['exclude_keywords']:
-                if exclude in description and exclude not in food_name_lower:
-                    score -= 10
-            
-            if strategy['prefer_foundation'] and food.get("data_type") == "Foundation":
-                score += 3
-            elif not strategy['prefer_foundation'] and food.get("data_type") == "SR Legacy":
-                score += 2
-            
- 
-            if food_type in ['fresh_fruits', 'fresh_vegetables']:
-                if 'babyfood' in description:
-                    score -= 15
-                if any(word in description for word in ['pie', 'strudel', 'croissant']):
-                    score -= 12
-            
-            scored_foods.append({
-                'food': food,
-                'score': score,
-                'description': description
-            })
-        
- 
-        scored_foods.sort(key=lambda x: x['score'], reverse=True)
-        
-        print(f"食物分类: {strategy['description']}, 搜索: '{food_name}'")
-        print(f"best :")
-        for i, item in enumerate(scored_foods[:3]):
-            print(f"  {i+1}. {item['description']} (score: {item['score']})")
-        
+        try:
+            payload = {"fdcIds": [int(fdc_id) for fdc_id in fdc_ids], "format": "full"}
+            # POST /foods is a read-only lookup, safe to repeat on a 5xx
+            response = HttpClient.post(url, params=params, json=payload, idempotent=True)
+            if response.status_code != 200:
+                raise Exception(f"USDA bulk detail failed: {response.status_code}")
+            records = response.json()
+        except Exception as e:
+            tracing.warning("usda bulk detail failed, using single requests", error=str(e))
+            return USDAService._fetch_details_concurrently(fdc_ids)
 
-        valid_matches = [item for item in scored_foods if item['score'] > 5]
-        
-        if valid_matches:
-            best_match = valid_matches[0]['food']
-            print(f"final: {best_match['description']}")
-            return best_match
-        else:
-            print(f"did not find match")
-            return None
+        results = USDAService._parse_bulk_records(fdc_ids, records)
+        USDAService._cache_details(results)
+        return results
+
+    @staticmethod
+    def _parse_bulk_records(fdc_ids, records):
+        """Parse a POST /foods response, keyed by the requested ids"""
+        requested = {int(fdc_id): fdc_id for fdc_id in fdc_ids}
+        results = {}
+        for data in records or []:
+            fdc_id = requested.get(data.get("fdcId"))
+            if fdc_id is None:
+                continue
+            results[fdc_id] = USDAService._parse_food_detail(fdc_id, data)
+        return results
+
+    @staticmethod
+    def _cache_details(details):
+        for fdc_id, detail in details.items():
+            detail_cache.set(str(fdc_id).strip(), detail)
+
+    @staticmethod
+    def _fetch_details_concurrently(fdc_ids):
+        results = {}
+        details = USDAService._map_concurrently(USDAService.get_food_by_fdc_id, fdc_ids)
+        for fdc_id, detail in zip(fdc_ids, details):
+            if detail is not None:
+                results[fdc_id] = detail
+        return results
+
+    @staticmethod
+    def _map_concurrently(func, items):
+        """
+        Run func over items on a bounded thread pool, in input order.
+        A failing item yields None instead of raising.
+        """
+        def run(item):
+            try:
+                return func(item)
+            except Exception as e:
+                tracing.warning("usda fetch failed", item=item, error=str(e))
+                return None
+
+        if len(items) <= 1:
+            return [run(item) for item in items]
+
+        workers = max(1, min(Config.USDA_DETAIL_CONCURRENCY, len(items)))
+        with ContextThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, items))
+
+    @staticmethod
+    def classify_food_type(food_name):
+
+        return USDAService.CLASSIFIER.classify(food_name)
 
     @staticmethod
     def get_single_food_nutrition(food_name):
 
-        print(f"search: '{food_name}'")
-        
+        if USDAService.uses_local_store():
+            index = FoodIndex.for_store(USDAService.local_store())
+            best_match = USDAService._pick_best_match(food_name, index)
+        else:
+            search_results = USDAService.search_foods(food_name, limit=25)
+            best_match = USDAService._match_search_results(food_name, search_results.get("foods", []))
+        if "error" in best_match:
+            return best_match
 
-        search_results = USDAService.search_foods(food_name, limit=25)
-        foods = search_results.get("foods", [])
+        try:
+            food_detail = USDAService.get_food_by_fdc_id(best_match["fdc_id"])
+            return USDAService._matched_nutrition(best_match, food_detail)
+        except Exception as e:
+            tracing.warning("usda detail failed", food=food_name, error=str(e))
+            return {"error": f"Failed to get nutrition data: {e}"}
+
+    @staticmethod
+    def _match_search_results(food_name, foods):
+        """_pick_best_match over a throwaway index of one search's results"""
+        return USDAService._pick_best_match(food_name, FoodIndex.from_foods(foods))
+
+    @staticmethod
+    def _pick_best_match(food_name, index):
+        """
+        Best-scoring search result for food_name, or an error dict when
+        nothing scores above FoodIndex.MIN_SCORE
+        """
+        with tracing.span("classify") as span:
+            food_type = USDAService.classify_food_type(food_name)
+            strategy = USDAService.CLASSIFIER.strategy(food_type)
+            span.set(food_type=food_type)
+
+        with tracing.span("match", food=food_name) as span:
+            candidates = index.search(food_name, strategy, food_type, top_k=3)
+            if candidates:
+                span.set(best=candidates[0][1]['description'], score=candidates[0][0])
         
-        if not foods:
-            print(f"No related food found: '{food_name}'")
+        if not candidates:
+            tracing.debug("no usda match", food=food_name)
             return {"error": f"No food found for '{food_name}'"}
         
+        if tracing.debug_enabled():
+            tracing.debug("match candidates", food=food_name, category=strategy['description'],
+                          candidates=[(food['description'], score) for score, food in candidates])
 
-        best_match = USDAService.find_best_match(food_name, foods)
+        score, best_match = candidates[0]
         
-        if not best_match:
-            print(f"No suitable match found: '{food_name}'")
+        if score <= FoodIndex.MIN_SCORE:
+            tracing.debug("no suitable usda match", food=food_name, score=score)
             return {"error": f"No suitable match found for '{food_name}'"}
-        
+        return best_match
 
-        try:
-            food_detail = USDAService.get_food_by_fdc_id(best_match["fdc_id"])
-            nutrients = food_detail.get("nutrients", {})
-            
-            print(f"Final choice: {best_match['description']}")
-            print(f"data: {nutrients.get('calories', 'N/A')} calories")
-            
-            return {
-                "name": best_match["description"],
-                "calories": nutrients.get("calories", 0),
-                "protein": nutrients.get("protein", 0),
-                "fat": nutrients.get("fat", 0),
-                "carbs": nutrients.get("carbs", 0),
-                "fiber": nutrients.get("fiber", 0),
-                "sugar": nutrients.get("sugar", 0),
-                "sodium": nutrients.get("sodium", 0),
-                "confidence": "smart_match",
-                "data_type": best_match.get("data_type", ""),
-                "selected_description": best_match["description"]
-            }
-        except Exception as e:
-            print(f"fail: {e}")
-            return {"error": f"Failed to get nutrition data: {e}"}
+    @staticmethod
+    def _matched_nutrition(best_match, food_detail):
+        nutrients = food_detail.get("nutrients", {})
+        
+        tracing.debug("usda match", description=best_match['description'],
+                      calories=nutrients.get('calories'))
+        
+        return {
+            "name": best_match["description"],
+            "calories": nutrients.get("calories", 0),
+            "protein": nutrients.get("protein", 0),
+            "fat": nutrients.get("fat", 0),
+            "carbs": nutrients.get("carbs", 0),
+            "fiber": nutrients.get("fiber", 0),
+            "sugar": nutrients.get("sugar", 0),
+            "sodium": nutrients.get("sodium", 0),
+            "confidence": "smart_match",
+            "data_type": best_match.get("data_type", ""),
+            "selected_description": best_match["description"]
+        }
 
     @staticmethod
+    @tracing.traced("nutrition")
     def get_simple_nutrition(food_name):
- 
 
-        standard_foods = {
-
-        "apple": {"calories": 52, "protein": 0.3, "fat": 0.2, "carbs": 14, "fiber": 2.4, "sugar": 10, "sodium": 1},
-        "banana": {"calories": 89, "protein": 1.1, "fat": 0.3, "carbs": 23, "fiber": 2.6, "sugar": 12, "sodium": 1},
-        "orange": {"calories": 47, "protein": 0.9, "fat": 0.1, "carbs": 12, "fiber": 2.4, "sugar": 9, "sodium": 0},
-        "strawberry": {"calories": 32, "protein": 0.7, "fat": 0.3, "carbs": 8, "fiber": 2.0, "sugar": 4.9, "sodium": 1},
-        "grape": {"calories": 69, "protein": 0.7, "fat": 0.2, "carbs": 18, "fiber": 0.9, "sugar": 16, "sodium": 2},
-        "watermelon": {"calories": 30, "protein": 0.6, "fat": 0.2, "carbs": 8, "fiber": 0.4, "sugar": 6, "sodium": 1},
-        "pineapple": {"calories": 50, "protein": 0.5, "fat": 0.1, "carbs": 13, "fiber": 1.4, "sugar": 10, "sodium": 1},
-        "mango": {"calories": 60, "protein": 0.8, "fat": 0.4, "carbs": 15, "fiber": 1.6, "sugar": 14, "sodium": 1},
-        "peach": {"calories": 39, "protein": 0.9, "fat": 0.3, "carbs": 10, "fiber": 1.5, "sugar": 8, "sodium": 0},
-        "pear": {"calories": 57, "protein": 0.4, "fat": 0.1, "carbs": 15, "fiber": 3.1, "sugar": 10, "sodium": 1},
-        "kiwi": {"calories": 61, "protein": 1.1, "fat": 0.5, "carbs": 15, "fiber": 3.0, "sugar": 9, "sodium": 3},
-        "blueberry": {"calories": 57, "protein": 0.7, "fat": 0.3, "carbs": 14, "fiber": 2.4, "sugar": 10, "sodium": 1},
-        "raspberry": {"calories": 52, "protein": 1.2, "fat": 0.7, "carbs": 12, "fiber": 6.5, "sugar": 4.4, "sodium": 1},
-        "avocado": {"calories": 160, "protein": 2.0, "fat": 15, "carbs": 9, "fiber": 7, "sugar": 0.7, "sodium": 7},
-    
+        span = tracing.current_span()
+        span.set(food=food_name)
+        standard = USDAService._standard_nutrition(food_name)
+        if standard is not None:
+            span.set(source="standard")
+            return standard
 
-        "carrot": {"calories": 41, "protein": 0.9, "fat": 0.2, "carbs": 10, "fiber": 2.8, "sugar": 5, "sodium": 69},
-        "broccoli": {"calories": 34, "protein": 2.8, "fat": 0.4, "carbs": 7, "fiber": 2.6, "sugar": 1.7, "sodium": 33},
-        "tomato": {"calories": 18, "protein": 0.9, "fat": 0.2, "carbs": 4, "fiber": 1.2, "sugar": 2.6, "sodium": 5},
-        "cucumber": {"calories": 15, "protein": 0.7, "fat": 0.1, "carbs": 3.6, "fiber": 0.5, "sugar": 1.7, "sodium": 2},
-        "lettuce": {"calories": 15, "protein": 1.4, "fat": 0.2, "carbs": 2.9, "fiber": 1.3, "sugar": 0.8, "sodium": 28},
-        "spinach": {"calories": 23, "protein": 2.9, "fat": 0.4, "carbs": 3.6, "fiber": 2.2, "sugar": 0.4, "sodium": 79},
-        "potato": {"calories": 77, "protein": 2.0, "fat": 0.1, "carbs": 17, "fiber": 2.2, "sugar": 0.8, "sodium": 6},
-        "sweet potato": {"calories": 86, "protein": 1.6, "fat": 0.1, "carbs": 20, "fiber": 3.0, "sugar": 4.2, "sodium": 55},
-        "onion": {"calories": 40, "protein": 1.1, "fat": 0.1, "carbs": 9, "fiber": 1.7, "sugar": 4.2, "sodium": 4},
-        "bell pepper": {"calories": 31, "protein": 1.0, "fat": 0.3, "carbs": 6, "fiber": 2.1, "sugar": 4.2, "sodium": 4},
-        "mushroom": {"calories": 22, "protein": 3.1, "fat": 0.3, "carbs": 3.3, "fiber": 1.0, "sugar": 2.0, "sodium": 5},
-        "cauliflower": {"calories": 25, "protein": 1.9, "fat": 0.3, "carbs": 5, "fiber": 2.0, "sugar": 1.9, "sodium": 30},
-        "cabbage": {"calories": 25, "protein": 1.3, "fat": 0.1, "carbs": 6, "fiber": 2.5, "sugar": 3.2, "sodium": 18},
-    
+        cache_key = normalize_food_name(food_name)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            span.set(source="cache")
+            return cached
 
-        "chicken breast": {"calories": 165, "protein": 31, "fat": 3.6, "carbs": 0, "fiber": 0, "sugar": 0, "sodium": 74},
-        "beef": {"calories": 250, "protein": 26, "fat": 15, "carbs": 0, "fiber": 0, "sugar": 0, "sodium": 72},
-        "pork": {"calories": 242, "protein": 25, "fat": 14, "carbs": 0, "fiber": 0, "sugar": 0, "sodium": 62},
-        "salmon": {"calories": 208, "protein": 20, "fat": 13, "carbs": 0, "fiber": 0, "sugar": 0, "sodium": 59},
-        "tuna": {"calories": 184, "protein": 30, "fat": 6, "carbs": 0, "fiber": 0, "sugar": 0, "sodium": 50},
-        "egg": {"calories": 155, "protein": 13, "fat": 11, "carbs": 1.1, "fiber": 0, "sugar": 1.1, "sodium": 124},
-        "tofu": {"calories": 76, "protein": 8, "fat": 4.8, "carbs": 1.9, "fiber": 0.3, "sugar": 0.0, "sodium": 7},
-    
+        # Concurrent lookups of the same food share one upstream resolution
+        return nutrition_flight.do(
+            cache_key, USDAService._resolve_and_cache, food_name, cache_key
+        )
 
-        "milk": {"calories": 42, "protein": 3.4, "fat": 1.0, "carbs": 5.0, "fiber": 0, "sugar": 5.0, "sodium": 44},
-        "yogurt": {"calories": 59, "protein": 3.5, "fat": 0.4, "carbs": 7.0, "fiber": 0, "sugar": 7.0, "sodium": 36},
-        "cheese": {"calories": 402, "protein": 25, "fat": 33, "carbs": 1.3, "fiber": 0, "sugar": 0.5, "sodium": 621},
-        "butter": {"calories": 717, "protein": 0.9, "fat": 81, "carbs": 0.1, "fiber": 0, "sugar": 0.1, "sodium": 11},
-    
+    @staticmethod
+    def get_simple_nutrition_batch(food_names, timeout):
+        """
+        Resolve many names concurrently under one shared deadline (seconds).
+        Names are de-duplicated after normalization; results come back in
+        input order with status ok / pending / error / invalid. Lookups still
+        running at the deadline keep going in the background and land in the
+        result cache, so a retry is usually instant.
+        """
+        unique = USDAService._unique_names(food_names)
 
-        "rice": {"calories": 130, "protein": 2.7, "fat": 0.3, "carbs": 28, "fiber": 0.4, "sugar": 0.1, "sodium": 1},
-        "bread": {"calories": 265, "protein": 9, "fat": 3.2, "carbs": 49, "fiber": 2.7, "sugar": 5.0, "sodium": 491},
-        "pasta": {"calories": 131, "protein": 5, "fat": 1.1, "carbs": 25, "fiber": 1.8, "sugar": 0.6, "sodium": 1},
-        "oatmeal": {"calories": 68, "protein": 2.4, "fat": 1.4, "carbs": 12, "fiber": 1.7, "sugar": 0.5, "sodium": 49},
-    
+        def timed(food_name):
+            started = time.perf_counter()
+            result = USDAService.get_simple_nutrition(food_name)
+            return result, round((time.perf_counter() - started) * 1000, 1)
 
-        "almond": {"calories": 579, "protein": 21, "fat": 50, "carbs": 22, "fiber": 12.5, "sugar": 4.4, "sodium": 1},
-        "walnut": {"calories": 654, "protein": 15, "fat": 65, "carbs": 14, "fiber": 6.7, "sugar": 2.6, "sodium": 2},
-        "peanut": {"calories": 567, "protein": 26, "fat": 49, "carbs": 16, "fiber": 8.5, "sugar": 4.7, "sodium": 18},
-    
+        pool = WorkerPools.get("nutrition", Config.NUTRITION_BATCH_WORKERS)
+        futures = {key: pool.submit(timed, name) for key, name in unique.items()}
+        done, _ = wait(futures.values(), timeout=timeout)
 
-        "coffee": {"calories": 1, "protein": 0.1, "fat": 0.0, "carbs": 0.0, "fiber": 0, "sugar": 0.0, "sodium": 2},
-        "tea": {"calories": 1, "protein": 0.0, "fat": 0.0, "carbs": 0.3, "fiber": 0, "sugar": 0.0, "sodium": 4},
-    
+        outcomes = {}
+        for cache_key, future in futures.items():
+            if future not in done:
+                outcomes[cache_key] = {"status": "pending"}
+                continue
+            try:
+                result, elapsed_ms = future.result()
+            except Exception as e:
+                outcomes[cache_key] = {"status": "error", "error": str(e)}
+                continue
+            status = "error" if "error" in result else "ok"
+            outcomes[cache_key] = {"status": status, "nutrition": result, "elapsed_ms": elapsed_ms}
 
-        "pizza": {"calories": 266, "protein": 11, "fat": 10, "carbs": 33, "fiber": 2.3, "sugar": 3.6, "sodium": 598},
-        "hamburger": {"calories": 295, "protein": 17, "fat": 14, "carbs": 30, "fiber": 1.8, "sugar": 5.0, "sodium": 414},
-        "french fries": {"calories": 312, "protein": 3.4, "fat": 15, "carbs": 41, "fiber": 3.8, "sugar": 0.3, "sodium": 210},
-    
+        return USDAService._batch_items(food_names, outcomes)
 
-        "chocolate": {"calories": 546, "protein": 4.9, "fat": 31, "carbs": 61, "fiber": 7.0, "sugar": 48, "sodium": 24},
-        "ice cream": {"calories": 207, "protein": 3.5, "fat": 11, "carbs": 24, "fiber": 0.7, "sugar": 21, "sodium": 80},
-}
-        
-        food_lower = food_name.lower().strip()
-        
-        if food_lower in standard_foods:
-            print(f"Use standard values: {food_name}")
-            nutrients = standard_foods[food_lower]
-            return {
-                "name": food_name.title(),
-                "calories": nutrients["calories"],
-                "protein": nutrients["protein"],
-                "fat": nutrients["fat"],
-                "carbs": nutrients["carbs"],
-                "fiber": nutrients["fiber"],
-                "sugar": nutrients["sugar"],
-                "sodium": nutrients["sodium"],
-                "confidence": "standard"
-            }
-        
+    @staticmethod
+    def _unique_names(food_names):
+        """normalized name -> first spelling, for the valid names in a batch"""
+        unique = {}
+        for food_name in food_names:
+            cache_key = normalize_food_name(food_name) if isinstance(food_name, str) else ""
+            if cache_key and cache_key not in unique:
+                unique[cache_key] = food_name
+        return unique
+
+    @staticmethod
+    def _batch_items(food_names, outcomes):
+        items = []
+        for food_name in food_names:
+            cache_key = normalize_food_name(food_name) if isinstance(food_name, str) else ""
+            item = {"food_name": food_name, "normalized": cache_key}
+            item.update(outcomes.get(cache_key, {"status": "invalid"}))
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _resolve_and_cache(food_name, cache_key):
+        """
+        Resolve a non-standard food and cache the outcome for its TTL.
+        Results produced while an upstream call was failing are not cached.
+        """
+        result, outcome = USDAService._resolve_nutrition(food_name)
+        tracing.current_span().set(source=outcome)
+        USDAService._cache_outcome(cache_key, result, outcome)
+        return result
+
+    @staticmethod
+    def _standard_nutrition(food_name):
+        """Built-in table values for common foods, or None"""
+        nutrients = USDAService.STANDARD_FOODS.lookup(food_name)
+        if nutrients is None:
+            return None
+
+        tracing.debug("standard nutrition", food=food_name)
+        return {
+            "name": food_name.title(),
+            "calories": nutrients["calories"],
+            "protein": nutrients["protein"],
+            "fat": nutrients["fat"],
+            "carbs": nutrients["carbs"],
+            "fiber": nutrients["fiber"],
+            "sugar": nutrients["sugar"],
+            "sodium": nutrients["sodium"],
+            "confidence": "standard"
+        }
+
+    @staticmethod
+    def _cache_outcome(cache_key, result, outcome):
+        ttl = USDAService._outcome_ttl(outcome)
+        if ttl:
+            result_cache.set(cache_key, result, ttl=ttl)
 
+    @staticmethod
+    def _outcome_ttl(outcome):
+        """Result cache TTL for a resolution outcome; None for outcomes not cached"""
+        return {
+            "match": Config.NUTRITION_MATCH_TTL,
+            "average": Config.NUTRITION_AVERAGE_TTL,
+            "miss": Config.NUTRITION_MISS_TTL,
+        }.get(outcome)
+
+    @staticmethod
+    def _resolve_nutrition(food_name):
+        """
+        Smart match, then averaged fallback, then a fixed estimate.
+        Returns (result, outcome) with outcome one of match/average/miss/error.
+        """
         try:
             result = USDAService.get_single_food_nutrition(food_name)
             
-            if "error" in result:
-                print(f"If smart matching fails, use the average method: {food_name}")
+            if "error" not in result:
+                return result, "match"
 
-                return USDAService.get_nutrition_by_name_fallback(food_name)
-            
-            return result
+            tracing.debug("smart match failed, averaging", food=food_name)
+            average = USDAService.get_nutrition_by_name(food_name)
+            return USDAService._fallback_outcome(food_name, average)
             
         except Exception as e:
-            print(f"Error in obtaining nutritional data {food_name}: {e}")
-
-            return {
-                "name": food_name,
-                "calories": 100,
-                "protein": 5.0,
-                "fat": 2.0,
-                "carbs": 15.0,
-                "fiber": 2.0,
-                "sugar": 8.0,
-                "sodium": 50.0,
-                "confidence": "estimated"
-            }
-
-    @staticmethod
-    def get_nutrition_by_name_fallback(food_name):
-        try:
-            result = USDAService.get_nutrition_by_name(food_name)
-            
-            if "error" in result:
-                return {
-                    "name": food_name,
-                    "calories": 100,
-                    "protein": 5.0,
-                    "fat": 2.0,
-                    "carbs": 15.0,
-                    "fiber": 2.0,
-                    "sugar": 8.0,
-                    "sodium": 50.0,
-                    "confidence": "estimated"
-                }
-            
-            nutrients = result.get("nutrients", {})
-            
-            return {
-                "name": result.get("name", food_name),
-                "calories": nutrients.get("calories", 0),
-                "protein": nutrients.get("protein", 0),
-                "fat": nutrients.get("fat", 0),
-                "carbs": nutrients.get("carbs", 0),
-                "fiber": nutrients.get("fiber", 0),
-                "sugar": nutrients.get("sugar", 0),
-                "sodium": nutrients.get("sodium", 0),
-                "confidence": f"average_of_{result.get('samples_count', 0)}"
-            }
-        except Exception as e:
-            print(f"error: {e}")
-            return {
-                "name": food_name,
-                "calories": 100,
-                "protein": 5.0,
-                "fat": 2.0,
-                "carbs": 15.0,
-                "fiber": 2.0,
-                "sugar": 8.0,
-                "sodium": 50.0,
-                "confidence": "estimated"
-            }
+            tracing.warning("nutrition lookup failed", food=food_name, error=str(e))
+
+            return USDAService._estimated_nutrition(food_name), "error"
 
     @staticmethod
-    def get_nutrition_by_name(food_name):
+    def _fallback_outcome(food_name, average):
+        if "error" in average:
+            return USDAService._estimated_nutrition(food_name), "miss"
+        
+        outcome = "average" if average.get("samples_count", 0) > 0 else "error"
+        return USDAService._averaged_nutrition(food_name, average), outcome
 
-        print(f"search: '{food_name}'")
-    
+    @staticmethod
+    def invalidate_nutrition_cache(food_names=None, include_upstream=False):
+        """
+        Drop cached name resolutions (all of them when food_names is None),
+        optionally along with the cached USDA search and detail responses
+        """
+        if food_names is None:
+            result_cache.clear()
+            invalidated = "all"
+        else:
+            invalidated = []
+            for food_name in food_names:
+                cache_key = normalize_food_name(food_name)
+                if cache_key:
+                    result_cache.delete(cache_key)
+                    invalidated.append(cache_key)
+
+        if include_upstream:
+            search_cache.clear()
+            detail_cache.clear()
+
+        return invalidated
+
+    @staticmethod
+    def _averaged_nutrition(food_name, result):
+        nutrients = result.get("nutrients", {})
+        
+        return {
+            "name": result.get("name", food_name),
+            "calories": nutrients.get("calories", 0),
+            "protein": nutrients.get("protein", 0),
+            "fat": nutrients.get("fat", 0),
+            "carbs": nutrients.get("carbs", 0),
+            "fiber": nutrients.get("fiber", 0),
+            "sugar": nutrients.get("sugar", 0),
+            "sodium": nutrients.get("sodium", 0),
+            "confidence": f"average_of_{result.get('samples_count', 0)}"
+        }
+
+    @staticmethod
+    def _estimated_nutrition(food_name):
+        return {
+            "name": food_name,
+            "calories": 100,
+            "protein": 5.0,
+            "fat": 2.0,
+            "carbs": 15.0,
+            "fiber": 2.0,
+            "sugar": 8.0,
+            "sodium": 50.0,
+            "confidence": "estimated"
+        }
+
+    @staticmethod
+    @tracing.traced("average")
+    def get_nutrition_by_name(food_name):
 
         food_name = food_name.lower().strip()
     
         search_results = USDAService.search_foods(food_name, limit=50)
-        foods = search_results.get("foods", [])
-    
-        print(f" Find {len(foods)} results to use for averaging.")
-    
-        if not foods:
+        candidates = USDAService._average_candidates(search_results.get("foods", []))
+        if not candidates:
             return {"error": f"No food found for '{food_name}'"}
+
+        details = USDAService.get_foods_by_fdc_ids([food["fdc_id"] for food in candidates])
+        return USDAService._average_nutrients(food_name, candidates, details)
+
+    @staticmethod
+    def _average_candidates(foods):
+        """Up to 20 search results worth averaging, skipping prepared products"""
+        if not foods:
+            return []
     
  
         filtered_foods = []
@@ -540,14 +664,15 @@ class USDAService:
             
             filtered_foods.append(food)
     
-        print(f"After filtering: {len(filtered_foods)} relevant results")
-    
+        tracing.current_span().set(results=len(foods), relevant=len(filtered_foods))
 
         if not filtered_foods:
             filtered_foods = foods
-            print("No relevant results were found; the average was calculated using all results.")
-    
 
+        return filtered_foods[:20]
+
+    @staticmethod
+    def _average_nutrients(food_name, candidates, details):
         all_nutrients = {
             'calories': [],
             'protein': [],
@@ -559,11 +684,12 @@ class USDAService:
         }
     
         valid_count = 0
-    
-        for food in filtered_foods[:20]:  
+
+        for food in candidates:
             try:
-             
-                food_detail = USDAService.get_food_by_fdc_id(food["fdc_id"])
+                food_detail = details.get(food["fdc_id"])
+                if food_detail is None:
+                    raise Exception("no detail returned")
                 nutrients = food_detail.get("nutrients", {})
             
             
@@ -574,13 +700,11 @@ class USDAService:
                             all_nutrients[key].append(value)
                 
                     valid_count += 1
-                    print(f"add: {food['description']} - calories: {nutrients.get('calories', 'N/A')}")
                 
-            except Exception as e:
-                print(f"faill {food['description']}: {e}")
+            except Exception:
                 continue
     
-        print(f" yes {valid_count} ")
+        tracing.current_span().set(samples=valid_count)
     
 
         avg_nutrients = {}
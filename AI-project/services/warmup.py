@@ -0,0 +1,95 @@
+"""
+Start-up warm-up for gunicorn workers. Read-only tables are built once in the
+master before fork so workers share them copy-on-write; each worker then
+loads its detector, starts its background threads and prefills its caches
+before it accepts traffic.
+"""
+import time
+
+from config.settings import Config
+from services import tracing
+from services.async_http_client import AsyncHttpClient
+from services.detectors import get_detector, reset_detector
+from services.food_index import FoodIndex
+from services.http_client import HttpClient
+from services.job_queue import get_job_queue, reset_job_queue
+from services.usda_service import USDAService
+from services.worker_pool import WorkerPools
+
+
+def _step(report, name, func):
+    started = time.perf_counter()
+    try:
+        detail = func()
+    except Exception as e:
+        detail = {"error": str(e)}
+    entry = {"ms": round((time.perf_counter() - started) * 1000, 1)}
+    if detail:
+        entry.update(detail)
+    report[name] = entry
+
+
+class Warmup:
+
+    @staticmethod
+    def shared():
+        """Master process, after the app is loaded and before workers fork"""
+        report = {}
+        if USDAService.uses_local_store():
+            _step(report, "food_index", Warmup._build_store_index)
+        tracing.info("warm-up (shared)", sample=False, **report)
+        return report
+
+    @staticmethod
+    def worker():
+        """Each worker, before it takes its first request"""
+        report = {}
+        _step(report, "detector", Warmup._warm_detector)
+        _step(report, "job_queue", lambda: {"backend": get_job_queue().stats().get("backend")})
+        _step(report, "async_http", lambda: {"running": AsyncHttpClient.loop().is_running()})
+        if Config.WARMUP_FOODS:
+            _step(report, "nutrition", Warmup._prefill_nutrition)
+        tracing.info("warm-up", sample=False, **report)
+        return report
+
+    @staticmethod
+    def after_fork():
+        """
+        Drop per-process state a worker may have inherited from the master:
+        upstream connection pools, thread pools, the detector and job queue
+        """
+        HttpClient.reset()
+        AsyncHttpClient.reset()
+        WorkerPools.shutdown(wait=False)
+        reset_detector()
+        reset_job_queue()
+
+    @staticmethod
+    def _build_store_index():
+        index = FoodIndex.for_store(USDAService.local_store())
+        return {"foods": len(index.foods)}
+
+    @staticmethod
+    def _warm_detector():
+        detector = get_detector()
+        detector.warm_up()
+        return {"backend": detector.name}
+
+    @staticmethod
+    def _prefill_nutrition():
+        """
+        Resolve WARMUP_FOODS into the nutrition caches. Upstream answers come
+        from the shared disk cache once any worker has fetched them; names in
+        the standard table are answered without USDA and warm nothing.
+        """
+        requests_before = HttpClient.stats()["requests"]
+        items = USDAService.get_simple_nutrition_batch(Config.WARMUP_FOODS, Config.WARMUP_TIMEOUT)
+        statuses = [item["status"] for item in items]
+        standard = sum(1 for item in items if item.get("nutrition", {}).get("confidence") == "standard")
+        return {
+            "foods": len(items),
+            "resolved": statuses.count("ok"),
+            "pending": statuses.count("pending"),
+            "standard": standard,
+            "upstream_requests": HttpClient.stats()["requests"] - requests_before,
+        }
@@ -0,0 +1,109 @@
+"""
+Named, bounded thread pools shared by a worker process
+"""
+import contextvars
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Runs every task in a copy of the submitting thread's contextvars, so the
+    request trace (services/tracing.py) follows work onto pool threads
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class WorkerPools:
+    """
+    One ThreadPoolExecutor per name. Pools are long-lived so work that
+    overruns a request deadline can finish in the background (and fill the
+    caches) without blocking the response; they are rebuilt after a fork.
+    """
+
+    _pools = {}
+    _pid = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name, max_workers):
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._pools = {}
+                cls._pid = os.getpid()
+            pool = cls._pools.get(name)
+            if pool is None:
+                pool = ContextThreadPoolExecutor(
+                    max_workers=max(1, max_workers), thread_name_prefix=f"{name}-worker"
+                )
+                cls._pools[name] = pool
+            return pool
+
+    @classmethod
+    def shutdown(cls, wait=False):
+        with cls._lock:
+            pools = cls._pools if cls._pid == os.getpid() else {}
+            cls._pools = {}
+            cls._pid = None
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class ByteBudget:
+    """
+    Counting semaphore over bytes: caps how much upload data a worker
+    process holds in flight across all requests
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        self._in_use = 0
+        self._peak = 0
+        self._waits = 0
+        self._waiters = deque()
+        self._condition = threading.Condition()
+
+    def acquire(self, size, timeout=None):
+        """
+        Reserve size bytes (clamped to the capacity, so one oversized item can
+        still run alone). Returns the reserved amount, or None on timeout.
+        Requests are served first come, first served, so large items are not
+        starved by a stream of small ones.
+        """
+        size = min(max(0, size), self.capacity)
+        with self._condition:
+            ticket = object()
+            self._waiters.append(ticket)
+
+            def ready():
+                return self._waiters[0] is ticket and self._in_use + size <= self.capacity
+
+            try:
+                if not ready():
+                    self._waits += 1
+                    if not self._condition.wait_for(ready, timeout=timeout):
+                        return None
+                self._in_use += size
+                self._peak = max(self._peak, self._in_use)
+                return size
+            finally:
+                self._waiters.remove(ticket)
+                self._condition.notify_all()
+
+    def release(self, size):
+        with self._condition:
+            self._in_use -= size
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'capacity': self.capacity,
+                'in_use': self._in_use,
+                'peak': self._peak,
+                'waits': self._waits,
+            }
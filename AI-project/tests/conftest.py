@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Keep the service-level caches in memory so tests never touch cache/*.sqlite3
+os.environ.setdefault("CACHE_DB_PATH", "")
+os.environ.setdefault("JOB_DB_PATH", "")
+os.environ.setdefault("METRICS_MULTIPROC_DIR", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from services.async_http_client import AsyncHttpClient
+from services.http_client import HttpClient
+
+
+class _FailingSession:
+    def __init__(self, error):
+        self.error = error
+        self.attempts = 0
+
+    def request(self, method, url, **kwargs):
+        self.attempts += 1
+        raise self.error
+
+
+def _request_with(monkeypatch, error):
+    session = _FailingSession(error)
+    monkeypatch.setattr(AsyncHttpClient, "client", classmethod(lambda cls: session))
+    monkeypatch.setattr(HttpClient, "_backoff", staticmethod(lambda attempt: 0))
+    with pytest.raises(type(error)):
+        AsyncHttpClient.run_blocking(AsyncHttpClient.get("http://upstream.test/", max_retries=2))
+    return session.attempts
+
+
+def test_connect_timeout_is_retried(monkeypatch):
+    error = aiohttp.ServerTimeoutError("Connection timeout to host http://upstream.test/")
+    assert _request_with(monkeypatch, error) == 3
+
+
+def test_connection_refused_is_retried(monkeypatch):
+    error = aiohttp.ClientConnectorError(None, OSError(111, "Connection refused"))
+    assert _request_with(monkeypatch, error) == 3
+
+
+@pytest.mark.parametrize("error", [
+    aiohttp.ServerTimeoutError("Timeout on reading data from socket"),
+    asyncio.TimeoutError(),
+])
+def test_read_timeout_is_not_retried(monkeypatch, error):
+    assert _request_with(monkeypatch, error) == 1
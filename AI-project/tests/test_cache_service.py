@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from services.cache_service import ResponseCache
+
+
+def _sqlite_threads(cache, monkeypatch):
+    """Record which threads reach the SQLite tier"""
+    threads = []
+    connection = cache._connection
+
+    def tracked():
+        threads.append(threading.get_ident())
+        return connection()
+
+    monkeypatch.setattr(cache, "_connection", tracked)
+    return threads
+
+
+def test_async_access_keeps_sqlite_off_the_loop_thread(tmp_path, monkeypatch):
+    cache = ResponseCache("test", disk_path=str(tmp_path / "cache.sqlite3"))
+    threads = _sqlite_threads(cache, monkeypatch)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await cache.set_async("k", {"v": 1})
+        cache._memory.clear()
+        disk_hit = await cache.get_async("k")
+        memory_hit = await cache.get_async("k")
+        return loop_thread, disk_hit, memory_hit
+
+    loop_thread, disk_hit, memory_hit = asyncio.run(scenario())
+    assert disk_hit == memory_hit == {"v": 1}
+    assert threads and loop_thread not in threads
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_async_miss_is_counted_once(tmp_path):
+    cache = ResponseCache("test", disk_path=str(tmp_path / "cache.sqlite3"))
+    assert asyncio.run(cache.get_async("absent")) is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,32 @@
+from services.detection_cache import DetectionCache
+
+
+def test_expired_nearest_neighbour_does_not_hide_a_live_one(monkeypatch):
+    cache = DetectionCache(max_entries=10, max_distance=6, ttl=100)
+    now = [1000.0]
+    monkeypatch.setattr("services.detection_cache.time.time", lambda: now[0])
+
+    cache.set(0b1, {"detected_foods": [], "label": "near"})
+    now[0] += 50
+    cache.set(0b111, {"detected_foods": [], "label": "far"})
+    now[0] += 60  # the nearer entry has expired, the farther one has not
+
+    result, distance = cache.get(0b0)
+    assert result["label"] == "far"
+    assert distance == 3
+    assert cache.stats()["entries"] == 1
+
+
+def test_expired_exact_match_falls_back_to_neighbour(monkeypatch):
+    cache = DetectionCache(max_entries=10, max_distance=6, ttl=100)
+    now = [1000.0]
+    monkeypatch.setattr("services.detection_cache.time.time", lambda: now[0])
+
+    cache.set(0b0, {"label": "exact"})
+    now[0] += 50
+    cache.set(0b11, {"label": "near"})
+    now[0] += 60
+
+    result, distance = cache.get(0b0)
+    assert (result["label"], distance) == ("near", 2)
+    assert cache.get(0b0)[1] == 2
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from config.settings import BASE_DIR, Config
+from services.fdc_store import FDCImporter, FDCStore
+from services.usda_service import USDAService
+
+FIXTURE = os.path.join(BASE_DIR, "data", "fixtures", "fdc_sample.json")
+
+
+@pytest.fixture(scope="module")
+def store_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("fdc") / "fdc_sample.sqlite3")
+    importer = FDCImporter(path)
+    assert importer.import_path(FIXTURE) == 30
+    assert importer.finish() == 30
+    return path
+
+
+@pytest.fixture
+def store(store_path):
+    return FDCStore.open(store_path)
+
+
+@pytest.fixture
+def local_backend(monkeypatch, store_path):
+    monkeypatch.setattr(Config, "USDA_BACKEND", "local")
+    monkeypatch.setattr(Config, "FDC_STORE_PATH", store_path)
+
+
+def test_metadata_records_import(store):
+    meta = store.metadata()
+    assert meta["food_count"] == "30"
+    assert meta["sources"] == "fdc_sample.json"
+
+
+def test_search_prefers_foods_containing_every_word(store):
+    result = store.search("apple juice", limit=10)
+    assert result["total_hits"] == 1
+    assert [food["fdc_id"] for food in result["foods"]] == [173933]
+
+
+def test_search_falls_back_to_any_word(store):
+    result = store.search("chicken kiwi", limit=10)
+    assert result["total_hits"] == 3
+    assert {food["fdc_id"] for food in result["foods"]} == {2346392, 171477, 173676}
+
+
+def test_search_filters_data_types_and_limits(store):
+    result = store.search("broccoli", limit=1, data_types=["SR Legacy"])
+    assert result["total_hits"] == 2
+    assert len(result["foods"]) == 1
+    assert result["foods"][0]["data_type"] == "SR Legacy"
+
+
+def test_search_without_words_finds_nothing(store):
+    assert store.search("  ,, ", limit=5) == {"foods": [], "total_hits": 0}
+
+
+def test_get_foods_keys_by_requested_ids(store):
+    foods = store.get_foods(["170567", 173424, "not-an-id", 999])
+    assert set(foods) == {"170567", 173424}
+    assert foods["170567"]["description"] == "Almonds"
+    assert foods["170567"]["fdc_id"] == "170567"
+    assert foods[173424]["serving_size"] == 100
+    assert foods[173424]["serving_unit"] == "g"
+    assert store.get_food(999) is None
+
+
+def test_kilojoule_energy_rows_are_skipped(store):
+    # Fuji apples list Energy in kcal (63) followed by kJ (264)
+    nutrients = store.get_food(1750340)["nutrients"]
+    assert nutrients["calories"] == 63
+    assert nutrients["protein"] == 0.15
+
+
+def test_local_backend_single_food_nutrition(local_backend):
+    result = USDAService.get_single_food_nutrition("chicken breast")
+    assert result["confidence"] == "smart_match"
+    assert result["selected_description"] in (
+        "Chicken, breast, boneless, skinless, raw",
+        "Chicken, broilers or fryers, breast, meat only, cooked, roasted",
+    )
+    assert result["calories"] > 0
+
+
+def test_local_backend_reports_unknown_food(local_backend):
+    result = USDAService.get_single_food_nutrition("zzyzx")
+    assert "error" in result
@@ -0,0 +1,56 @@
+from services.food_index import FoodIndex
+from services.usda_service import USDAService
+
+
+def _foods(*descriptions, data_type="SR Legacy"):
+    return [{"fdc_id": i, "description": d, "data_type": data_type} for i, d in enumerate(descriptions)]
+
+
+def _top(index, name, strategy=None, food_type=None):
+    return index.search(name, strategy, food_type, top_k=1)[0][1]["description"]
+
+
+def test_covering_every_word_beats_partial_matches():
+    index = FoodIndex.from_foods(_foods(
+        "Chicken nuggets, breaded, frozen",
+        "Chicken, broiler, breast, meat only, raw",
+        "Turkey breast, roasted",
+    ))
+    assert _top(index, "chicken breast") == "Chicken, broiler, breast, meat only, raw"
+    assert _top(index, "chicken nuggets") == "Chicken nuggets, breaded, frozen"
+
+
+def test_bm25_prefers_the_rarer_word():
+    index = FoodIndex.from_foods(_foods("Rice, white", "Rice, brown", "Rice cake", "Beans, black"))
+    assert _top(index, "black rice") == "Beans, black"
+
+
+def test_only_foods_sharing_a_word_are_candidates():
+    index = FoodIndex.from_foods(_foods("Bread, wheat", "Butter, salted"))
+    assert index.search("mango") == []
+
+
+def test_exclude_keyword_is_demoted_unless_the_name_asks_for_it():
+    index = FoodIndex.from_foods(_foods("Peaches, canned", "Peaches, yellow, sliced"))
+    assert _top(index, "peach") == "Peaches, canned"
+
+    strategy = {"exclude_keywords": ["canned"]}
+    assert _top(index, "peach", strategy) == "Peaches, yellow, sliced"
+    assert _top(index, "canned peach", strategy) == "Peaches, canned"
+
+
+def test_priority_keyword_and_foundation_preference_break_ties():
+    index = FoodIndex.from_foods(_foods("Spinach, frozen", "Spinach, raw"))
+    assert _top(index, "spinach", {"priority_keywords": ["raw"]}) == "Spinach, raw"
+
+    foods = _foods("Kale, cooked") + _foods("Kale, cooked", data_type="Foundation")
+    foods[1]["fdc_id"] = 99
+    index = FoodIndex.from_foods(foods)
+    assert index.search("kale", {"prefer_foundation": True}, top_k=1)[0][1]["fdc_id"] == 99
+
+
+def test_pick_best_match_uses_the_category_strategy():
+    foods = _foods("Apple juice, canned or bottled", "Apples, raw, with skin", "Babyfood, apple")
+    best = USDAService._match_search_results("apple", foods)
+    assert best["description"] == "Apples, raw, with skin"
+    assert "error" in USDAService._match_search_results("apple", _foods("Bread, wheat"))
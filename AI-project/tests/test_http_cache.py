@@ -0,0 +1,32 @@
+from flask import Flask, jsonify
+
+from routes.http_cache import etag_cache, http_cached
+
+
+def _client(payload):
+    app = Flask(__name__)
+
+    @app.route("/thing")
+    @http_cached()
+    def thing():
+        return jsonify(payload)
+
+    return app.test_client()
+
+
+def test_etag_is_written_only_when_the_body_changes():
+    etag_cache.clear()
+    payload = {"value": 1}
+    client = _client(payload)
+    sets = etag_cache.stats()["sets"]
+
+    first = client.get("/thing?id=1")
+    for _ in range(3):
+        assert client.get("/thing?id=1").headers["ETag"] == first.headers["ETag"]
+    assert etag_cache.stats()["sets"] - sets == 1
+
+    payload["value"] = 2
+    changed = client.get("/thing?id=1")
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert etag_cache.stats()["sets"] - sets == 2
+    assert client.get("/thing?id=1", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 304
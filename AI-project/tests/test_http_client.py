@@ -0,0 +1,96 @@
+import io
+
+import pytest
+import requests
+
+from config.settings import Config
+from services.http_client import HttpClient
+
+
+class _Session:
+    """Plays back a script of responses (status, headers) and exceptions"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(method)
+        step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.raw = io.BytesIO(b"")
+        return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr("services.http_client.time.sleep", waited.append)
+    return waited
+
+
+def _use(monkeypatch, session):
+    monkeypatch.setattr(HttpClient, "session", classmethod(lambda cls: session))
+    return session
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_get_is_retried_on_429_and_5xx(monkeypatch, sleeps, status):
+    session = _use(monkeypatch, _Session((status, {}), (200, {})))
+    assert HttpClient.get("http://upstream.test/").status_code == 200
+    assert len(session.calls) == 2 and len(sleeps) == 1
+
+
+def test_retries_stop_at_max_retries(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session((503, {})))
+    assert HttpClient.get("http://upstream.test/", max_retries=2).status_code == 503
+    assert len(session.calls) == 3
+
+
+def test_client_errors_are_not_retried(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session((404, {})))
+    assert HttpClient.get("http://upstream.test/").status_code == 404
+    assert len(session.calls) == 1 and sleeps == []
+
+
+def test_retry_after_is_honored(monkeypatch, sleeps):
+    _use(monkeypatch, _Session((429, {"Retry-After": "2"}), (200, {})))
+    assert HttpClient.get("http://upstream.test/").status_code == 200
+    assert sleeps == [2.0]
+
+
+def test_retry_after_beyond_the_cap_is_returned(monkeypatch, sleeps):
+    wait = Config.HTTP_RETRY_AFTER_MAX + 1
+    session = _use(monkeypatch, _Session((503, {"Retry-After": str(wait)}), (200, {})))
+    assert HttpClient.get("http://upstream.test/").status_code == 503
+    assert len(session.calls) == 1 and sleeps == []
+
+
+def test_connect_timeout_is_retried(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session(requests.exceptions.ConnectTimeout(), (200, {})))
+    assert HttpClient.get("http://upstream.test/").status_code == 200
+    assert len(session.calls) == 2
+
+
+def test_read_timeout_is_not_retried(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session(requests.exceptions.ReadTimeout()))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        HttpClient.get("http://upstream.test/")
+    assert len(session.calls) == 1
+
+
+def test_post_is_retried_on_429_but_not_on_5xx(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session((429, {}), (503, {}), (200, {})))
+    assert HttpClient.post("http://upstream.test/").status_code == 503
+    assert len(session.calls) == 2
+
+
+def test_post_marked_idempotent_is_retried_on_5xx(monkeypatch, sleeps):
+    session = _use(monkeypatch, _Session((503, {}), (200, {})))
+    assert HttpClient.post("http://upstream.test/", idempotent=True).status_code == 200
+    assert len(session.calls) == 2
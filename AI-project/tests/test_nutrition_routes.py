@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app import create_app
+from config.settings import Config
+from services.async_usda_service import AsyncUSDAService
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("body", [
+    None, [], {}, {"food_name": 5}, {"food_name": None}, {"food_name": ""}, {"food_name": "  "},
+    {"food_name": "?!"}, {"food_name": ["apple"]},
+])
+def test_by_name_rejects_invalid_food_name(client, body):
+    response = client.post("/api/nutrition/by-name", json=body)
+    assert response.status_code == 400
+    assert response.json["error"] == "Missing food_name"
+
+
+def test_by_name_answers_standard_food_offline(client):
+    response = client.post("/api/nutrition/by-name", json={"food_name": "Apples"})
+    assert response.status_code == 200
+    assert response.json["confidence"] == "standard"
+
+
+def test_batch_resolves_each_normalized_name_once(client, monkeypatch):
+    calls = []
+    resolve = AsyncUSDAService.get_simple_nutrition
+
+    async def counting(food_name):
+        calls.append(food_name)
+        return await resolve(food_name)
+
+    monkeypatch.setattr(AsyncUSDAService, "get_simple_nutrition", counting)
+    response = client.post("/api/nutrition/by-name/batch", json={"food_names": ["Apple", " apple ", "APPLE", "banana"]})
+    assert response.status_code == 200
+    body = response.json
+    assert (body["total"], body["unique"], body["resolved"]) == (4, 2, 4)
+    assert calls == ["Apple", "banana"]
+    assert [item["normalized"] for item in body["results"]] == ["apple", "apple", "apple", "banana"]
+    assert {item["nutrition"]["confidence"] for item in body["results"]} == {"standard"}
+
+
+def test_batch_marks_invalid_and_blank_entries(client):
+    names = ["apple", "", "   ", 5, None, ["apple"], "?!"]
+    response = client.post("/api/nutrition/by-name/batch", json={"food_names": names})
+    assert response.status_code == 200
+    statuses = [item["status"] for item in response.json["results"]]
+    assert statuses == ["ok"] + ["invalid"] * 6
+    assert response.json["unique"] == 1
+
+
+@pytest.mark.parametrize("body", [None, {}, {"food_names": []}, {"food_names": "apple"}])
+def test_batch_rejects_a_missing_list(client, body):
+    response = client.post("/api/nutrition/by-name/batch", json=body)
+    assert response.status_code == 400
+    assert response.json["error"] == "Missing food_names"
+
+
+def test_batch_rejects_too_many_names(client):
+    names = [f"food {i}" for i in range(Config.NUTRITION_BATCH_MAX_ITEMS + 1)]
+    response = client.post("/api/nutrition/by-name/batch", json={"food_names": names})
+    assert response.status_code == 400
+    assert response.json["error"] == "Too many food names"
+
+
+def test_batch_reports_lookups_past_the_deadline_as_pending(client, monkeypatch):
+    resolve = AsyncUSDAService.get_simple_nutrition
+
+    async def slow_unless_standard(food_name):
+        if food_name == "slow dish":
+            await asyncio.sleep(0.5)
+        return await resolve(food_name)
+
+    monkeypatch.setattr(AsyncUSDAService, "get_simple_nutrition", slow_unless_standard)
+    response = client.post("/api/nutrition/by-name/batch",
+                           json={"food_names": ["apple", "slow dish"], "timeout_ms": 50})
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json["results"]] == ["ok", "pending"]
+    assert "nutrition" not in response.json["results"][1]
+    assert (response.json["resolved"], response.json["pending"]) == (1, 1)
+    assert response.json["elapsed_ms"] < 500
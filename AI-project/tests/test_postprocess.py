@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from services.postprocess import filter_predictions, nms, predictions_to_arrays
+
+
+def _pred(cls, confidence, x=50, y=50, size=40):
+    return {"class": cls, "confidence": confidence, "x": x, "y": y, "width": size, "height": size}
+
+
+def test_predictions_become_xyxy_arrays():
+    boxes, scores, class_ids, names = predictions_to_arrays([_pred("apple", 0.9), _pred("pear", 0.5, x=100)])
+    np.testing.assert_allclose(boxes, [[30, 30, 70, 70], [80, 30, 120, 70]])
+    np.testing.assert_allclose(scores, [0.9, 0.5])
+    assert class_ids.tolist() == [0, 1] and names == ["apple", "pear"]
+
+
+def test_nms_keeps_the_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.6, 0.9, 0.5], dtype=np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+    assert nms(boxes, scores, 0.5, max_keep=1).tolist() == [1]
+
+
+def test_per_class_nms_only_suppresses_within_a_class():
+    predictions = [_pred("apple", 0.9), _pred("apple", 0.8, x=52), _pred("pear", 0.7, x=52)]
+    kept = filter_predictions(predictions, iou_threshold=0.5)
+    assert kept == [predictions[0], predictions[2]]
+
+
+def test_agnostic_pass_drops_near_identical_boxes_across_classes():
+    predictions = [_pred("apple", 0.9), _pred("pear", 0.7, x=52), _pred("pear", 0.6, x=200)]
+    kept = filter_predictions(predictions, iou_threshold=0.5, agnostic_iou_threshold=0.7)
+    assert kept == [predictions[0], predictions[2]]
+    # Below the agnostic threshold both labels survive
+    kept = filter_predictions(predictions, iou_threshold=0.5, agnostic_iou_threshold=0.95)
+    assert kept == predictions
+
+
+def test_a_box_suppressed_in_its_class_does_not_suppress_others():
+    # b is removed by a (same class); c overlaps b but not a, so c stays
+    a, b, c = _pred("apple", 0.9, x=50), _pred("apple", 0.8, x=60), _pred("pear", 0.7, x=95)
+    assert filter_predictions([a, b, c], iou_threshold=0.3, agnostic_iou_threshold=0.05) == [a, c]
+
+
+def test_confidence_floor_is_inclusive():
+    predictions = [_pred("apple", 0.3, x=0), _pred("pear", 0.5, x=100), _pred("fig", 0.8, x=200)]
+    assert filter_predictions(predictions, min_confidence=0.5) == [predictions[2], predictions[1]]
+    assert filter_predictions(predictions, min_confidence=0.9) == []
+
+
+@pytest.mark.parametrize("agnostic", [None, 0.7])
+def test_top_k_returns_the_most_confident(agnostic):
+    predictions = [_pred(f"food{i}", 0.1 * i, x=100 * i) for i in range(1, 8)]
+    kept = filter_predictions(predictions, top_k=3, agnostic_iou_threshold=agnostic)
+    assert [p["confidence"] for p in kept] == pytest.approx([0.7, 0.6, 0.5])
+
+
+def test_max_candidates_keeps_the_most_confident_boxes():
+    predictions = [_pred("apple", 0.1 * i, x=100 * i) for i in range(1, 6)]
+    kept = filter_predictions(predictions, max_candidates=2)
+    assert [p["confidence"] for p in kept] == pytest.approx([0.5, 0.4])
+
+
+def test_empty_input():
+    assert filter_predictions([]) == []
+    assert nms(np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), 0.5).size == 0
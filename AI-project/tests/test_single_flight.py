@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+from services.single_flight import SingleFlight
+
+
+def test_waiters_get_copies_untouched_by_the_leader():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    results = []
+
+    def slow():
+        started.set()
+        time.sleep(0.1)
+        return {"calories": 52}
+
+    def leader():
+        result = flight.do("apple", slow)
+        result["leader"] = True
+        results.append(result)
+
+    def waiter():
+        results.append(flight.do("apple", slow))
+
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait()
+    threads += [threading.Thread(target=waiter) for _ in range(3)]
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert flight.stats()["executions"] == 1
+    assert sorted(len(result) for result in results) == [1, 1, 1, 2]
+    assert len({id(result) for result in results}) == 4
+
+
+def test_async_callers_each_get_their_own_result():
+    flight = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"calories": 52}
+
+    async def caller(i):
+        result = await flight.do_async("apple", slow)
+        result[f"caller_{i}"] = i
+        return result
+
+    async def main():
+        return await asyncio.gather(*(caller(i) for i in range(4)))
+
+    results = asyncio.run(main())
+    assert flight.stats()["executions"] == 1
+    assert [sorted(result) for result in results] == [sorted(["calories", f"caller_{i}"]) for i in range(4)]
+    assert flight.stats()["in_flight"] == 0
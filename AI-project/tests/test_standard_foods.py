@@ -0,0 +1,20 @@
+import pytest
+
+from config.settings import Config
+from services.standard_foods import StandardFoodTable
+
+
+@pytest.fixture(scope="module")
+def table():
+    return StandardFoodTable.load(Config.STANDARD_FOODS_PATH, Config.FOOD_ALIASES_PATH)
+
+
+def test_aliases_resolve_to_their_row(table):
+    assert table.lookup("porridge") == table.lookup("oatmeal")
+    assert table.lookup("Burger") == table.lookup("hamburger")
+
+
+@pytest.mark.parametrize("name", ["oats", "cheeseburger"])
+def test_foods_without_an_equivalent_row_go_to_usda(table, name):
+    # Dry oats are ~5.7x the calories of cooked oatmeal; a cheeseburger is not a plain hamburger
+    assert table.lookup(name) is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from services.roboflow_service import RoboflowService
+from services.tiling import TiledDetector, tile_grid
+
+
+@pytest.mark.parametrize("width,height", [(2000, 1000), (1025, 4000), (640, 641), (3001, 2999)])
+def test_tiles_cover_the_image_with_overlap(width, height):
+    tile_size, overlap = 640, 0.2
+    tiles = tile_grid(width, height, tile_size, overlap)
+
+    covered = np.zeros((height, width), dtype=bool)
+    for x0, y0, x1, y1 in tiles:
+        assert 0 <= x0 < x1 <= width and 0 <= y0 < y1 <= height
+        assert x1 - x0 <= tile_size and y1 - y0 <= tile_size
+        covered[y0:y1, x0:x1] = True
+    assert covered.all()
+
+    # First and last tiles sit flush with the edges; neighbours overlap enough
+    xs = sorted({tile[0] for tile in tiles})
+    ys = sorted({tile[1] for tile in tiles})
+    assert xs[0] == 0 and ys[0] == 0
+    assert max(tile[2] for tile in tiles) == width and max(tile[3] for tile in tiles) == height
+    for starts in (xs, ys):
+        for left, right in zip(starts, starts[1:]):
+            assert tile_size - (right - left) >= overlap * tile_size - 1
+
+
+def test_small_image_is_one_tile():
+    assert tile_grid(500, 300, 640, 0.2) == [(0, 0, 500, 300)]
+
+
+def test_tile_boxes_map_back_to_image_coordinates(monkeypatch):
+    raw = {"predictions": [{"class": "apple", "confidence": 0.9, "x": 10, "y": 20, "width": 30, "height": 40}]}
+    monkeypatch.setattr(RoboflowService, "detect_food", staticmethod(lambda *args, **kwargs: raw))
+    crop = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    predictions, report = TiledDetector._detect_tile(crop, (400, 300, 464, 364), 1.0, "a.jpg")
+    assert predictions[0] == {"class": "apple", "confidence": 0.9, "x": 410, "y": 320, "width": 30, "height": 40}
+    assert report["detections"] == 1 and not report["full_frame"]
+
+    # A downscaled full-frame pass is scaled back up, with no offset
+    predictions, report = TiledDetector._detect_tile(crop, (0, 0, 2000, 1500), 2.0, "a.jpg")
+    assert predictions[0] == {"class": "apple", "confidence": 0.9, "x": 20, "y": 40, "width": 60, "height": 80}
+    assert report["full_frame"]
+    assert raw["predictions"][0]["x"] == 10  # the detector's response is not modified
+
+
+def test_tile_errors_are_reported(monkeypatch):
+    monkeypatch.setattr(RoboflowService, "detect_food", staticmethod(lambda *args, **kwargs: {"error": "down"}))
+    predictions, report = TiledDetector._detect_tile(np.zeros((8, 8, 3), dtype=np.uint8), (0, 0, 8, 8), 1.0, "a.jpg")
+    assert predictions == [] and report["error"] == "down"
+
+
+def test_merge_collapses_duplicates_from_overlapping_tiles():
+    # The same apple seen by two neighbouring tiles, plus a pear in the overlap
+    apple_left = {"class": "apple", "confidence": 0.8, "x": 500, "y": 100, "width": 60, "height": 60}
+    apple_right = dict(apple_left, confidence=0.9, x=502)
+    pear = {"class": "pear", "confidence": 0.7, "x": 502, "y": 100, "width": 60, "height": 60}
+    merged = TiledDetector.merge([apple_left, apple_right, pear])
+    assert merged == [apple_right, pear]